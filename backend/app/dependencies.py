@@ -0,0 +1,177 @@
+import os
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Optional
+from fastapi import Depends
+from .repositories.player_repository import PlayerRepository
+from .services.executors import BoundedExecutor
+from .startup import timed
+
+if TYPE_CHECKING:
+    # Imported in get_data_store() instead: they pull in numpy, which importing app.main should not pay for
+    from .services.clustering import ClusteringService
+    from .services.player_data_store import PlayerDataStore
+    from .services.player_similarity import PlayerSimilarityService
+
+logger = logging.getLogger(__name__)
+
+# Process-wide singletons. They are created lazily because Mangum runs with
+# lifespan="off" on Lambda, and warmed from the FastAPI lifespan otherwise.
+_data_store = None
+_similarity_service = None
+_clustering_service = None
+_executors: Dict[str, BoundedExecutor] = {}
+_lock = threading.Lock()
+
+
+def lazy_season_loading() -> bool:
+    return os.environ.get("LAZY_SEASON_LOADING", "false").lower() == "true"
+
+
+def max_cached_seasons():
+    value = os.environ.get("MAX_CACHED_SEASONS")
+    return int(value) if value else None
+
+
+def data_refresh_interval():
+    """Seconds between checks for changed season data, or None to never check."""
+    value = os.environ.get("DATA_REFRESH_INTERVAL")
+    return float(value) if value else None
+
+
+def http_cache_max_age() -> int:
+    """Seconds clients and CDNs may reuse a response before revalidating its ETag."""
+    return int(os.environ.get("HTTP_CACHE_MAX_AGE", "60"))
+
+
+def create_executors() -> Dict[str, BoundedExecutor]:
+    """Thread pools shared by both services: similarity and clustering on "compute",
+    repository reads and payload encoding on "load"."""
+    def setting(name, default=None):
+        value = os.environ.get(name)
+        return int(value) if value else default
+
+    return {
+        "compute": BoundedExecutor("compute", max_workers=setting("COMPUTE_WORKERS"),
+                                   max_queue=setting("COMPUTE_QUEUE_DEPTH", 32)),
+        "load": BoundedExecutor("load", max_workers=setting("LOAD_WORKERS", 8),
+                                max_queue=setting("LOAD_QUEUE_DEPTH", 64)),
+    }
+
+
+def create_player_repository() -> PlayerRepository:
+    # Repository modules are imported here so only the backend in use is loaded
+    data_artifact = os.environ.get("DATA_ARTIFACT")
+    use_dynamodb = os.environ.get("USE_DYNAMODB", "false").lower() == "true"
+    if data_artifact:
+        from .repositories.snapshot_player_repository import SnapshotPlayerRepository
+        logger.info(f"Using prebuilt data artifact: {data_artifact}")
+        return SnapshotPlayerRepository(data_artifact)
+    elif use_dynamodb:
+        from .repositories.dynamodb_player_repository import DynamoDBPlayerRepository
+        table_name = os.environ.get("DYNAMODB_TABLE", "nba_player_stats")
+        scan_segments = int(os.environ.get("DYNAMODB_SCAN_SEGMENTS", "4"))
+        packed_seasons = os.environ.get("DYNAMODB_PACKED_SEASONS", "false").lower() == "true"
+        logger.info(f"Using DynamoDB repository with table: {table_name}")
+        return DynamoDBPlayerRepository(table_name=table_name, total_segments=scan_segments,
+                                        packed_seasons=packed_seasons)
+    else:
+        from .repositories.file_player_repository import FilePlayerRepository
+        data_dir = os.environ.get("DATA_DIR", "./data")
+        snapshot_path = os.environ.get("DATA_SNAPSHOT")
+        ingest_workers = int(os.environ["INGEST_WORKERS"]) if os.environ.get("INGEST_WORKERS") else None
+        logger.info(f"Using File repository with data directory: {data_dir}")
+        return FilePlayerRepository(
+            data_dir=data_dir,
+            snapshot_path=snapshot_path,
+            ingest_workers=ingest_workers,
+            lazy=lazy_season_loading(),
+            max_cached_seasons=max_cached_seasons()
+        )
+
+
+def get_data_store() -> "PlayerDataStore":
+    global _data_store, _similarity_service, _clustering_service
+    if _data_store is None:
+        with _lock:
+            if _data_store is None:
+                with timed("import services"):
+                    from .services.clustering import ClusteringService
+                    from .services.player_data_store import PlayerDataStore
+                    from .services.player_similarity import PlayerSimilarityService
+                with timed("create repository"):
+                    player_repository = create_player_repository()
+                data_store = PlayerDataStore(
+                    player_repository,
+                    neighbor_table_path=os.environ.get("NEIGHBOR_TABLE_PATH"),
+                    lazy=lazy_season_loading(),
+                    max_cached_seasons=max_cached_seasons()
+                )
+                _executors.update(create_executors())
+                _similarity_service = PlayerSimilarityService(
+                    data_store.player_repository, data_store,
+                    executor=_executors["compute"], load_executor=_executors["load"]
+                )
+                _clustering_service = ClusteringService(
+                    data_store.player_repository, data_store,
+                    executor=_executors["compute"], load_executor=_executors["load"]
+                )
+                _data_store = data_store
+    return _data_store
+
+
+def get_player_repository(data_store: "PlayerDataStore" = Depends(get_data_store)) -> PlayerRepository:
+    return data_store.player_repository
+
+
+def get_player_similarity_service(data_store: "PlayerDataStore" = Depends(get_data_store)) -> "PlayerSimilarityService":
+    return _similarity_service
+
+
+def get_clustering_service(data_store: "PlayerDataStore" = Depends(get_data_store)) -> "ClusteringService":
+    return _clustering_service
+
+
+def current_data_version() -> Optional[str]:
+    """Data version of the data store, or None while it has not been built; never builds it."""
+    data_store = _data_store
+    return data_store.data_version() if data_store is not None else None
+
+
+def executor_stats() -> Dict[str, Dict[str, Any]]:
+    """Queue depth and timings of the service executors, by name."""
+    return {name: executor.stats() for name, executor in _executors.items()}
+
+
+def single_flight_stats() -> Dict[str, Dict[str, int]]:
+    """Coalesced (hits) and computed (misses) calls of the service single-flight layers."""
+    if _data_store is None:
+        return {}
+    return {
+        "similar_players": _similarity_service.single_flight.stats(),
+        "clustering": _clustering_service.single_flight.stats(),
+    }
+
+
+def shutdown_executors() -> None:
+    for executor in _executors.values():
+        executor.shutdown(wait=False)
+
+
+def admin_token() -> Optional[str]:
+    """Bearer token the /admin endpoints require; they are disabled while ADMIN_TOKEN is unset."""
+    return os.environ.get("ADMIN_TOKEN") or None
+
+
+def reload_player_data() -> Optional[str]:
+    """Re-read the repository and swap in a freshly normalized dataset; returns the new data version."""
+    logger.info("Reloading player data")
+    data_store = get_data_store()
+    data_store.reload()
+    return data_store.data_version()
+
+
+async def reload_player_data_async() -> Optional[str]:
+    """reload_player_data() on the load executor, so the event loop keeps serving meanwhile."""
+    get_data_store()
+    return await _executors["load"].run(reload_player_data)
@@ -0,0 +1,79 @@
+import hashlib
+import logging
+from typing import Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ConditionalGetMiddleware:
+    """ETag / Cache-Control for GET endpoints whose responses only change with the data.
+
+    The ETag is derived from `get_version()` (the data version) and the API
+    version, so it is the same for every URL until the data changes; each
+    URL is still cached separately by clients. A request whose If-None-Match
+    matches is answered with 304 before the endpoint runs. The version is
+    read before and after the endpoint, and a response is only tagged if the
+    data did not change in between. ETags are weak: the same data may be sent
+    with different encodings, so 304s carry `Vary: Accept-Encoding` like the
+    encoded responses do. `get_version()` runs on the event loop, so it must
+    not load anything; while it returns None, responses are not tagged.
+    """
+
+    def __init__(self, app, get_version: Callable[[], Optional[str]], api_version: str = "",
+                 path_prefixes: Tuple[str, ...] = ("/players",), max_age: int = 60):
+        self.app = app
+        self.get_version = get_version
+        self.api_version = api_version
+        self.path_prefixes = path_prefixes
+        self.cache_control = f"public, max-age={max_age}".encode("latin-1")
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["method"] not in ("GET", "HEAD")
+                or not scope["path"].startswith(self.path_prefixes)):
+            await self.app(scope, receive, send)
+            return
+
+        etag = self._etag()
+        if etag is None:
+            await self.app(scope, receive, send)
+            return
+
+        if self._matches(etag, scope):
+            await send({
+                "type": "http.response.start",
+                "status": 304,
+                "headers": [(b"etag", etag), (b"cache-control", self.cache_control), (b"vary", b"Accept-Encoding")],
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_etag(message):
+            if message["type"] == "http.response.start" and message["status"] == 200 and self._etag() == etag:
+                headers = [(name, value) for name, value in message.get("headers", [])
+                           if name.lower() not in (b"etag", b"cache-control")]
+                headers += [(b"etag", etag), (b"cache-control", self.cache_control)]
+                message = dict(message, headers=headers)
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
+
+    def _etag(self) -> Optional[bytes]:
+        try:
+            version = self.get_version()
+        except Exception as e:
+            logger.error(f"Could not read the data version: {str(e)}")
+            return None
+        if version is None:
+            return None
+        digest = hashlib.sha256(f"{self.api_version}:{version}".encode("utf-8")).hexdigest()
+        return f'W/"{digest[:20]}"'.encode("latin-1")
+
+    @staticmethod
+    def _matches(etag: bytes, scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == b"if-none-match":
+                # Weak comparison: W/"x" matches "x"
+                candidates = [candidate.strip() for candidate in value.split(b",")]
+                return any(candidate == b"*" or candidate.replace(b"W/", b"", 1) == etag[2:]
+                           for candidate in candidates)
+        return False
@@ -1,13 +1,55 @@
+import time
+_import_start = time.perf_counter()
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .routers import players
+from .routers import admin, players
+from .dependencies import (
+    current_data_version, data_refresh_interval, executor_stats, get_data_store, http_cache_max_age,
+    shutdown_executors, single_flight_stats
+)
+from .http_cache import ConditionalGetMiddleware
+from .responses import DefaultJSONResponse
+from . import startup
 from mangum import Mangum
 import logging
 
+startup.record("import", time.perf_counter() - _import_start)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the repository, dataset and normalization once per process so the
+    # first request does not pay for it. Lambda skips this (lifespan="off")
+    # and builds the same singletons lazily on the first request instead.
+    # Lazy season loading skips this and parses seasons as they are requested.
+    data_store = get_data_store()
+    if not data_store.lazy:
+        data_store.load()
+    startup.log_startup_timings()
+    refresh_interval = data_refresh_interval()
+    if refresh_interval:
+        data_store.start_auto_refresh(refresh_interval)
+    yield
+    data_store.stop_auto_refresh()
+    shutdown_executors()
+
+
 app = FastAPI(
     title="NBA Player Comparison API",
     description="API for finding similar NBA players using statistical analysis",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=DefaultJSONResponse
+)
+
+# Added before CORS so that 304s also get CORS headers
+app.add_middleware(
+    ConditionalGetMiddleware,
+    get_version=current_data_version,
+    api_version=app.version,
+    max_age=http_cache_max_age()
 )
 
 app.add_middleware(
@@ -16,9 +58,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Readable by browser clients for pagination and revalidation
+    expose_headers=["ETag", "Link", "X-Next-Cursor"],
 )
 
 app.include_router(players.router)
+app.include_router(admin.router)
 
 handler = Mangum(app, lifespan="off")
 
@@ -31,6 +76,12 @@ async def root():
             "players": "/players",
             "seasons": "/players/seasons",
             "similar_players": "/players/similar",
-            "player_clusters": "/players/clusters"
+            "player_clusters": "/players/clusters",
+            "metrics": "/metrics"
         }
     }
+
+
+@app.get("/metrics")
+async def metrics():
+    return {"executors": executor_stats(), "single_flight": single_flight_stats()}
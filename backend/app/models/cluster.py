@@ -1,8 +1,11 @@
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from .player import PlayerStats
 
+# Defined here rather than in services.kmeans so the routers can use it without importing numpy
+DEFAULT_SEED = 42
+
 
 class PlayerCluster(BaseModel):
     cluster_id: int
@@ -14,3 +17,6 @@ class ClusteringResult(BaseModel):
     clusters: List[PlayerCluster]
     season: str
     num_clusters: int
+    seed: Optional[int] = None
+    iterations: Optional[int] = None
+    inertia: Optional[float] = None
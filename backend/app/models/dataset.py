@@ -1,18 +1,115 @@
-from typing import List, Dict, Any, Optional
+import hashlib
+import unicodedata
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+from .player import PlayerStats
+
+NORMALIZED_STATS = [
+    'PTS', 'MP', 'FG', 'FGA', 'FG3', 'FG3A', 'FG2', 'FG2A',
+    'FT', 'FTA', 'ORB', 'DRB', 'AST', 'STL', 'TOV', 'BLK'
+]
+
+
+def fold_name(name: str) -> str:
+    """Case- and accent-insensitive form of a player name ("Jokić" -> "jokic")."""
+    decomposed = unicodedata.normalize('NFKD', name)
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(stripped.casefold().split())
+
 
 class Player:
-    def __init__(self, data: Dict[str, Any]):
-        self.data = data
-        self.normalized_stats = {}
+    """Lightweight view of one row of a PlayerDataset."""
+
+    __slots__ = ('dataset', 'index')
+
+    def __init__(self, dataset: 'PlayerDataset', index: int):
+        self.dataset = dataset
+        self.index = index
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        return self.dataset.records[self.index]
+
+    @property
+    def stats_vector(self) -> np.ndarray:
+        return self.dataset.stats[self.index]
+
+    @property
+    def normalized_stats(self) -> Dict[str, float]:
+        vector = self.stats_vector
+        return {f"{col}_norm": float(vector[i]) for i, col in enumerate(NORMALIZED_STATS)}
 
     def __getitem__(self, key: str) -> Any:
-        return self.data.get(key)
+        return self.dataset.records[self.index].get(key)
+
+    @property
+    def player_stats(self) -> PlayerStats:
+        return self.dataset.player_stats(self.index)
+
 
 class PlayerDataset:
-    def __init__(self, players: List[Dict[str, Any]]):
+    """Columnar store of player-seasons.
+
+    Rows are grouped by season (oldest first) so every season is a contiguous
+    slice. Normalized stats live in a single float32 matrix (`stats`, one
+    column per NORMALIZED_STATS entry) with parallel arrays for season,
+    position, age and games played; names and positions are interned in
+    string tables. The raw row dicts are kept in `records` for response
+    building.
+    """
+
+    def __init__(self, players: List[Dict[str, Any]],
+                 season_columns: Optional[Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]]] = None):
+        # season_columns: season -> (ages, games, raw_stats) already extracted
+        # for exactly that season's rows, in order
         valid_players = [p for p in players if p.get("Player") and str(p.get("Player")).strip()]
-        self.players = [Player(player) for player in valid_players]
-        self.seasons = set(player["Season"] for player in self.players)
+
+        self.season_table: List[str] = sorted(set(p["Season"] for p in valid_players))
+        season_codes = {season: code for code, season in enumerate(self.season_table)}
+        order = sorted(range(len(valid_players)), key=lambda i: season_codes[valid_players[i]["Season"]])
+        self.records: List[Dict[str, Any]] = [valid_players[i] for i in order]
+
+        self.season_ids = np.array([season_codes[r["Season"]] for r in self.records], dtype=np.int16)
+        self.name_table, self.name_ids = self._intern([str(r["Player"]) for r in self.records])
+        self.position_table, self.position_ids = self._intern([str(r.get("Pos") or '') for r in self.records])
+
+        boundaries = np.searchsorted(self.season_ids, np.arange(len(self.season_table) + 1))
+        self.season_slices: Dict[str, slice] = {
+            season: slice(int(boundaries[code]), int(boundaries[code + 1]))
+            for code, season in enumerate(self.season_table)
+        }
+
+        season_columns = season_columns or {}
+        blocks = [
+            season_columns.get(season) or self._extract_columns(self.records[season_slice])
+            for season, season_slice in self.season_slices.items()
+        ] or [self._extract_columns([])]
+        self.ages = np.concatenate([block[0] for block in blocks])
+        self.games = np.concatenate([block[1] for block in blocks])
+        self.raw_stats = np.concatenate([block[2] for block in blocks])
+        self.stats = np.zeros_like(self.raw_stats)
+        self.valid_rows = np.ones(len(self.records), dtype=bool)
+        # Built by the data store once the stats are normalized
+        self.similarity_index = None
+        self.search_index = None
+        self.neighbor_table = None
+        # Repository data version the rows were read at (see PlayerDataStore.data_version)
+        self.data_version = None
+        self._fingerprint = None
+        # Response models per row, built on first use and shared by every request
+        self._player_stats: List[Optional[PlayerStats]] = [None] * len(self.records)
+
+        self.players = [Player(self, i) for i in range(len(self.records))]
+
+        # (season, name) -> first matching row, exact and folded
+        self._row_index: Dict[Tuple[str, str], int] = {}
+        self._folded_row_index: Dict[Tuple[str, str], int] = {}
+        folded_names = [fold_name(name) for name in self.name_table]
+        for i, (season_id, name_id) in enumerate(zip(self.season_ids.tolist(), self.name_ids.tolist())):
+            season = self.season_table[season_id]
+            self._row_index.setdefault((season, self.name_table[name_id]), i)
+            self._folded_row_index.setdefault((season, folded_names[name_id]), i)
+        self.seasons = set(self.season_table)
         self.normalized = False
 
         if len(valid_players) < len(players):
@@ -20,63 +117,132 @@ class PlayerDataset:
 
         print(f"PlayerDataset initialized with {len(self.players)} players and {len(self.seasons)} seasons")
         if self.seasons:
-            print(f"Seasons in dataset: {sorted(list(self.seasons))}")
+            print(f"Seasons in dataset: {self.season_table}")
 
-    def normalize_data(self) -> None:
+    def normalize_data(self, seasons: Optional[List[str]] = None) -> None:
+        """Min-max scale stats within each season; `seasons` limits it to those seasons."""
         if not self.players:
             print("No players to normalize")
             return
 
-        cols_to_norm = [
-            'PTS', 'MP', 'FG', 'FGA', 'FG3', 'FG3A', 'FG2', 'FG2A',
-            'FT', 'FTA', 'ORB', 'DRB', 'AST', 'STL', 'TOV', 'BLK'
+        # Min-max scale every stat within its own season
+        season_slices = self.season_slices.values() if seasons is None else [
+            self.season_slices[season] for season in seasons if season in self.season_slices
         ]
-
-        for season in self.seasons:
-            season_players = [p for p in self.players if p["Season"] == season]
-            for col in cols_to_norm:
-                values = []
-                for p in season_players:
-                    val = p[col]
-                    if val is not None:
-                        try:
-                            if isinstance(val, str) and not val.strip():
-                                values.append(0.0)
-                            else:
-                                values.append(float(val))
-                        except (ValueError, TypeError):
-                            print(f"Warning: Could not convert value '{val}' for column {col} to float. Using 0.0 instead.")
-                            values.append(0.0)
-                    else:
-                        values.append(0.0)
-
-                min_val = min(values) if values else 0
-                max_val = max(values) if values else 0
-
-                if max_val > min_val:
-                    for i, player in enumerate(season_players):
-                        player.normalized_stats[f"{col}_norm"] = (values[i] - min_val) / (max_val - min_val)
-                else:
-                    for player in season_players:
-                        player.normalized_stats[f"{col}_norm"] = 0.0
-
+        for season_slice in season_slices:
+            values = self.raw_stats[season_slice].astype(np.float64)
+            min_vals = values.min(axis=0)
+            range_vals = values.max(axis=0) - min_vals
+            scaled = np.divide(values - min_vals, range_vals,
+                               out=np.zeros_like(values), where=range_vals > 0)
+            self.stats[season_slice] = scaled
+
+        # Rows with NaN/inf stats can never be ranked, so mask them once here
+        self.valid_rows = np.isfinite(self.stats).all(axis=1)
+        self._fingerprint = None
         self.normalized = True
         print("Normalization complete")
 
-    def get_player(self, player_name: str, season: str) -> Optional[Player]:
-        for player in self.players:
-            if player["Player"] == player_name and player["Season"] == season:
-                return player
-
-        for player in self.players:
-            player_field = player["Player"]
-            if player_field and player_field.lower() == player_name.lower() and player["Season"] == season:
-                return player
+    def replace_seasons(self, replacements: Dict[str, List[Dict[str, Any]]]) -> 'PlayerDataset':
+        """A new normalized dataset with the given seasons' rows replaced.
+
+        An empty list removes a season. Only the replaced seasons are
+        normalized again; the rest reuse this dataset's normalized stats, which
+        is exact because normalization is per season. This dataset is left
+        untouched so readers holding it are unaffected.
+        """
+        records = [r for r in self.records if r["Season"] not in replacements]
+        for rows in replacements.values():
+            records.extend(rows)
+
+        season_columns = {
+            season: (self.ages[season_slice], self.games[season_slice], self.raw_stats[season_slice])
+            for season, season_slice in self.season_slices.items()
+            if season not in replacements
+        }
+        dataset = PlayerDataset(records, season_columns)
+        for season, season_slice in dataset.season_slices.items():
+            if season not in replacements:
+                dataset.stats[season_slice] = self.stats[self.season_slices[season]]
+                dataset._player_stats[season_slice] = self._player_stats[self.season_slices[season]]
+        dataset.normalize_data(list(replacements))
+        return dataset
+
+    def player_stats(self, index: int) -> PlayerStats:
+        """Row `index` as PlayerStats, converted once per dataset (so once per data version)."""
+        stats = self._player_stats[index]
+        if stats is None:
+            stats = self._player_stats[index] = PlayerStats.from_record(self.records[index])
+        return stats
+
+    @property
+    def fingerprint(self) -> str:
+        """Content hash of names, seasons and normalized stats."""
+        if self._fingerprint is None:
+            digest = hashlib.sha256()
+            digest.update("\x1f".join(self.season_table).encode("utf-8"))
+            digest.update("\x1f".join(self.name_table).encode("utf-8"))
+            for array in (self.season_ids, self.name_ids, self.stats):
+                digest.update(np.ascontiguousarray(array).tobytes())
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def candidate_rows(self, index: int) -> np.ndarray:
+        """Rows that may be recommended as similar to row `index`.
+
+        Every row with finite stats except the player's own rows for that
+        season.
+        """
+        candidates = self.valid_rows.copy()
+        season_slice = self.season_slices[self.season_table[self.season_ids[index]]]
+        candidates[season_slice] &= self.name_ids[season_slice] != self.name_ids[index]
+        return candidates
 
-        return None
+    def get_player(self, player_name: str, season: str) -> Optional[Player]:
+        index = self._row_index.get((season, player_name))
+        if index is None:
+            index = self._folded_row_index.get((season, fold_name(player_name)))
+        return self.players[index] if index is not None else None
 
     def get_players_by_season(self, season: str) -> List[Player]:
-        return [p for p in self.players if p["Season"] == season]
+        season_slice = self.season_slices.get(season)
+        if season_slice is None:
+            return []
+        return self.players[season_slice]
 
     def get_seasons_list(self) -> List[str]:
         return sorted(list(self.seasons), reverse=True)
+
+    @staticmethod
+    def _intern(values: List[str]):
+        table: Dict[str, int] = {}
+        ids = np.array([table.setdefault(v, len(table)) for v in values], dtype=np.int32)
+        return list(table), ids
+
+    @classmethod
+    def _extract_columns(cls, records: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Ages, games and raw NORMALIZED_STATS of `records`."""
+        ages = np.array([cls._to_int(r.get("Age")) for r in records], dtype=np.int16)
+        games = np.array([cls._to_int(r.get("G")) for r in records], dtype=np.int16)
+        raw_stats = np.array(
+            [[cls._to_float(r.get(col), col) for col in NORMALIZED_STATS] for r in records],
+            dtype=np.float32
+        ).reshape(len(records), len(NORMALIZED_STATS))
+        return ages, games, raw_stats
+
+    @staticmethod
+    def _to_int(value) -> int:
+        try:
+            return int(value) if value is not None and str(value).strip() else 0
+        except (ValueError, TypeError):
+            return 0
+
+    @staticmethod
+    def _to_float(value, col: str) -> float:
+        if value is None or (isinstance(value, str) and not value.strip()):
+            return 0.0
+        try:
+            return float(value)
+        except (ValueError, TypeError):
+            print(f"Warning: Could not convert value '{value}' for column {col} to float. Using 0.0 instead.")
+            return 0.0
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
 
 
 class PlayerStats(BaseModel):
@@ -35,6 +35,72 @@ class PlayerStats(BaseModel):
     personal_fouls_per_game: float
     player_id: str
 
+    @classmethod
+    def from_record(cls, data: Dict[str, Any]) -> 'PlayerStats':
+        """Build from a raw player row; blank or unparsable stats become 0.
+
+        The converted values already have the field types, so validation is
+        skipped unless a text column holds something other than a string.
+        """
+        values: Dict[str, Any] = {}
+        for field, (column, kind) in _RECORD_COLUMNS.items():
+            if kind is str:
+                values[field] = data.get(column, '')
+            elif field == 'total_rebounds_per_game' and 'TRB' not in data:
+                values[field] = _convert(data.get('ORB'), float) + _convert(data.get('DRB'), float)
+            else:
+                values[field] = _convert(data.get(column), kind)
+
+        if all(isinstance(values[field], str) for field in _TEXT_FIELDS):
+            return cls.model_construct(**values)
+        return cls(**values)
+
+
+def _convert(value: Any, kind: type) -> Any:
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return kind(0)
+    try:
+        return kind(value)
+    except (ValueError, TypeError):
+        return kind(0)
+
+
+# PlayerStats field -> (raw row column, type), in field order
+_RECORD_COLUMNS = {
+    'player': ('Player', str),
+    'season': ('Season', str),
+    'position': ('Pos', str),
+    'age': ('Age', int),
+    'team': ('Team', str),
+    'games_played': ('G', int),
+    'games_started': ('GS', int),
+    'minutes_per_game': ('MP', float),
+    'points_per_game': ('PTS', float),
+    'field_goals_per_game': ('FG', float),
+    'field_goal_attempts_per_game': ('FGA', float),
+    'field_goal_percentage': ('FG%', float),
+    'three_pointers_per_game': ('FG3', float),
+    'three_point_attempts_per_game': ('FG3A', float),
+    'three_point_percentage': ('FG3%', float),
+    'two_pointers_per_game': ('FG2', float),
+    'two_point_attempts_per_game': ('FG2A', float),
+    'two_point_percentage': ('FG2%', float),
+    'effective_field_goal_percentage': ('eFG%', float),
+    'free_throws_per_game': ('FT', float),
+    'free_throw_attempts_per_game': ('FTA', float),
+    'free_throw_percentage': ('FT%', float),
+    'offensive_rebounds_per_game': ('ORB', float),
+    'defensive_rebounds_per_game': ('DRB', float),
+    'total_rebounds_per_game': ('TRB', float),
+    'assists_per_game': ('AST', float),
+    'steals_per_game': ('STL', float),
+    'blocks_per_game': ('BLK', float),
+    'turnovers_per_game': ('TOV', float),
+    'personal_fouls_per_game': ('PF', float),
+    'player_id': ('Player-additional', str),
+}
+_TEXT_FIELDS = [field for field, (_, kind) in _RECORD_COLUMNS.items() if kind is str]
+
 
 class SimilarPlayer(BaseModel):
     player: str
@@ -50,7 +116,34 @@ class SimilarPlayersResponse(BaseModel):
     similar_players: List[SimilarPlayer]
 
 
+# Upper bound on similar players returned for one query
+MAX_SIMILAR_PLAYERS = 100
+
+
 class PlayerQuery(BaseModel):
     player_name: str
     season: str = "2023_24"
-    num_similar: int = 5
+    num_similar: int = Field(5, ge=1, le=MAX_SIMILAR_PLAYERS)
+
+
+class BatchSimilarPlayersQuery(BaseModel):
+    # Each query is a PlayerQuery, so num_similar is capped per query as well:
+    # one batch asks for at most 100 x MAX_SIMILAR_PLAYERS rows
+    queries: List[PlayerQuery] = Field(..., min_length=1, max_length=100)
+
+
+class BatchSimilarPlayersResult(BaseModel):
+    player_name: str
+    season: str
+    result: Optional[SimilarPlayersResponse] = None
+    error: Optional[str] = None
+
+
+class BatchSimilarPlayersResponse(BaseModel):
+    results: List[BatchSimilarPlayersResult]
+
+
+class PlayerSearchResult(BaseModel):
+    player: str
+    seasons: List[str]
+    latest_season: str
@@ -1,3 +1,16 @@
+import importlib
 from .player_repository import PlayerRepository
-from .file_player_repository import FilePlayerRepository
-from .dynamodb_player_repository import DynamoDBPlayerRepository
+
+# Backends are imported on first use, so a process only pays for the one it
+# runs with (boto3 alone adds ~150ms to a cold start)
+_BACKENDS = {
+    'FilePlayerRepository': '.file_player_repository',
+    'DynamoDBPlayerRepository': '.dynamodb_player_repository',
+    'SnapshotPlayerRepository': '.snapshot_player_repository',
+}
+
+
+def __getattr__(name):
+    if name in _BACKENDS:
+        return getattr(importlib.import_module(_BACKENDS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
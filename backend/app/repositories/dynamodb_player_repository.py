@@ -1,65 +1,83 @@
+import zlib
 import boto3
-from boto3.dynamodb.conditions import Key
-from decimal import Decimal
+from botocore.exceptions import ClientError
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from typing import List, Dict, Any, Optional
 from .player_repository import PlayerRepository
+from . import player_snapshot
 
 
 class DynamoDBPlayerRepository(PlayerRepository):
-    def __init__(self, table_name: str = "nba_player_stats"):
-        self.dynamodb = boto3.resource('dynamodb')
-        self.table = self.dynamodb.Table(table_name)
+    """Player stats stored in DynamoDB (hash key Season, range key Player).
+
+    Full-table reads use parallel segmented scans: `total_segments` workers
+    each page through one segment on the (thread-safe) low-level client, and
+    decode every page as it arrives. Pass `client` to use a stand-in such as
+    scripts/fake_dynamodb_table.py instead of AWS.
+
+    The table also holds one catalog item (CATALOG_SEASON / CATALOG_PLAYER)
+    with the season list, per-season row counts and versions, and a table
+    version, so listing seasons is a single key lookup. It is written by
+    `update_season_catalog()` with a condition on its version, so concurrent
+    writers retry instead of overwriting each other. If it is missing,
+    readers count the seasons with a scan, once, without writing anything;
+    the migrate script (and verify_dynamodb.py --repair) puts it back with
+    `repair_season_catalog()`.
+
+    Optionally (`packed_seasons=True`) each season is also stored as one
+    item in the PACKED_SEASON partition: the aggregated rows as a
+    zlib-compressed columnar snapshot (see player_snapshot), written by
+    `write_packed_season()`. A season then loads with one GetItem and every
+    season with a single query. A packed item is only used while its Version
+    matches the season's catalog version; otherwise the per-player items are
+    queried as usual. The per-player items stay the source of truth.
+    """
+
+    CATALOG_SEASON = '#catalog'
+    CATALOG_PLAYER = '#seasons'
+    PACKED_SEASON = '#packed'
+    # DynamoDB items are capped at 400 KB; larger seasons stay unpacked
+    MAX_PACKED_BYTES = 380 * 1024
+    # Conditional catalog writes that lose a race re-read the catalog and try again
+    CATALOG_WRITE_ATTEMPTS = 5
+
+    # Per-game stats averaged over a player's rows in the same season
+    AVERAGED_STATS = ['MP', 'PTS', 'FG', 'FGA', 'FG%', 'FG3', 'FG3A', 'FG3%',
+                      'FG2', 'FG2A', 'FG2%', 'eFG%', 'FT', 'FTA', 'FT%',
+                      'ORB', 'DRB', 'TRB', 'AST', 'STL', 'BLK', 'TOV', 'PF']
+
+    def __init__(self, table_name: str = "nba_player_stats", total_segments: int = 4, client=None,
+                 packed_seasons: bool = False):
+        self.table_name = table_name
+        self.total_segments = max(1, total_segments)
+        self.packed_seasons = packed_seasons
+        if client is None:
+            self.dynamodb = boto3.resource('dynamodb')
+            client = self.dynamodb.Table(table_name).meta.client
+        self.client = client
+        self._deserializer = TypeDeserializer()
+        self._serializer = TypeSerializer()
         self._players_cache = {}
         self._seasons_cache = None
+        self._catalog_cache = None
+        # Set once the catalog has been read, so a missing catalog is not looked up again
+        self._catalog_loaded = False
 
     def get_all_players(self, season: Optional[str] = None) -> List[Dict[str, Any]]:
         cache_key = season if season else "all_seasons"
         if cache_key in self._players_cache:
             return self._players_cache[cache_key]
 
-        items = []
-
         try:
             if season:
                 print(f"DynamoDB: Getting players for season {season}")
-                response = self.table.query(
-                    KeyConditionExpression=Key('Season').eq(season)
-                )
-                items = response.get('Items', [])
-
-                while 'LastEvaluatedKey' in response:
-                    response = self.table.query(
-                        KeyConditionExpression=Key('Season').eq(season),
-                        ExclusiveStartKey=response['LastEvaluatedKey']
-                    )
-                    items.extend(response.get('Items', []))
+                players = self._load_season(season)
+            elif self.packed_seasons:
+                players = self._load_packed_seasons()
             else:
-                scan_kwargs = {}
-                done = False
-
-                while not done:
-                    response = self.table.scan(**scan_kwargs)
-                    items.extend(response.get('Items', []))
-
-                    if 'LastEvaluatedKey' in response:
-                        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
-                    else:
-                        done = True
-
-            # Process items
-            for item in items:
-                for key, value in item.items():
-                    # Convert Decimal to float
-                    if isinstance(value, Decimal):
-                        item[key] = float(value)
-                    # Handle empty strings
-                    elif isinstance(value, str) and not value.strip():
-                        if key in ['G', 'GS', 'Age']:
-                            item[key] = 0
-                        else:
-                            item[key] = 0.0
-
-            players = self._aggregate_players_in_same_season(items)
+                players = self._aggregate_players_in_same_season(self._scan(**self._rows_filter()))
 
             self._players_cache[cache_key] = players
             return players
@@ -67,6 +85,322 @@ class DynamoDBPlayerRepository(PlayerRepository):
             print(f"Error retrieving data from DynamoDB: {e}")
             return []
 
+    def _load_season(self, season: str) -> List[Dict[str, Any]]:
+        if self.packed_seasons:
+            players = self._read_packed_season(season)
+            if players is not None:
+                return players
+        return self._aggregate_players_in_same_season(self._paginate('query', self._season_query(season)))
+
+    def _load_packed_seasons(self) -> List[Dict[str, Any]]:
+        """Every season from its packed item, querying per-player items for seasons without a current one."""
+        catalog = self.get_season_catalog() or self._scan_catalog()
+        packed = {}
+        for item in self._paginate('query', self._season_query(self.PACKED_SEASON)):
+            players = self._decode_packed(item, catalog)
+            if players is not None:
+                packed[item['Player']] = players
+
+        players = []
+        for season in sorted(catalog['seasons']):
+            if season not in packed:
+                print(f"DynamoDB: no current packed item for season {season}, querying its players")
+            players.extend(packed[season] if season in packed else self._aggregate_players_in_same_season(
+                self._paginate('query', self._season_query(season))
+            ))
+        return players
+
+    def _read_packed_season(self, season: str) -> Optional[List[Dict[str, Any]]]:
+        response = self.client.get_item(TableName=self.table_name, Key=self._packed_key(season))
+        item = response.get('Item')
+        if item is None:
+            return None
+        return self._decode_packed(self._decode_item(item), self.get_season_catalog())
+
+    def _decode_packed(self, item: Dict[str, Any], catalog: Optional[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+        """Rows from a packed season item, or None if it is older than the season's catalog entry."""
+        season = item.get('Player')
+        entry = (catalog or {}).get('seasons', {}).get(season)
+        if entry is None or int(item.get('Version', -1)) != entry['version']:
+            return None
+        blob = item.get('Blob')
+        return player_snapshot.decode_snapshot(zlib.decompress(bytes(blob))) if blob is not None else None
+
+    def write_packed_season(self, season: str) -> bool:
+        """Store the season's aggregated rows as one packed item, tagged with its catalog version.
+
+        Call after update_season_catalog() has counted the season. Returns
+        False when the season is not in the catalog or too large to pack.
+        """
+        catalog = self._read_catalog()
+        entry = (catalog or {}).get('seasons', {}).get(season)
+        if entry is None:
+            return False
+        players = self._aggregate_players_in_same_season(self._paginate('query', self._season_query(season)))
+        blob = zlib.compress(player_snapshot.encode_snapshot(players, f"{season}:v{entry['version']}"))
+        if len(blob) > self.MAX_PACKED_BYTES:
+            print(f"DynamoDB: season {season} packs to {len(blob)} bytes, leaving it unpacked")
+            return False
+
+        item = dict(self._packed_key(season))
+        item.update({
+            'Version': {'N': str(entry['version'])},
+            'Rows': {'N': str(len(players))},
+            'Blob': {'B': blob},
+        })
+        self.client.put_item(TableName=self.table_name, Item=item)
+        print(f"DynamoDB: packed season {season}: {len(players)} players in {len(blob)} bytes")
+        return True
+
+    def _scan(self, **kwargs) -> List[Dict[str, Any]]:
+        """Every item in the table, read with `total_segments` parallel segment scans."""
+        if self.total_segments == 1:
+            return self._paginate('scan', kwargs)
+
+        def scan_segment(segment: int) -> List[Dict[str, Any]]:
+            return self._paginate('scan', dict(kwargs, Segment=segment, TotalSegments=self.total_segments))
+
+        with ThreadPoolExecutor(max_workers=self.total_segments) as executor:
+            segments = list(executor.map(scan_segment, range(self.total_segments)))
+        # Concatenate in segment order so the result does not depend on timing
+        return [item for items in segments for item in items]
+
+    def _paginate(self, operation: str, kwargs: Dict[str, Any]) -> List[Dict[str, Any]]:
+        request = dict(kwargs, TableName=self.table_name)
+        call = getattr(self.client, operation)
+        items = []
+        while True:
+            response = call(**request)
+            items.extend(self._decode_item(item) for item in response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                return items
+            request['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def _decode_item(self, item: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Plain values from a low-level item: numbers become floats, blank strings zeros."""
+        decoded = {}
+        for key, attribute in item.items():
+            if 'N' in attribute:
+                value = float(attribute['N'])
+            elif 'S' in attribute:
+                value = attribute['S']
+                # Handle empty strings
+                if not value.strip():
+                    value = 0 if key in ['G', 'GS', 'Age'] else 0.0
+            else:
+                value = self._deserializer.deserialize(attribute)
+            decoded[key] = value
+        return decoded
+
+    def reload(self) -> None:
+        self._players_cache = {}
+        self._seasons_cache = None
+        self._catalog_cache = None
+        self._catalog_loaded = False
+
+    def get_season_catalog(self) -> Optional[Dict[str, Any]]:
+        """The catalog as {'version', 'updated_at', 'seasons': {season: {'count', 'version'}}}, or None."""
+        if not self._catalog_loaded:
+            self._catalog_cache = self._read_catalog()
+            self._catalog_loaded = True
+        return self._catalog_cache
+
+    def get_season_counts(self) -> Dict[str, int]:
+        catalog = self.get_season_catalog() or self._scan_catalog()
+        return {season: entry['count'] for season, entry in catalog['seasons'].items()}
+
+    def get_data_version(self) -> Optional[str]:
+        catalog = self.get_season_catalog()
+        return catalog['version'] if catalog else None
+
+    def update_season_catalog(self, seasons: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Recount `seasons` (or every season, with a scan) and write a new catalog version.
+
+        Updated seasons get the new version number, so readers can tell which
+        seasons changed. Call this after writing player rows.
+        """
+        if seasons is None:
+            return self._write_catalog(self._count_seasons(), replace=True)
+
+        return self._write_catalog({season: self.count_season_rows(season) for season in seasons})
+
+    def repair_season_catalog(self) -> Dict[str, Any]:
+        """Write a catalog rebuilt from a Season-only scan if the table has none; returns the catalog."""
+        catalog = self._read_catalog()
+        if catalog is not None:
+            return catalog
+        print("DynamoDB: season catalog missing, rebuilding it with a scan")
+        return self._write_catalog(self._count_seasons(), replace=True)
+
+    def count_season_rows(self, season: str) -> int:
+        """Rows currently stored for a season, counted server-side."""
+        request = dict(self._season_query(season), Select='COUNT', TableName=self.table_name)
+        total = 0
+        while True:
+            response = self.client.query(**request)
+            total += response.get('Count', 0)
+            if 'LastEvaluatedKey' not in response:
+                return total
+            request['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def refresh(self) -> List[str]:
+        """Re-read the catalog and reload the seasons whose version changed."""
+        previous = self._catalog_cache
+        catalog = self._read_catalog()
+        if catalog is None or previous is None or catalog['version'] == previous['version']:
+            self._catalog_cache = catalog or previous
+            self._catalog_loaded = True
+            return []
+
+        seasons = set(catalog['seasons']) | set(previous['seasons'])
+        changed = sorted(
+            season for season in seasons
+            if catalog['seasons'].get(season, {}).get('version') != previous['seasons'].get(season, {}).get('version')
+        )
+        self._catalog_cache = catalog
+        self._catalog_loaded = True
+        self._seasons_cache = None
+
+        cache = dict(self._players_cache)
+        for season in changed:
+            cache.pop(season, None)
+        if 'all_seasons' in cache:
+            # Patch the full list with just the changed seasons instead of rescanning
+            players = [p for p in cache['all_seasons'] if p.get('Season') not in changed]
+            for season in changed:
+                players.extend(self._load_season(season))
+            cache['all_seasons'] = players
+        self._players_cache = cache
+        print(f"DynamoDB: catalog version {catalog['version']}, changed seasons: {changed}")
+        return changed
+
+    def _rows_filter(self) -> Dict[str, Any]:
+        """Scan arguments that leave out the packed season items (up to MAX_PACKED_BYTES each).
+
+        The filter is applied server-side after the read, so the blobs still
+        count toward read capacity but are never sent back.
+        """
+        return {
+            'FilterExpression': '#season <> :packed',
+            'ExpressionAttributeNames': {'#season': 'Season'},
+            'ExpressionAttributeValues': {':packed': {'S': self.PACKED_SEASON}},
+        }
+
+    def _season_query(self, season: str) -> Dict[str, Any]:
+        return {
+            'KeyConditionExpression': '#season = :season',
+            'ExpressionAttributeNames': {'#season': 'Season'},
+            'ExpressionAttributeValues': {':season': {'S': season}},
+        }
+
+    def _packed_key(self, season: str) -> Dict[str, Dict[str, str]]:
+        return {'Season': {'S': self.PACKED_SEASON}, 'Player': {'S': season}}
+
+    def _catalog_key(self) -> Dict[str, Dict[str, str]]:
+        return {'Season': {'S': self.CATALOG_SEASON}, 'Player': {'S': self.CATALOG_PLAYER}}
+
+    def _read_catalog(self) -> Optional[Dict[str, Any]]:
+        response = self.client.get_item(TableName=self.table_name, Key=self._catalog_key())
+        item = response.get('Item')
+        if item is None:
+            return None
+        item = {key: self._deserializer.deserialize(value) for key, value in item.items()}
+        return {
+            'version': str(item.get('Version', 0)),
+            'updated_at': item.get('UpdatedAt', ''),
+            'seasons': {
+                season: {'count': int(entry.get('Count', 0)), 'version': int(entry.get('Version', 0))}
+                for season, entry in item.get('Seasons', {}).items()
+            },
+        }
+
+    def _write_catalog(self, counts: Dict[str, int], replace: bool = False) -> Dict[str, Any]:
+        # Read-modify-write, guarded by the version read: a writer that loses the race starts over
+        for _ in range(self.CATALOG_WRITE_ATTEMPTS):
+            current = self._read_catalog()
+            catalog = self._put_catalog(current, counts, replace)
+            if catalog is not None:
+                return catalog
+            print("DynamoDB: season catalog changed while it was being updated, retrying")
+        raise RuntimeError(f"Could not update the season catalog after {self.CATALOG_WRITE_ATTEMPTS} attempts")
+
+    def _put_catalog(self, current: Optional[Dict[str, Any]], counts: Dict[str, int],
+                     replace: bool) -> Optional[Dict[str, Any]]:
+        """Write the next catalog version on top of `current`; None if someone else wrote one first."""
+        version = int(current['version']) + 1 if current else 1
+        seasons = {} if replace or current is None else dict(current['seasons'])
+        for season, count in counts.items():
+            if count:
+                seasons[season] = {'count': count, 'version': version}
+            else:
+                seasons.pop(season, None)
+
+        catalog = {
+            'version': str(version),
+            'updated_at': datetime.now(timezone.utc).isoformat(),
+            'seasons': seasons,
+        }
+        item = {
+            'Season': self.CATALOG_SEASON,
+            'Player': self.CATALOG_PLAYER,
+            'Version': version,
+            'UpdatedAt': catalog['updated_at'],
+            'Seasons': {
+                season: {'Count': entry['count'], 'Version': entry['version']}
+                for season, entry in seasons.items()
+            },
+        }
+        if current is None:
+            condition = {
+                'ConditionExpression': 'attribute_not_exists(#season)',
+                'ExpressionAttributeNames': {'#season': 'Season'},
+            }
+        else:
+            condition = {
+                'ConditionExpression': '#version = :version',
+                'ExpressionAttributeNames': {'#version': 'Version'},
+                'ExpressionAttributeValues': {':version': {'N': current['version']}},
+            }
+        try:
+            self.client.put_item(
+                TableName=self.table_name,
+                Item={key: self._serializer.serialize(value) for key, value in item.items()},
+                **condition
+            )
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+                return None
+            raise
+        print(f"DynamoDB: wrote season catalog version {version} with {len(seasons)} seasons")
+        self._catalog_cache = catalog
+        self._catalog_loaded = True
+        self._seasons_cache = None
+        return catalog
+
+    def _scan_catalog(self) -> Dict[str, Any]:
+        """Stand-in for a missing catalog, counted with a Season-only scan and kept in memory only.
+
+        It has no version, so get_data_version() stays None and no packed item
+        matches it.
+        """
+        print("DynamoDB: season catalog missing, counting seasons with a scan")
+        counts = self._count_seasons()
+        self._catalog_cache = {
+            'version': None,
+            'updated_at': '',
+            'seasons': {season: {'count': count, 'version': 0} for season, count in counts.items()},
+        }
+        self._catalog_loaded = True
+        return self._catalog_cache
+
+    def _count_seasons(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for item in self._scan(ProjectionExpression='#season', ExpressionAttributeNames={'#season': 'Season'}):
+            season = item.get('Season')
+            if season and isinstance(season, str) and season not in (self.CATALOG_SEASON, self.PACKED_SEASON):
+                counts[season] = counts.get(season, 0) + 1
+        return counts
+
     def _aggregate_players_in_same_season(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         player_seasons = {}
 
@@ -74,7 +408,7 @@ class DynamoDBPlayerRepository(PlayerRepository):
             season = item.get('Season', '')
             player = item.get('Player', '')
 
-            if not season or not player:
+            if not season or not player or season in (self.CATALOG_SEASON, self.PACKED_SEASON):
                 continue
 
             key = (season, player)
@@ -120,19 +454,17 @@ class DynamoDBPlayerRepository(PlayerRepository):
             player_data['GS'] += self._safe_convert(item.get('GS'), int, 0)
             player_data['teams_count'] += 1
 
-            for stat in ['MP', 'PTS', 'FG', 'FGA', 'FG%', 'FG3', 'FG3A', 'FG3%',
-                         'FG2', 'FG2A', 'FG2%', 'eFG%', 'FT', 'FTA', 'FT%',
-                         'ORB', 'DRB', 'TRB', 'AST', 'STL', 'BLK', 'TOV', 'PF']:
+            for stat in self.AVERAGED_STATS:
                 if stat in item:
-                    player_data[stat] += self._safe_convert(item.get(stat), float, 0.0)
+                    value = item[stat]
+                    # Decoded numbers are already floats
+                    player_data[stat] += value if type(value) is float else self._safe_convert(value, float, 0.0)
 
         # Calculate averages for stats that need to be averaged
         for player_data in player_seasons.values():
             teams_count = player_data.pop('teams_count')
-            if teams_count > 0:
-                for stat in ['MP', 'PTS', 'FG', 'FGA', 'FG%', 'FG3', 'FG3A', 'FG3%',
-                             'FG2', 'FG2A', 'FG2%', 'eFG%', 'FT', 'FTA', 'FT%',
-                             'ORB', 'DRB', 'TRB', 'AST', 'STL', 'BLK', 'TOV', 'PF']:
+            if teams_count > 1:
+                for stat in self.AVERAGED_STATS:
                     player_data[stat] /= teams_count
 
         return list(player_seasons.values())
@@ -152,31 +484,8 @@ class DynamoDBPlayerRepository(PlayerRepository):
             return self._seasons_cache
 
         try:
-            response = self.table.scan(
-                ProjectionExpression='Season',
-                Select='SPECIFIC_ATTRIBUTES'
-            )
-
-            seasons = set()
-            for item in response.get('Items', []):
-                if 'Season' in item:
-                    season = item['Season']
-                    if season and isinstance(season, str):
-                        seasons.add(season)
-
-            while 'LastEvaluatedKey' in response:
-                response = self.table.scan(
-                    ProjectionExpression='Season',
-                    ExclusiveStartKey=response['LastEvaluatedKey'],
-                    Select='SPECIFIC_ATTRIBUTES'
-                )
-
-                for item in response.get('Items', []):
-                    if 'Season' in item:
-                        season = item['Season']
-                        if season and isinstance(season, str):
-                            seasons.add(season)
-
+            catalog = self.get_season_catalog() or self._scan_catalog()
+            seasons = catalog['seasons']
             self._seasons_cache = sorted(list(seasons), reverse=True)
             print(f"DynamoDB: All seasons found: {self._seasons_cache}")
             return self._seasons_cache
@@ -1,17 +1,53 @@
-import os
 import csv
-from typing import List, Dict, Any, Optional
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
 from .player_repository import PlayerRepository
+from . import player_snapshot
+from .csv_ingest import file_signature, ingest_season_files, season_files
 
 
 class FilePlayerRepository(PlayerRepository):
-    def __init__(self, data_dir: str = './data'):
+    def __init__(self, data_dir: str = './data', snapshot_path: Optional[str] = None,
+                 ingest_workers: Optional[int] = None, lazy: bool = False,
+                 max_cached_seasons: Optional[int] = None):
         self.data_dir = data_dir
+        # None uses every available core; 1 parses the season files serially
+        self.ingest_workers = ingest_workers
+        # CSVs stay the source of truth; the snapshot is regenerated when stale
+        self.snapshot_path = snapshot_path
+        # Lazy: seasons come from file names and each season file is parsed on
+        # first access; every player is loaded only when asked for
+        self.lazy = lazy
+        self.max_cached_seasons = max_cached_seasons
         self._players = None
         self._seasons = None
-        self._load_data()
+        self._season_files: Dict[str, str] = {}
+        # season -> (mtime_ns, size, sha256) of its file when it was last read;
+        # the hash is None until it is needed (lazy scans only stat the files)
+        self._file_signatures: Dict[str, Tuple[int, int, Optional[str]]] = {}
+        # season -> "mtime_ns-size" its file had when the current content was first
+        # seen; kept while the content is unchanged, so lazy and eager loads and
+        # touched files all give the same data version
+        self._file_versions: Dict[str, str] = {}
+        self._season_cache: OrderedDict = OrderedDict()
+        self._season_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        if lazy:
+            self._scan_seasons()
+        else:
+            self._load_data()
 
     def get_all_players(self, season: Optional[str] = None) -> List[Dict[str, Any]]:
+        if self.lazy and self._players is None:
+            if season:
+                return self._get_season(season)
+            with self._load_lock:
+                if self._players is None:
+                    self._load_data()
+
         if self._players is None:
             return []
 
@@ -26,27 +62,199 @@ class FilePlayerRepository(PlayerRepository):
             return []
         return self._seasons
 
-    def _load_data(self) -> None:
-        all_players = []
+    def reload(self) -> None:
+        if self.lazy:
+            self._players = None
+            self._scan_seasons()
+        else:
+            self._load_data()
+
+    def get_data_version(self) -> Optional[str]:
+        """Hash of the season files' version tokens; changes when refresh() or reload() picks up edits.
+
+        The tokens come from file stats, not contents, so the version is the
+        same whether the files were hashed (eager loads) or only stat-ed
+        (lazy scans), and stays the same when a file is touched.
+        """
+        digest = hashlib.sha256()
+        for season, version in sorted(self._file_versions.items()):
+            digest.update(f"{season}:{version}\n".encode("utf-8"))
+        return digest.hexdigest()
 
-        for file in os.listdir(self.data_dir):
-            if file.endswith('.csv'):
-                season = file.replace('.csv', '')
-                file_path = os.path.join(self.data_dir, file)
-                players = self._load_csv(file_path, season)
-                all_players.extend(players)
+    def refresh(self) -> List[str]:
+        """Re-read only the season files that changed since they were last read.
 
-        if all_players:
-            self._players = [player for player in all_players if int(player.get('G', 0)) > 10]
+        A changed mtime or size triggers a hash check, so touching a file does
+        not count as a change. A file whose earlier hash is unknown (lazy scans
+        only stat files) counts as changed once its mtime or size changes.
+        Loaded players are replaced with a new list,
+        leaving lists already handed out untouched.
+        """
+        with self._load_lock:
+            files = dict(season_files(self.data_dir))
+            signatures = dict(self._file_signatures)
+            changed = []
+            for season in sorted(set(files) | set(signatures)):
+                if season not in files:
+                    signatures.pop(season)
+                    changed.append(season)
+                    continue
+                stat = os.stat(files[season])
+                previous = signatures.get(season)
+                if previous is not None and previous[:2] == (stat.st_mtime_ns, stat.st_size):
+                    continue
+                signatures[season] = file_signature(files[season])
+                if previous is None or previous[2] is None or previous[2] != signatures[season][2]:
+                    changed.append(season)
+
+            self._set_signatures(signatures)
+            if not changed:
+                return []
+
+            print(f"Season files changed: {changed}")
+            self._season_files = files
+            if self._players is not None:
+                players = [player for player in self._players if player.get('Season') not in changed]
+                for season in changed:
+                    if season in files:
+                        players.extend(self._parse_season(files[season], season))
+                players.sort(key=lambda player: player.get('Season', ''))
+                self._players = players
+                self._seasons = sorted(set(player.get('Season', '') for player in players), reverse=True)
+            else:
+                self._seasons = sorted(files, reverse=True)
+            with self._season_lock:
+                for season in changed:
+                    self._season_cache.pop(season, None)
+            return changed
+
+    def _scan_seasons(self) -> None:
+        # Only names and stat results: no season file is opened until it is needed
+        self._season_files = dict(season_files(self.data_dir))
+        self._set_signatures(self._stat_signatures())
+        self._seasons = sorted(self._season_files, reverse=True)
+        with self._season_lock:
+            self._season_cache.clear()
+
+    def _get_season(self, season: str) -> List[Dict[str, Any]]:
+        """One season's players, parsed on first access and kept in a bounded LRU cache."""
+        with self._season_lock:
+            players = self._season_cache.get(season)
+            if players is not None:
+                self._season_cache.move_to_end(season)
+                return players
+
+        file_path = self._season_files.get(season)
+        if file_path is None:
+            return []
+        print(f"Loading season {season} from {file_path}")
+        players = self._parse_season(file_path, season)
+
+        with self._season_lock:
+            self._season_cache[season] = players
+            self._season_cache.move_to_end(season)
+            if self.max_cached_seasons is not None:
+                while len(self._season_cache) > self.max_cached_seasons:
+                    evicted, _ = self._season_cache.popitem(last=False)
+                    print(f"Evicted season {evicted} from the season cache")
+        return players
+
+    def _parse_season(self, file_path: str, season: str) -> List[Dict[str, Any]]:
+        return [player for player in self._load_csv(file_path, season) if int(player.get('G', 0)) > 10]
+
+    def _read_signatures(self) -> Dict[str, Tuple[int, int, Optional[str]]]:
+        return {season: file_signature(path) for season, path in self._season_files.items()}
+
+    def _set_signatures(self, signatures: Dict[str, Tuple[int, int, Optional[str]]]) -> None:
+        """Replace the file signatures, keeping the version token of every file whose content is unchanged."""
+        versions = {}
+        for season, (mtime_ns, size, file_hash) in signatures.items():
+            previous = self._file_signatures.get(season)
+            version = self._file_versions.get(season)
+            unchanged = previous is not None and (
+                previous[:2] == (mtime_ns, size) or (file_hash is not None and previous[2] == file_hash))
+            versions[season] = version if version is not None and unchanged else f"{mtime_ns}-{size}"
+        self._file_signatures = signatures
+        self._file_versions = versions
+
+    def _stat_signatures(self) -> Dict[str, Tuple[int, int, Optional[str]]]:
+        signatures = {}
+        for season, path in self._season_files.items():
+            stat = os.stat(path)
+            signatures[season] = (stat.st_mtime_ns, stat.st_size, None)
+        return signatures
+
+    def _load_data(self) -> None:
+        # Signatures are taken before parsing so edits made during the load show up as changes
+        self._season_files = dict(season_files(self.data_dir))
+        if self.snapshot_path:
+            self._players = self._load_snapshot()
         else:
-            self._players = []
+            self._set_signatures(self._read_signatures())
+            self._players = self._load_csv_files()
 
         all_seasons = set(player.get('Season', '') for player in self._players)
         print(f"All seasons found: {all_seasons}")
 
         self._seasons = sorted(list(all_seasons), reverse=True)
+        # Every season is in memory now; per-season entries would be duplicates
+        with self._season_lock:
+            self._season_cache.clear()
+
+    def _load_snapshot(self) -> List[Dict[str, Any]]:
+        header = player_snapshot.read_snapshot_header(self.snapshot_path)
+        signatures = self._snapshot_signatures(header)
+        if signatures is not None:
+            # Every file has the mtime and size it had when the snapshot was written:
+            # take the hashes it recorded instead of reading the CSVs
+            players = player_snapshot.read_snapshot(self.snapshot_path, header["source_hash"])
+            if players is not None:
+                self._set_signatures(signatures)
+                print(f"Loaded {len(players)} players from snapshot {self.snapshot_path}")
+                return players
+
+        self._set_signatures(self._read_signatures())
+        sources = {os.path.basename(self._season_files[season]): signature
+                   for season, signature in self._file_signatures.items()}
+        # The files were just hashed for their signatures; reuse those digests
+        source_hash = player_snapshot.source_fingerprint(
+            self.data_dir, {file: file_hash for file, (_, _, file_hash) in sources.items()})
+        players = player_snapshot.read_snapshot(self.snapshot_path, source_hash)
+        if players is not None:
+            print(f"Loaded {len(players)} players from snapshot {self.snapshot_path}")
+        else:
+            players = self._load_csv_files()
+        # Also rewritten when only mtimes changed, so the next start can skip hashing again
+        try:
+            player_snapshot.write_snapshot(self.snapshot_path, players, source_hash, sources)
+            print(f"Wrote snapshot {self.snapshot_path}")
+        except OSError as e:
+            print(f"Could not write snapshot {self.snapshot_path}: {e}")
+        return players
+
+    def _snapshot_signatures(self, header: Optional[Dict[str, Any]]) -> Optional[Dict[str, Tuple[int, int, Optional[str]]]]:
+        """Signatures from the snapshot header if every season file matches it by mtime and size, else None."""
+        sources = (header or {}).get("sources") or {}
+        if len(sources) != len(self._season_files):
+            return None
+        signatures = {}
+        for season, (mtime_ns, size, _) in self._stat_signatures().items():
+            recorded = sources.get(os.path.basename(self._season_files[season]))
+            if recorded is None or tuple(recorded[:2]) != (mtime_ns, size):
+                return None
+            signatures[season] = (mtime_ns, size, recorded[2])
+        return signatures
+
+    def _load_csv_files(self) -> List[Dict[str, Any]]:
+        all_players = []
+
+        for season, players in ingest_season_files(self.data_dir, self._load_csv, self.ingest_workers):
+            all_players.extend(players)
+
+        return [player for player in all_players if int(player.get('G', 0)) > 10]
 
-    def _load_csv(self, file_path: str, season: str) -> List[Dict[str, Any]]:
+    @staticmethod
+    def _load_csv(file_path: str, season: str) -> List[Dict[str, Any]]:
         players = []
 
         try:
@@ -10,3 +10,25 @@ class PlayerRepository(abc.ABC):
     @abc.abstractmethod
     def get_seasons(self) -> List[str]:
         pass
+
+    def reload(self) -> None:
+        pass
+
+    def get_season_counts(self) -> Dict[str, int]:
+        """Number of player rows per season."""
+        counts: Dict[str, int] = {}
+        for player in self.get_all_players():
+            season = player.get('Season', '')
+            counts[season] = counts.get(season, 0) + 1
+        return counts
+
+    def get_data_version(self) -> Optional[str]:
+        """Opaque token that changes whenever the stored data changes, if known."""
+        return None
+
+    def refresh(self) -> List[str]:
+        """Pick up seasons whose source data changed and return them.
+
+        Repositories that cannot detect changes report none.
+        """
+        return []
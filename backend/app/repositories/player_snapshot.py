@@ -0,0 +1,235 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+
+MAGIC = b"NBASNAP\0"
+FORMAT_VERSION = 1
+# magic, header length; the JSON header follows, then 8-byte aligned blocks
+PREAMBLE = struct.Struct("<8sI")
+ALIGNMENT = 8
+
+
+def source_fingerprint(data_dir: str, file_hashes: Optional[Dict[str, str]] = None) -> str:
+    """Hash of every season CSV's name and sha256, in file name order.
+
+    `file_hashes` (file name -> sha256 hex digest) supplies digests the
+    caller already has, so those files are not read again.
+    """
+    file_hashes = file_hashes or {}
+    digest = hashlib.sha256(f"snapshot-v{FORMAT_VERSION}".encode("ascii"))
+    for file in sorted(os.listdir(data_dir)):
+        if file.endswith('.csv'):
+            file_hash = file_hashes.get(file)
+            if file_hash is None:
+                with open(os.path.join(data_dir, file), 'rb') as f:
+                    file_hash = hashlib.sha256(f.read()).hexdigest()
+            digest.update(f"{file}\0{file_hash}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def write_snapshot(path: str, players: List[Dict[str, Any]], source_hash: str,
+                   sources: Optional[Dict[str, Tuple[int, int, str]]] = None) -> None:
+    """Write player rows as a columnar snapshot file, atomically."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(encode_snapshot(players, source_hash, sources))
+    os.replace(tmp_path, path)
+
+
+def encode_snapshot(players: List[Dict[str, Any]], source_hash: str,
+                    sources: Optional[Dict[str, Tuple[int, int, str]]] = None) -> bytes:
+    """Encode player rows as a columnar snapshot.
+
+    Numeric columns become fixed-dtype arrays, text columns become int32 ids
+    into a shared string table. Every distinct key order ("layout") is
+    recorded so decoded rows come back with the same keys in the same order.
+    `sources` (file name -> (mtime_ns, size, sha256)) records the files the
+    rows were read from, so a reader can tell they are unchanged from a stat.
+    """
+    layouts: Dict[Tuple[str, ...], int] = {}
+    layout_ids = np.array([layouts.setdefault(tuple(p), len(layouts)) for p in players], dtype=np.uint16)
+
+    columns: Dict[str, List[int]] = {}
+    for row, player in enumerate(players):
+        for key in player:
+            columns.setdefault(key, []).append(row)
+
+    strings: Dict[str, int] = {}
+    blocks: List[Tuple[str, np.ndarray]] = [("layout_ids", layout_ids)]
+    column_specs = []
+    for name, rows in columns.items():
+        values = [players[row][name] for row in rows]
+        kind = _column_kind(values)
+        spec = {"name": name, "kind": kind, "complete": len(rows) == len(players)}
+        if not spec["complete"]:
+            blocks.append((f"{name}:rows", np.array(rows, dtype=np.int32)))
+        if kind == "int":
+            blocks.append((name, np.array(values, dtype=np.int64)))
+        elif kind in ("float", "number"):
+            blocks.append((name, np.array(values, dtype=np.float64)))
+            if kind == "number":
+                blocks.append((f"{name}:is_int", np.array([isinstance(v, int) for v in values], dtype=np.uint8)))
+        else:
+            encoded = values if kind == "str" else [json.dumps(v) for v in values]
+            blocks.append((name, np.array([strings.setdefault(v, len(strings)) for v in encoded], dtype=np.int32)))
+        column_specs.append(spec)
+
+    string_bytes = [s.encode("utf-8") for s in strings]
+    string_offsets = np.zeros(len(string_bytes) + 1, dtype=np.int64)
+    string_offsets[1:] = np.cumsum([len(b) for b in string_bytes])
+    blocks.append(("strings:offsets", string_offsets))
+    blocks.append(("strings:data", np.frombuffer(b"".join(string_bytes), dtype=np.uint8)))
+
+    header = {
+        "format_version": FORMAT_VERSION,
+        "source_hash": source_hash,
+        "sources": {file: list(signature) for file, signature in (sources or {}).items()},
+        "rows": len(players),
+        "layouts": [list(layout) for layout in layouts],
+        "columns": column_specs,
+        "blocks": {},
+    }
+    # Offsets are relative to the first aligned byte after the header
+    offset = 0
+    for name, array in blocks:
+        offset = _align(offset)
+        header["blocks"][name] = {"offset": offset, "dtype": array.dtype.str, "count": int(array.size)}
+        offset += array.nbytes
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = _align(PREAMBLE.size + len(header_bytes))
+
+    out = bytearray(PREAMBLE.pack(MAGIC, len(header_bytes)))
+    out += header_bytes
+    for name, array in blocks:
+        out += b"\0" * (data_start + header["blocks"][name]["offset"] - len(out))
+        out += np.ascontiguousarray(array).tobytes()
+    return bytes(out)
+
+
+def read_snapshot_header(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, 'rb') as f:
+            preamble = f.read(PREAMBLE.size)
+            magic, header_length = PREAMBLE.unpack(preamble)
+            if magic != MAGIC:
+                return None
+            return parse_snapshot_header(preamble + f.read(header_length))
+    except (OSError, struct.error):
+        return None
+
+
+def parse_snapshot_header(buffer) -> Optional[Dict[str, Any]]:
+    """The JSON header at the start of an encoded snapshot, or None if it is not one."""
+    try:
+        magic, header_length = PREAMBLE.unpack_from(buffer)
+        if magic != MAGIC:
+            return None
+        header = json.loads(bytes(buffer[PREAMBLE.size:PREAMBLE.size + header_length]))
+    except (ValueError, struct.error):
+        return None
+    if header.get("format_version") != FORMAT_VERSION:
+        return None
+    header["data_start"] = _align(PREAMBLE.size + header_length)
+    return header
+
+
+def read_snapshot(path: str, source_hash: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+    """Decode player rows from a memory-mapped snapshot.
+
+    This is a faster private decode, not shared memory: the columns are read
+    straight from the mapping, which is much faster than parsing CSVs, but
+    the rows returned are ordinary dicts owned by this process. The mapping
+    is closed before returning; only the file's page cache is shared.
+
+    Returns None when the file is missing, unreadable or was generated from
+    different source data than `source_hash`.
+    """
+    header = read_snapshot_header(path)
+    if header is None:
+        return None
+    if source_hash is not None and header["source_hash"] != source_hash:
+        print(f"Snapshot {path} is stale")
+        return None
+
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        # _decode copies everything out, so no array still points into the mapping when it closes
+        return _decode(buffer, header)
+
+
+def decode_snapshot(buffer, source_hash: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+    """Decode player rows from an encoded snapshot held in memory (bytes or any buffer)."""
+    header = parse_snapshot_header(buffer)
+    if header is None or (source_hash is not None and header["source_hash"] != source_hash):
+        return None
+    return _decode(buffer, header)
+
+
+def _decode(buffer, header: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def block(name: str) -> np.ndarray:
+        spec = header["blocks"][name]
+        if not spec["count"]:
+            return np.empty(0, dtype=np.dtype(spec["dtype"]))
+        return np.frombuffer(buffer, dtype=np.dtype(spec["dtype"]), count=spec["count"],
+                             offset=header["data_start"] + spec["offset"])
+
+    rows = header["rows"]
+    offsets = block("strings:offsets").tolist()
+    string_data = block("strings:data").tobytes()
+    strings = [string_data[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+    column_values: Dict[str, List[Any]] = {}
+    for spec in header["columns"]:
+        name, kind = spec["name"], spec["kind"]
+        values = block(name)
+        if kind in ("int", "float"):
+            decoded = values.tolist()
+        elif kind == "number":
+            decoded = [int(v) if is_int else v for v, is_int in zip(values.tolist(), block(f"{name}:is_int").tolist())]
+        elif kind == "str":
+            decoded = [strings[i] for i in values.tolist()]
+        else:
+            decoded = [json.loads(strings[i]) for i in values.tolist()]
+
+        if spec["complete"]:
+            column_values[name] = decoded
+        else:
+            full: List[Any] = [None] * rows
+            for row, value in zip(block(f"{name}:rows").tolist(), decoded):
+                full[row] = value
+            column_values[name] = full
+
+    # Decode runs of consecutive rows sharing a layout (normally one per season file)
+    layout_ids = block("layout_ids")
+    run_starts = [0] + (np.flatnonzero(np.diff(layout_ids)) + 1).tolist()
+    run_stops = run_starts[1:] + [rows]
+    players: List[Dict[str, Any]] = []
+    for start, stop in zip(run_starts, run_stops):
+        if start == stop:
+            continue
+        keys = header["layouts"][int(layout_ids[start])]
+        key_columns = [column_values[key][start:stop] for key in keys]
+        players.extend(dict(zip(keys, values)) for values in zip(*key_columns))
+
+    return players
+
+
+def _column_kind(values: List[Any]) -> str:
+    types = {type(v) for v in values}
+    if types == {int}:
+        return "int"
+    if types == {float}:
+        return "float"
+    if types == {int, float}:
+        return "number"
+    if types == {str}:
+        return "str"
+    return "json"
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
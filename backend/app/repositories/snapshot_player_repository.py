@@ -0,0 +1,42 @@
+from typing import List, Dict, Any, Optional
+from .player_repository import PlayerRepository
+from . import player_snapshot
+
+
+class SnapshotPlayerRepository(PlayerRepository):
+    """Players read from a prebuilt snapshot, e.g. one baked into the container image.
+
+    There are no source files to check the snapshot against, so it is used
+    as is and only changes when a new snapshot is deployed. Build one with
+    scripts/build_data_snapshot.py, from the CSVs or from a DynamoDB table.
+    """
+
+    def __init__(self, snapshot_path: str):
+        self.snapshot_path = snapshot_path
+        self._players = None
+        self._seasons = None
+        self._source_hash = None
+        self._load_data()
+
+    def get_all_players(self, season: Optional[str] = None) -> List[Dict[str, Any]]:
+        if season:
+            return [player for player in self._players if player.get('Season') == season]
+        return self._players
+
+    def get_seasons(self) -> List[str]:
+        return self._seasons
+
+    def reload(self) -> None:
+        self._load_data()
+
+    def get_data_version(self) -> Optional[str]:
+        return self._source_hash
+
+    def _load_data(self) -> None:
+        header = player_snapshot.read_snapshot_header(self.snapshot_path)
+        if header is None:
+            raise ValueError(f"{self.snapshot_path} is not a readable player data snapshot")
+        self._players = player_snapshot.read_snapshot(self.snapshot_path)
+        self._source_hash = header["source_hash"]
+        self._seasons = sorted(set(player.get('Season', '') for player in self._players), reverse=True)
+        print(f"Loaded {len(self._players)} players from data artifact {self.snapshot_path}")
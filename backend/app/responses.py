@@ -0,0 +1,37 @@
+from typing import Any, Dict, Iterator, List, Optional
+from fastapi.responses import JSONResponse, ORJSONResponse, Response, StreamingResponse
+from .services.encoded_payload import EncodedPayload, dumps, orjson
+
+# Row lists longer than this are streamed, this many rows per chunk
+STREAM_CHUNK_ROWS = 1000
+
+# Encoder for every other response; orjson is optional
+DefaultJSONResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+
+def json_rows_response(rows: List[Dict[str, Any]], headers: Optional[Dict[str, str]] = None) -> Response:
+    """Pass-through rows as a JSON list, encoded directly instead of validated per row.
+
+    Long lists are streamed chunk by chunk, so the first rows are sent
+    before the last are encoded and the whole payload is never held twice.
+    """
+    if len(rows) <= STREAM_CHUNK_ROWS:
+        return Response(dumps(rows), media_type="application/json", headers=headers)
+    return StreamingResponse(_stream_rows(rows), media_type="application/json", headers=headers)
+
+
+def encoded_json_response(payload: EncodedPayload, accept_encoding: str) -> Response:
+    """A pre-encoded payload, compressed with the best encoding the client accepts."""
+    body, encoding = payload.body_for(accept_encoding)
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def _stream_rows(rows: List[Dict[str, Any]]) -> Iterator[bytes]:
+    yield b"["
+    for start in range(0, len(rows), STREAM_CHUNK_ROWS):
+        chunk = dumps(rows[start:start + STREAM_CHUNK_ROWS])[1:-1]
+        yield (b"," if start else b"") + chunk
+    yield b"]"
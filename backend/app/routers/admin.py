@@ -0,0 +1,39 @@
+import hmac
+from typing import Any, Dict
+from fastapi import APIRouter, Depends, Header, HTTPException
+from ..services.executors import ExecutorBusyError
+from ..dependencies import admin_token, reload_player_data_async
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    include_in_schema=False,
+)
+
+
+def require_admin_token(authorization: str = Header(None)) -> None:
+    token = admin_token()
+    if token is None:
+        # Not configured: behave as if the endpoint did not exist
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not authorization or not hmac.compare_digest(authorization.encode("utf-8"), f"Bearer {token}".encode("utf-8")):
+        logger.warning("Rejected admin request with a missing or wrong token")
+        raise HTTPException(status_code=401, detail="Invalid admin token", headers={"WWW-Authenticate": "Bearer"})
+
+
+@router.post("/reload", dependencies=[Depends(require_admin_token)])
+async def reload_data() -> Dict[str, Any]:
+    """Re-read the data source and swap in a fresh dataset without restarting."""
+    try:
+        data_version = await reload_player_data_async()
+        logger.info(f"Reloaded player data, data version {data_version}")
+        return {"status": "reloaded", "data_version": data_version}
+    except ExecutorBusyError as e:
+        logger.warning(f"Rejected reload: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except Exception as e:
+        logger.error(f"Error reloading player data: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error reloading player data: {str(e)}")
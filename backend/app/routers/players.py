@@ -1,14 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Path
-from typing import List, Dict, Any
-from ..services.player_similarity import PlayerSimilarityService
-from ..services.clustering import ClusteringService
-from ..models.player import PlayerQuery, SimilarPlayersResponse
-from ..models.cluster import ClusteringResult, PlayerCluster
-from ..repositories.file_player_repository import FilePlayerRepository
-from ..repositories.dynamodb_player_repository import DynamoDBPlayerRepository
-import os
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Request
+from typing import TYPE_CHECKING, List, Dict, Any
+from ..models.player import (
+    PlayerQuery, SimilarPlayersResponse,
+    BatchSimilarPlayersQuery, BatchSimilarPlayersResult, BatchSimilarPlayersResponse,
+    PlayerSearchResult, MAX_SIMILAR_PLAYERS
+)
+from ..models.cluster import DEFAULT_SEED, ClusteringResult, PlayerCluster
+from ..services.executors import ExecutorBusyError
+from ..services.player_pages import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from ..responses import encoded_json_response, json_rows_response
+from ..dependencies import get_player_similarity_service, get_clustering_service
 import logging
 
+if TYPE_CHECKING:
+    # Only for annotations; dependencies imports the services on first use
+    from ..services.clustering import ClusteringService
+    from ..services.player_similarity import PlayerSimilarityService
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -19,32 +27,48 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-def get_player_repository():
-    use_dynamodb = os.environ.get("USE_DYNAMODB", "false").lower() == "true"
-    if use_dynamodb:
-        table_name = os.environ.get("DYNAMODB_TABLE", "nba_player_stats")
-        logger.info(f"Using DynamoDB repository with table: {table_name}")
-        return DynamoDBPlayerRepository(table_name=table_name)
-    else:
-        data_dir = os.environ.get("DATA_DIR", "./data")
-        logger.info(f"Using File repository with data directory: {data_dir}")
-        return FilePlayerRepository(data_dir=data_dir)
 
-def get_player_similarity_service(repository=Depends(get_player_repository)):
-    return PlayerSimilarityService(player_repository=repository)
+def service_busy(e: ExecutorBusyError) -> HTTPException:
+    # Heavy work runs on bounded executors; when they are full, ask the client to retry
+    logger.warning(f"Rejected request: {str(e)}")
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
 
-def get_clustering_service(repository=Depends(get_player_repository)):
-    return ClusteringService(player_repository=repository)
 
 async def get_players(
+    request: Request,
     season: str = Query(None, description="Filter players by season (e.g., '2023_24')"),
-    service: PlayerSimilarityService = Depends(get_player_similarity_service)
+    limit: int = Query(None, ge=1, le=MAX_PAGE_SIZE,
+                       description="Page size. Pages are ordered by season and player; the next page's URL "
+                                   "is in the Link header and its cursor in X-Next-Cursor"),
+    cursor: str = Query(None, description="Cursor of the page to return, from the previous page"),
+    fields: str = Query(None, description="Comma separated columns to return (e.g., 'Player,Season,PTS')"),
+    service: "PlayerSimilarityService" = Depends(get_player_similarity_service)
 ):
     try:
         logger.info(f"Getting players for season: {season}")
-        players = service.get_all_players(season)
+        field_list = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+        headers = None
+        if limit is None and cursor is None:
+            payload = await service.get_encoded_players_async(season, field_list)
+            if payload is not None:
+                logger.info(f"Serving encoded players for season {season}")
+                return encoded_json_response(payload, request.headers.get("accept-encoding", ""))
+            players = await service.get_players_async(season, field_list)
+        else:
+            players, next_cursor = await service.get_players_page_async(
+                season, limit or DEFAULT_PAGE_SIZE, cursor, field_list
+            )
+            if next_cursor:
+                next_url = request.url.include_query_params(cursor=next_cursor)
+                headers = {"Link": f'<{next_url}>; rel="next"', "X-Next-Cursor": next_cursor}
         logger.info(f"Found {len(players)} players")
-        return players
+        # Rows are passed through as stored, so they skip response model validation
+        return json_rows_response(players, headers)
+    except ExecutorBusyError as e:
+        raise service_busy(e)
+    except ValueError as e:
+        logger.error(f"Error getting players: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting players: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error retrieving players: {str(e)}")
@@ -53,13 +77,15 @@ router.get("/", response_model=List[Dict[str, Any]])(get_players)
 router.get("", response_model=List[Dict[str, Any]])(get_players)
 
 async def get_seasons(
-    service: PlayerSimilarityService = Depends(get_player_similarity_service)
+    service: "PlayerSimilarityService" = Depends(get_player_similarity_service)
 ):
     try:
         logger.info("Getting seasons")
-        seasons = service.get_seasons()
+        seasons = await service.get_seasons_async()
         logger.info(f"Found seasons: {seasons}")
         return seasons
+    except ExecutorBusyError as e:
+        raise service_busy(e)
     except Exception as e:
         logger.error(f"Error getting seasons: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error retrieving seasons: {str(e)}")
@@ -68,13 +94,29 @@ router.get("/seasons", response_model=List[str])(get_seasons)
 router.get("/seasons/", response_model=List[str])(get_seasons)
 router.get("seasons", response_model=List[str])(get_seasons)
 
+async def search_players(
+    q: str = Query(..., min_length=1, description="Name or name prefix to search for (case and accent insensitive)"),
+    limit: int = Query(10, description="Maximum number of players to return", ge=1, le=50),
+    service: "PlayerSimilarityService" = Depends(get_player_similarity_service)
+):
+    try:
+        return await service.search_players_async(q, limit)
+    except ExecutorBusyError as e:
+        raise service_busy(e)
+    except Exception as e:
+        logger.error(f"Error searching players: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error searching players: {str(e)}")
+
+router.get("/search", response_model=List[PlayerSearchResult])(search_players)
+router.get("/search/", response_model=List[PlayerSearchResult])(search_players)
+
 async def find_similar_players_post(
     query: PlayerQuery,
-    service: PlayerSimilarityService = Depends(get_player_similarity_service)
+    service: "PlayerSimilarityService" = Depends(get_player_similarity_service)
 ):
     try:
         logger.info(f"Finding similar players for {query.player_name} in season {query.season}")
-        query_player, similar_players = service.find_similar_players(
+        query_player, similar_players = await service.find_similar_players_async(
             player_name=query.player_name,
             season=query.season,
             num_similar=query.num_similar
@@ -85,6 +127,8 @@ async def find_similar_players_post(
             query_player=query_player,
             similar_players=similar_players
         )
+    except ExecutorBusyError as e:
+        raise service_busy(e)
     except ValueError as e:
         logger.error(f"Player not found: {str(e)}")
         raise HTTPException(status_code=404, detail=str(e))
@@ -96,15 +140,51 @@ router.post("/similar", response_model=SimilarPlayersResponse)(find_similar_play
 router.post("/similar/", response_model=SimilarPlayersResponse)(find_similar_players_post)
 router.post("similar", response_model=SimilarPlayersResponse)(find_similar_players_post)
 
+async def find_similar_players_batch(
+    batch: BatchSimilarPlayersQuery,
+    service: "PlayerSimilarityService" = Depends(get_player_similarity_service)
+):
+    try:
+        logger.info(f"Finding similar players for a batch of {len(batch.queries)} queries")
+        outcomes = await service.find_similar_players_batch_async(batch.queries)
+
+        results = []
+        for query, outcome in zip(batch.queries, outcomes):
+            if isinstance(outcome, ValueError):
+                results.append(BatchSimilarPlayersResult(
+                    player_name=query.player_name, season=query.season, error=str(outcome)
+                ))
+            else:
+                query_player, similar_players = outcome
+                results.append(BatchSimilarPlayersResult(
+                    player_name=query.player_name,
+                    season=query.season,
+                    result=SimilarPlayersResponse(query_player=query_player, similar_players=similar_players)
+                ))
+
+        logger.info(f"Answered {sum(r.error is None for r in results)}/{len(results)} batch queries")
+        return BatchSimilarPlayersResponse(results=results)
+    except ExecutorBusyError as e:
+        raise service_busy(e)
+    except ValueError as e:
+        logger.error(f"Error in find_similar_players_batch: {str(e)}")
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in find_similar_players_batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+router.post("/similar/batch", response_model=BatchSimilarPlayersResponse)(find_similar_players_batch)
+router.post("/similar/batch/", response_model=BatchSimilarPlayersResponse)(find_similar_players_batch)
+
 async def find_similar_players_get(
     player_name: str = Query(..., description="Name of the player to find similar players for"),
     season: str = Query("2023_24", description="Season to search in (e.g., '2023_24')"),
-    num_similar: int = Query(5, description="Number of similar players to return"),
-    service: PlayerSimilarityService = Depends(get_player_similarity_service)
+    num_similar: int = Query(5, ge=1, le=MAX_SIMILAR_PLAYERS, description="Number of similar players to return"),
+    service: "PlayerSimilarityService" = Depends(get_player_similarity_service)
 ):
     try:
         logger.info(f"Finding similar players for {player_name} in season {season}")
-        query_player, similar_players = service.find_similar_players(
+        query_player, similar_players = await service.find_similar_players_async(
             player_name=player_name,
             season=season,
             num_similar=num_similar
@@ -115,6 +195,8 @@ async def find_similar_players_get(
             query_player=query_player,
             similar_players=similar_players
         )
+    except ExecutorBusyError as e:
+        raise service_busy(e)
     except ValueError as e:
         logger.error(f"Player not found: {str(e)}")
         raise HTTPException(status_code=404, detail=str(e))
@@ -127,19 +209,27 @@ router.get("/similar/", response_model=SimilarPlayersResponse)(find_similar_play
 router.get("similar", response_model=SimilarPlayersResponse)(find_similar_players_get)
 
 async def get_player_clusters(
+    request: Request,
     season: str = Query("2023_24", description="Season to cluster players from (e.g., '2023_24')"),
     num_clusters: int = Query(8, description="Number of clusters to create", ge=2, le=20),
-    service: ClusteringService = Depends(get_clustering_service)
+    seed: int = Query(DEFAULT_SEED, description="Random seed for centroid seeding; the same seed gives the same clusters"),
+    seasons: str = Query(None, description="Cluster across a season range instead (e.g. '2015_16-2023_24', or 'all')"),
+    service: "ClusteringService" = Depends(get_clustering_service)
 ):
     try:
-        logger.info(f"Clustering players for season {season} into {num_clusters} clusters")
-        clustering_result = service.get_clustering(
+        logger.info(f"Clustering players for season {seasons or season} into {num_clusters} clusters")
+        # Encoded once per clustering result and reused by every caller
+        payload = await service.get_encoded_clustering_async(
             season=season,
-            num_clusters=num_clusters
+            num_clusters=num_clusters,
+            seed=seed,
+            seasons=await service.resolve_seasons_async(seasons) if seasons else None
         )
 
-        logger.info(f"Created {len(clustering_result.clusters)} clusters for season {season}")
-        return clustering_result
+        logger.info(f"Serving {num_clusters} clusters for season {seasons or season}")
+        return encoded_json_response(payload, request.headers.get("accept-encoding", ""))
+    except ExecutorBusyError as e:
+        raise service_busy(e)
     except ValueError as e:
         logger.error(f"Error in clustering: {str(e)}")
         raise HTTPException(status_code=404, detail=str(e))
@@ -152,25 +242,34 @@ router.get("/clusters/", response_model=ClusteringResult)(get_player_clusters)
 router.get("clusters", response_model=ClusteringResult)(get_player_clusters)
 
 async def get_specific_cluster(
+    request: Request,
     cluster_id: int = Path(..., description="The ID of the cluster to retrieve", ge=0),
     season: str = Query("2023_24", description="Season to cluster players from (e.g., '2023_24')"),
     num_clusters: int = Query(8, description="Number of clusters to create", ge=2, le=20),
-    service: ClusteringService = Depends(get_clustering_service)
+    seed: int = Query(DEFAULT_SEED, description="Random seed for centroid seeding; the same seed gives the same clusters"),
+    seasons: str = Query(None, description="Cluster across a season range instead (e.g. '2015_16-2023_24', or 'all')"),
+    service: "ClusteringService" = Depends(get_clustering_service)
 ):
     try:
         logger.info(f"Getting cluster {cluster_id} for season {season}")
-        clustering_result = service.get_clustering(
+        payload = await service.get_encoded_clustering_async(
             season=season,
-            num_clusters=num_clusters
+            num_clusters=num_clusters,
+            seed=seed,
+            seasons=await service.resolve_seasons_async(seasons) if seasons else None,
+            cluster_id=cluster_id
         )
 
-        for cluster in clustering_result.clusters:
-            if cluster.cluster_id == cluster_id:
-                logger.info(f"Found cluster {cluster_id} with {len(cluster.players)} players")
-                return cluster
+        if payload is not None:
+            logger.info(f"Found cluster {cluster_id}")
+            return encoded_json_response(payload, request.headers.get("accept-encoding", ""))
 
         logger.error(f"Cluster with ID {cluster_id} not found")
         raise HTTPException(status_code=404, detail=f"Cluster with ID {cluster_id} not found")
+    except HTTPException:
+        raise
+    except ExecutorBusyError as e:
+        raise service_busy(e)
     except ValueError as e:
         logger.error(f"Error in clustering: {str(e)}")
         raise HTTPException(status_code=404, detail=str(e))
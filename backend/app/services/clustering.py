@@ -1,70 +1,234 @@
 from ..models.dataset import PlayerDataset
+import threading
+from collections import OrderedDict
 import numpy as np
 from typing import List, Dict, Any, Tuple, Optional
-from ..models.player import PlayerStats
 from ..models.cluster import PlayerCluster, ClusteringResult
+from .player_data_store import PlayerDataStore
+from .encoded_payload import EncodedPayload
+from .executors import BoundedExecutor
+from .single_flight import SingleFlight
+from .kmeans import DEFAULT_SEED, KMeansResult, kmeans, minibatch_kmeans
 
 
 class ClusteringService:
-    def __init__(self, player_repository):
-        self.player_repository = player_repository
-        self.dataset = None
-        self._data_loaded = False
+    # Player counts above this switch cross-season clustering to mini-batch k-means
+    MINIBATCH_MIN_PLAYERS = 5000
 
-    def get_clustering(self, season: str = "2023_24", num_clusters: int = 8) -> ClusteringResult:
+    def __init__(self, player_repository, data_store: PlayerDataStore = None, cache_size: int = 32,
+                 executor: Optional[BoundedExecutor] = None, load_executor: Optional[BoundedExecutor] = None):
+        self.player_repository = player_repository
+        self.data_store = data_store or PlayerDataStore(player_repository)
+        # k-means runs on `executor`; repository reads for the async entry points on `load_executor`
+        self.executor = executor or BoundedExecutor("clustering")
+        self.load_executor = load_executor or BoundedExecutor("clustering-load")
+        # (dataset fingerprint, season or seasons, num_clusters, seed)
+        #   -> (result, clusters by id, encoded payloads by cluster id, None for the whole result)
+        self.cache_size = cache_size
+        self._cache: OrderedDict = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # Concurrent cache misses for the same clustering share one k-means run
+        self.single_flight = SingleFlight()
+        # Callers that shared a clustering run would otherwise all encode its payload at once
+        self._encode_lock = threading.Lock()
+
+    def get_clustering(self, season: str = "2023_24", num_clusters: int = 8,
+                       seed: int = DEFAULT_SEED, seasons: Optional[List[str]] = None) -> ClusteringResult:
         try:
             print(f"Getting clustering for season {season} with {num_clusters} clusters")
-            return self.cluster_players(season, num_clusters)
+            return self._get_cached_clustering(season, num_clusters, seed, seasons)[0]
         except Exception as e:
             print(f"Error getting clustering: {str(e)}")
             raise
 
-    def cluster_players(self, season: str = "2023_24", num_clusters: int = 8, max_iterations: int = 100) -> ClusteringResult:
-        self.load_data()
+    def get_cluster(self, cluster_id: int, season: str = "2023_24", num_clusters: int = 8,
+                    seed: int = DEFAULT_SEED, seasons: Optional[List[str]] = None) -> Optional[PlayerCluster]:
+        return self._get_cached_clustering(season, num_clusters, seed, seasons)[1].get(cluster_id)
+
+    def get_encoded_clustering(self, season: str = "2023_24", num_clusters: int = 8,
+                               seed: int = DEFAULT_SEED, seasons: Optional[List[str]] = None,
+                               cluster_id: Optional[int] = None) -> Optional[EncodedPayload]:
+        """The clustering result (or one cluster) as JSON bytes, encoded once per cached result.
+
+        Returns None if `cluster_id` is given and there is no such cluster.
+        """
+        return self._encoded_payload(self._get_cached_clustering(season, num_clusters, seed, seasons), cluster_id)
+
+    async def get_clustering_async(self, season: str = "2023_24", num_clusters: int = 8,
+                                   seed: int = DEFAULT_SEED, seasons: Optional[List[str]] = None) -> ClusteringResult:
+        return (await self._get_cached_clustering_async(season, num_clusters, seed, seasons))[0]
+
+    async def get_encoded_clustering_async(self, season: str = "2023_24", num_clusters: int = 8,
+                                           seed: int = DEFAULT_SEED, seasons: Optional[List[str]] = None,
+                                           cluster_id: Optional[int] = None) -> Optional[EncodedPayload]:
+        """get_encoded_clustering() off the event loop; payloads already encoded are returned directly."""
+        payload = self._cached_payload(season, num_clusters, seed, seasons, cluster_id)
+        if payload is not None:
+            return payload
+        entry = await self._get_cached_clustering_async(season, num_clusters, seed, seasons)
+        return await self.load_executor.run(self._encoded_payload, entry, cluster_id)
+
+    async def resolve_seasons_async(self, seasons: str) -> List[str]:
+        return await self.load_executor.run(self.resolve_seasons, seasons)
+
+    def _cached_payload(self, season: str, num_clusters: int, seed: int, seasons: Optional[List[str]],
+                        cluster_id: Optional[int]) -> Optional[EncodedPayload]:
+        """The encoded payload if it is cached for the current data; never loads or clusters anything."""
+        dataset = self.data_store.published_dataset(None if seasons else season)
+        if dataset is None:
+            return None
+        entry = self._cached_entry(self._cache_key(dataset, season, num_clusters, seed, seasons))
+        return entry[2].get(cluster_id) if entry is not None else None
+
+    def _encoded_payload(self, entry: Tuple, cluster_id: Optional[int]) -> Optional[EncodedPayload]:
+        result, clusters, payloads = entry
+        payload = payloads.get(cluster_id)
+        if payload is None:
+            value = result if cluster_id is None else clusters.get(cluster_id)
+            if value is None:
+                return None
+            with self._encode_lock:
+                payload = payloads.get(cluster_id)
+                if payload is None:
+                    payload = payloads[cluster_id] = EncodedPayload.from_value(value)
+        return payload
+
+    @staticmethod
+    def _cache_key(dataset: PlayerDataset, season: str, num_clusters: int, seed: int,
+                   seasons: Optional[List[str]]) -> Tuple:
+        return dataset.fingerprint, tuple(seasons) if seasons else season, num_clusters, seed
+
+    def _get_cached_clustering(self, season: str, num_clusters: int, seed: int, seasons: Optional[List[str]] = None
+                               ) -> Tuple[ClusteringResult, Dict[int, PlayerCluster], Dict[Optional[int], EncodedPayload]]:
+        dataset = self._dataset_for(season, seasons)
+        key = self._cache_key(dataset, season, num_clusters, seed, seasons)
+        entry = self._cached_entry(key)
+        if entry is None:
+            entry = self.single_flight.do(key, self._cluster_and_cache, key, season, num_clusters, seed, seasons)
+        return entry
+
+    async def _get_cached_clustering_async(self, season: str, num_clusters: int, seed: int,
+                                           seasons: Optional[List[str]] = None) -> Tuple:
+        dataset = self.data_store.published_dataset(None if seasons else season)
+        if dataset is None:
+            # Loading blocks, so it runs on the load executor. The k-means run is still
+            # started from here: a compute worker that waited on another request's
+            # run queued behind it could deadlock a small pool
+            dataset = await self.load_executor.run(self._dataset_for, season, seasons)
+        key = self._cache_key(dataset, season, num_clusters, seed, seasons)
+        entry = self._cached_entry(key)
+        if entry is None:
+            entry = await self.single_flight.do_async(
+                key, lambda: self.executor.submit(self._cluster_and_cache, key, season, num_clusters, seed, seasons)
+            )
+        return entry
+
+    def _dataset_for(self, season: str, seasons: Optional[List[str]]) -> PlayerDataset:
+        return self.load_data() if seasons else self.data_store.season_dataset(season)
+
+    def _cached_entry(self, key: Tuple) -> Optional[Tuple]:
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+            return entry
+
+    def _cluster_and_cache(self, key: Tuple, season: str, num_clusters: int, seed: int,
+                           seasons: Optional[List[str]]) -> Tuple:
+        # A call that finished just before this one started may have cached it already
+        entry = self._cached_entry(key)
+        if entry is not None:
+            return entry
+
+        if seasons:
+            result = self.cluster_seasons(seasons, num_clusters, seed=seed)
+        else:
+            result = self.cluster_players(season, num_clusters, seed=seed)
+        entry = (result, {cluster.cluster_id: cluster for cluster in result.clusters}, {})
+
+        with self._cache_lock:
+            self._cache[key] = entry
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return entry
+
+    def cluster_players(self, season: str = "2023_24", num_clusters: int = 8, max_iterations: int = 100,
+                        seed: int = DEFAULT_SEED) -> ClusteringResult:
+        dataset = self.data_store.season_dataset(season)
 
         print(f"Clustering players for season {season} into {num_clusters} clusters")
 
-        if not self.dataset or not self.dataset.players:
+        if not dataset or not dataset.players:
             raise ValueError("No player data available")
 
-        try:
-            season_players = self.dataset.get_players_by_season(season)
-            if not season_players:
-                raise ValueError(f"No players found for season {season}")
+        season_players = dataset.get_players_by_season(season)
+        if not season_players:
+            raise ValueError(f"No players found for season {season}")
 
-            min_games = 10
-            filtered_players = [p for p in season_players if self._safe_convert(p["G"], int, 0) > min_games]
-            if not filtered_players:
-                raise ValueError(f"No players with more than {min_games} games found for season {season}")
+        return self._cluster(season_players, season, num_clusters, max_iterations, seed)
 
-            print(f"Found {len(filtered_players)} players for season {season} with more than {min_games} games")
+    def cluster_seasons(self, seasons: List[str], num_clusters: int = 8, max_iterations: int = 100,
+                        seed: int = DEFAULT_SEED, batch_size: int = 1024) -> ClusteringResult:
+        """Cluster player-seasons from several seasons together.
 
-            player_data, player_indices = self._prepare_data_for_clustering(filtered_players)
-            clusters, centroids = self._run_kmeans(player_data, num_clusters, max_iterations)
+        Above MINIBATCH_MIN_PLAYERS players this uses mini-batch k-means, whose
+        cost per iteration is bounded by `batch_size` rather than the number
+        of player-seasons.
+        """
+        dataset = self.load_data()
+        label = self.season_range_label(seasons)
 
-            return self._format_clustering_results(clusters, centroids, filtered_players, player_indices, season, num_clusters)
+        print(f"Clustering players for seasons {label} into {num_clusters} clusters")
 
-        except Exception as e:
-            raise
+        if not dataset or not dataset.players:
+            raise ValueError("No player data available")
+
+        players = [p for season in seasons for p in dataset.get_players_by_season(season)]
+        if not players:
+            raise ValueError(f"No players found for seasons {label}")
+
+        return self._cluster(players, label, num_clusters, max_iterations, seed, batch_size)
 
-    def load_data(self) -> None:
-        if not self._data_loaded:
-            try:
-                raw_data = self.player_repository.get_all_players()
-                print(f"Loaded {len(raw_data)} players from repository")
-
-                if not raw_data:
-                    self.dataset = PlayerDataset([])
-                else:
-                    self.dataset = PlayerDataset(raw_data)
-                    self.dataset.normalize_data()
-
-                self._data_loaded = True
-            except Exception as e:
-                print(f"Error loading player data: {str(e)}")
-                self.dataset = PlayerDataset([])
-                self._data_loaded = True
-                raise
+    def resolve_seasons(self, seasons: str) -> List[str]:
+        """Expand 'all', a single season or a 'start-end' range such as '2015_16-2023_24'."""
+        available = self.data_store.seasons()
+        spec = seasons.strip()
+        if spec.lower() == "all":
+            return list(available)
+
+        start, _, end = spec.partition("-")
+        start, end = start.strip(), (end.strip() or start.strip())
+        first, last = min(start, end), max(start, end)
+        selected = [season for season in available if first <= season <= last]
+        if not selected:
+            raise ValueError(f"No players found for seasons {spec}")
+        return selected
+
+    @staticmethod
+    def season_range_label(seasons: List[str]) -> str:
+        return seasons[0] if len(seasons) == 1 else f"{seasons[0]}-{seasons[-1]}"
+
+    def _cluster(self, players: List, label: str, num_clusters: int, max_iterations: int,
+                 seed: int, batch_size: int = 1024) -> ClusteringResult:
+        min_games = 10
+        filtered_players = [p for p in players if p.dataset.games[p.index] > min_games]
+        if not filtered_players:
+            raise ValueError(f"No players with more than {min_games} games found for season {label}")
+
+        print(f"Found {len(filtered_players)} players for season {label} with more than {min_games} games")
+
+        player_data, player_indices = self._prepare_data_for_clustering(filtered_players)
+        if len(player_indices) > self.MINIBATCH_MIN_PLAYERS:
+            kmeans_result = minibatch_kmeans(player_data, num_clusters, batch_size, max_iterations, seed)
+        else:
+            kmeans_result = kmeans(player_data, num_clusters, max_iterations, seed)
+
+        return self._format_clustering_results(kmeans_result, filtered_players, player_indices,
+                                               label, num_clusters, seed)
+
+    def load_data(self) -> PlayerDataset:
+        return self.data_store.load()
 
     def get_seasons(self) -> List[str]:
         try:
@@ -75,39 +239,17 @@ class ClusteringService:
             raise
 
     def _prepare_data_for_clustering(self, players: List) -> Tuple[np.ndarray, List[int]]:
-        norm_cols = [
-            'PTS_norm', 'MP_norm', 'FG_norm', 'FGA_norm', 'FG3_norm', 'FG3A_norm',
-            'FG2_norm', 'FG2A_norm', 'FT_norm', 'FTA_norm', 'ORB_norm', 'DRB_norm',
-            'AST_norm', 'STL_norm', 'TOV_norm', 'BLK_norm'
-        ]
-
-        data = []
-        valid_indices = []
+        dataset = players[0].dataset
+        rows = np.array([player.index for player in players], dtype=np.intp)
+        stats = dataset.stats[rows].astype(np.float64)
 
-        for i, player in enumerate(players):
-            player_stats = []
+        valid = np.isfinite(stats).all(axis=1)
+        valid_indices = np.flatnonzero(valid).tolist()
 
-            for col in norm_cols:
-                try:
-                    val = player.normalized_stats.get(col, 0.0)
-                    if isinstance(val, str) and not val.strip():
-                        player_stats.append(0.0)
-                    else:
-                        player_stats.append(float(val))
-                except (ValueError, TypeError) as e:
-                    print(f"Warning: Could not convert normalized stat '{col}' to float: {e}. Using 0.0 instead.")
-                    player_stats.append(0.0)
-
-            if np.isnan(np.sum(player_stats)) or np.isinf(np.sum(player_stats)):
-                continue
-
-            data.append(player_stats)
-            valid_indices.append(i)
-
-        if not data:
+        if not valid_indices:
             raise ValueError("No valid player data available for clustering")
 
-        data_array = np.array(data)
+        data_array = stats[valid]
         min_vals = np.min(data_array, axis=0)
         max_vals = np.max(data_array, axis=0)
 
@@ -118,39 +260,10 @@ class ClusteringService:
 
         return scaled_data, valid_indices
 
-    def _run_kmeans(self, data: np.ndarray, k: int, max_iterations: int) -> Tuple[np.ndarray, np.ndarray]:
-        centroid_indices = np.random.choice(data.shape[0], k, replace=False)
-        centroids = data[centroid_indices]
-
-        clusters = np.zeros(data.shape[0], dtype=int)
-        old_centroids = np.zeros_like(centroids)
-
-        iteration = 0
-        converged = False
-
-        while iteration < max_iterations and not converged:
-            for i in range(data.shape[0]):
-                distances = np.sqrt(np.sum((data[i] - centroids) ** 2, axis=1))
-                clusters[i] = np.argmin(distances)
-
-            old_centroids = centroids.copy()
-
-            for j in range(k):
-                if np.sum(clusters == j) > 0:
-                    cluster_points = data[clusters == j]
-                    epsilon = 1e-10
-                    centroids[j] = np.exp(np.mean(np.log(cluster_points + epsilon), axis=0))
-
-            converged = np.all(np.abs(centroids - old_centroids) < 1e-4)
-
-            iteration += 1
-            print(f"K-means iteration {iteration}, converged: {converged}")
-
-        return clusters, centroids
-
-    def _format_clustering_results(self, clusters: np.ndarray, centroids: np.ndarray,
+    def _format_clustering_results(self, kmeans_result: KMeansResult,
                                   players: List, player_indices: List[int],
-                                  season: str, num_clusters: int) -> ClusteringResult:
+                                  season: str, num_clusters: int, seed: int) -> ClusteringResult:
+        clusters, centroids = kmeans_result.labels, kmeans_result.centroids
         cluster_results = []
 
         stats_cols = [
@@ -168,8 +281,7 @@ class ClusteringService:
             cluster_players = []
             for idx in cluster_player_indices:
                 player = players[idx]
-                player_stats = self._player_to_stats(player)
-                cluster_players.append(player_stats)
+                cluster_players.append(player.player_stats)
 
             centroid_dict = {}
             for i, stat in enumerate(stats_cols):
@@ -187,53 +299,8 @@ class ClusteringService:
         return ClusteringResult(
             clusters=sorted(cluster_results, key=lambda x: len(x.players), reverse=True),
             season=season,
-            num_clusters=num_clusters
+            num_clusters=num_clusters,
+            seed=seed,
+            iterations=kmeans_result.iterations,
+            inertia=kmeans_result.inertia
         )
-
-    def _player_to_stats(self, player) -> PlayerStats:
-        data = player.data
-
-        return PlayerStats(
-            player=data.get('Player', ''),
-            season=data.get('Season', ''),
-            position=data.get('Pos', ''),
-            age=self._safe_convert(data.get('Age'), int),
-            team=data.get('Team', ''),
-            games_played=self._safe_convert(data.get('G'), int),
-            games_started=self._safe_convert(data.get('GS'), int),
-            minutes_per_game=self._safe_convert(data.get('MP'), float),
-            points_per_game=self._safe_convert(data.get('PTS'), float),
-            field_goals_per_game=self._safe_convert(data.get('FG'), float),
-            field_goal_attempts_per_game=self._safe_convert(data.get('FGA'), float),
-            field_goal_percentage=self._safe_convert(data.get('FG%'), float),
-            three_pointers_per_game=self._safe_convert(data.get('FG3'), float),
-            three_point_attempts_per_game=self._safe_convert(data.get('FG3A'), float),
-            three_point_percentage=self._safe_convert(data.get('FG3%'), float),
-            two_pointers_per_game=self._safe_convert(data.get('FG2'), float),
-            two_point_attempts_per_game=self._safe_convert(data.get('FG2A'), float),
-            two_point_percentage=self._safe_convert(data.get('FG2%'), float),
-            effective_field_goal_percentage=self._safe_convert(data.get('eFG%'), float),
-            free_throws_per_game=self._safe_convert(data.get('FT'), float),
-            free_throw_attempts_per_game=self._safe_convert(data.get('FTA'), float),
-            free_throw_percentage=self._safe_convert(data.get('FT%'), float),
-            offensive_rebounds_per_game=self._safe_convert(data.get('ORB'), float),
-            defensive_rebounds_per_game=self._safe_convert(data.get('DRB'), float),
-            total_rebounds_per_game=self._safe_convert(data.get('TRB'), float) if 'TRB' in data else
-                                  self._safe_convert(data.get('ORB'), float) + self._safe_convert(data.get('DRB'), float),
-            assists_per_game=self._safe_convert(data.get('AST'), float),
-            steals_per_game=self._safe_convert(data.get('STL'), float),
-            blocks_per_game=self._safe_convert(data.get('BLK'), float),
-            turnovers_per_game=self._safe_convert(data.get('TOV'), float),
-            personal_fouls_per_game=self._safe_convert(data.get('PF'), float),
-            player_id=data.get('Player-additional', '')
-        )
-
-    def _safe_convert(self, value, convert_func, default=0):
-        if value is None:
-            return default
-        if isinstance(value, str) and not value.strip():
-            return default
-        try:
-            return convert_func(value)
-        except (ValueError, TypeError):
-            return default
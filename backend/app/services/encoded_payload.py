@@ -0,0 +1,135 @@
+import gzip
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Smaller bodies are sent uncompressed
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 6
+
+
+def dumps(value: Any) -> bytes:
+    """JSON bytes, with orjson when it is installed.
+
+    A pydantic model is serialized by pydantic itself (model_dump_json), an
+    order of magnitude faster than walking it with jsonable_encoder. Other
+    values go through orjson, or the stdlib encoder with starlette's
+    JSONResponse settings; models nested in them are dumped by pydantic and
+    anything else unsupported goes through jsonable_encoder.
+    """
+    if isinstance(value, BaseModel):
+        return value.model_dump_json().encode("utf-8")
+    if orjson is not None:
+        return orjson.dumps(value, default=_encode_default)
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":"),
+                      default=_encode_default).encode("utf-8")
+
+
+def _encode_default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    return jsonable_encoder(value)
+
+
+def accepted_encodings(accept_encoding: str) -> Set[str]:
+    """Content codings an Accept-Encoding header allows (q > 0)."""
+    accepted = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name.strip() and quality > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+class EncodedPayload:
+    """A JSON response body encoded once, together with its compressed variants.
+
+    The variants are made when the payload is built, which the async entry
+    points do on the load executor, so serving a payload never compresses
+    on the event loop.
+    """
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self._compressed: Dict[str, bytes] = {}
+        if len(body) >= MIN_COMPRESS_BYTES:
+            self._compressed["gzip"] = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+            if brotli is not None:
+                self._compressed["br"] = brotli.compress(body, quality=BROTLI_QUALITY)
+
+    @classmethod
+    def from_value(cls, value: Any) -> "EncodedPayload":
+        return cls(dumps(value))
+
+    def body_for(self, accept_encoding: str) -> Tuple[bytes, Optional[str]]:
+        """The body to send and its Content-Encoding (None for identity): brotli, then gzip."""
+        if not self._compressed:
+            return self.body, None
+        accepted = accepted_encodings(accept_encoding)
+        for encoding in ("br", "gzip"):
+            body = self._compressed.get(encoding)
+            if body is not None and (encoding in accepted or "*" in accepted):
+                return body, encoding
+        return self.body, None
+
+
+class PayloadCache:
+    """Encoded payloads by key for the current data version.
+
+    Entries built for another version are dropped as soon as a new version
+    is seen, and at most `max_entries` are kept (least recently used first).
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def peek(self, key: Hashable, version: str) -> Optional[EncodedPayload]:
+        """The cached payload for `key` at `version`, or None; never builds one."""
+        with self._lock:
+            if version != self._version:
+                return None
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+            return payload
+
+    def get(self, key: Hashable, version: str, build: Callable[[], Any]) -> EncodedPayload:
+        payload = self.peek(key, version)
+        if payload is not None:
+            return payload
+
+        payload = EncodedPayload.from_value(build())
+
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            self._entries[key] = payload
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return payload
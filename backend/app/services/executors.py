@@ -0,0 +1,112 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class ExecutorBusyError(RuntimeError):
+    """Raised when a BoundedExecutor already holds as many jobs as it accepts."""
+
+
+class BoundedExecutor:
+    """A thread pool that accepts at most `max_workers + max_queue` jobs at a time.
+
+    Async callers await `run()`, so CPU-bound or blocking work runs on the
+    pool instead of the event loop. Submitting to a full executor raises
+    ExecutorBusyError straight away rather than letting the backlog grow.
+    NumPy releases the GIL for the heavy array work, so threads make
+    progress in parallel while the loop keeps serving cheap requests.
+    `stats()` reports queue depth, running jobs and wait/run times.
+    """
+
+    def __init__(self, name: str, max_workers: int = None, max_queue: int = 32):
+        self.name = name
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(self.max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._peak_queued = 0
+        self._started = 0
+        self._completed = 0
+        self._failed = 0
+        self._cancelled = 0
+        self._rejected = 0
+        self._wait_seconds = 0.0
+        self._run_seconds = 0.0
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise ExecutorBusyError(f"{self.name} executor is at capacity, try again shortly")
+
+        with self._lock:
+            self._queued += 1
+            self._peak_queued = max(self._peak_queued, self._queued)
+        submitted = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._started += 1
+                self._wait_seconds += started - submitted
+            failed = True
+            try:
+                result = fn(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+                    self._failed += failed
+                    self._run_seconds += time.perf_counter() - started
+
+        def release(future: Future) -> None:
+            # A job cancelled before it started never ran its own bookkeeping
+            if future.cancelled():
+                with self._lock:
+                    self._queued -= 1
+                    self._cancelled += 1
+            self._slots.release()
+
+        try:
+            future = self._pool.submit(job)
+        except BaseException:
+            with self._lock:
+                self._queued -= 1
+            self._slots.release()
+            raise
+        future.add_done_callback(release)
+        return future
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run `fn(*args, **kwargs)` on the pool and await its result."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            started, completed = self._started, self._completed
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queued": self._queued,
+                "running": self._running,
+                "peak_queued": self._peak_queued,
+                "completed": completed,
+                "failed": self._failed,
+                "cancelled": self._cancelled,
+                "rejected": self._rejected,
+                "avg_wait_ms": self._wait_seconds * 1000 / started if started else 0.0,
+                "avg_run_ms": self._run_seconds * 1000 / completed if completed else 0.0,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=True)
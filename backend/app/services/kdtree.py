@@ -0,0 +1,134 @@
+import heapq
+import numpy as np
+from typing import Optional, Tuple
+
+
+class KDTree:
+    """Exact k-nearest-neighbour index over the rows of a float matrix.
+
+    Built with NumPy only. Points are reordered so every leaf is a
+    contiguous block, each node keeps its bounding box (used as the pruning
+    bound) and a bitmask of the season codes it contains, so queries
+    restricted to some seasons skip whole subtrees.
+    """
+
+    def __init__(self, points: np.ndarray, season_ids: Optional[np.ndarray] = None, leaf_size: int = 64):
+        self.leaf_size = max(1, leaf_size)
+        n = points.shape[0]
+        if season_ids is None:
+            season_ids = np.zeros(n, dtype=np.int16)
+
+        perm = np.arange(n)
+        starts, ends, lefts, rights, lowers, uppers, season_masks = [], [], [], [], [], [], []
+
+        def add_node(start: int, end: int) -> int:
+            block = points[perm[start:end]]
+            starts.append(start)
+            ends.append(end)
+            lefts.append(-1)
+            rights.append(-1)
+            lowers.append(block.min(axis=0) if end > start else np.zeros(points.shape[1], dtype=points.dtype))
+            uppers.append(block.max(axis=0) if end > start else np.zeros(points.shape[1], dtype=points.dtype))
+            mask = 0
+            for code in np.unique(season_ids[perm[start:end]]).tolist():
+                mask |= 1 << code
+            season_masks.append(mask)
+            return len(starts) - 1
+
+        stack = [add_node(0, n)]
+        while stack:
+            node = stack.pop()
+            start, end = starts[node], ends[node]
+            if end - start <= self.leaf_size:
+                continue
+
+            spread = uppers[node] - lowers[node]
+            dim = int(np.argmax(spread))
+            if spread[dim] <= 0:
+                continue
+
+            mid = (start + end) // 2
+            segment = perm[start:end]
+            order = np.argpartition(points[segment, dim], mid - start)
+            perm[start:end] = segment[order]
+
+            lefts[node] = add_node(start, mid)
+            rights[node] = add_node(mid, end)
+            stack.extend((lefts[node], rights[node]))
+
+        self.indices = perm
+        self.points = np.ascontiguousarray(points[perm])
+        self.starts = np.array(starts)
+        self.ends = np.array(ends)
+        self.lefts = np.array(lefts)
+        self.rights = np.array(rights)
+        self.lowers = np.array(lowers)
+        self.uppers = np.array(uppers)
+        self.season_masks = season_masks
+
+    @property
+    def size(self) -> int:
+        return self.points.shape[0]
+
+    @property
+    def node_count(self) -> int:
+        return len(self.season_masks)
+
+    def query(self, vector: np.ndarray, k: int, candidates: Optional[np.ndarray] = None,
+              season_mask: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (row indices, distances) of the k nearest rows, closest first.
+
+        `candidates` is an optional boolean mask over the original rows;
+        `season_mask` is an optional bitmask of allowed season codes.
+        """
+        vector = np.asarray(vector, dtype=self.points.dtype)
+        if k <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+
+        best_rows = np.empty(0, dtype=np.intp)
+        best_dist = np.empty(0, dtype=np.float64)
+        # Squared bound on the k-th distance, with slack for the rounding of
+        # the sqrt below, so rows tying with the k-th one are never pruned
+        kth = np.inf
+
+        heap = [(0.0, 0)]
+        while heap:
+            bound, node = heapq.heappop(heap)
+            if bound > kth:
+                break
+            if season_mask is not None and not self.season_masks[node] & season_mask:
+                continue
+
+            left = self.lefts[node]
+            if left >= 0:
+                children = (left, self.rights[node])
+                gaps = np.maximum(self.lowers[list(children)] - vector, 0) + \
+                    np.maximum(vector - self.uppers[list(children)], 0)
+                bounds = np.einsum('ij,ij->i', gaps, gaps).tolist()
+                for child, child_bound in zip(children, bounds):
+                    if child_bound <= kth:
+                        heapq.heappush(heap, (child_bound, int(child)))
+                continue
+
+            start, end = self.starts[node], self.ends[node]
+            rows = self.indices[start:end]
+            diff = self.points[start:end] - vector
+            # Same arithmetic as euclidean_distances, so ties rank like brute force
+            dist = np.sqrt(np.einsum('ij,ij->i', diff, diff)).astype(np.float64)
+            if candidates is not None:
+                keep = candidates[rows]
+                rows, dist = rows[keep], dist[keep]
+            if not rows.size:
+                continue
+
+            best_rows = np.concatenate((best_rows, rows))
+            best_dist = np.concatenate((best_dist, dist))
+            if best_rows.size > k:
+                # Ranked by (distance, row) so ties at the k-th place keep the lowest rows
+                selected = np.lexsort((best_rows, best_dist))[:k]
+                best_rows, best_dist = best_rows[selected], best_dist[selected]
+            if best_rows.size == k:
+                kth = best_dist.max() ** 2 * (1 + 1e-6)
+
+        order = np.lexsort((best_rows, best_dist))
+        return best_rows[order], best_dist[order]
@@ -0,0 +1,157 @@
+import numpy as np
+from typing import NamedTuple, Optional
+
+from ..models.cluster import DEFAULT_SEED
+
+# Added before taking logs for the geometric-mean centroid update
+EPSILON = 1e-10
+
+
+class KMeansResult(NamedTuple):
+    labels: np.ndarray
+    centroids: np.ndarray
+    iterations: int
+    inertia: float
+
+
+def squared_distances(data: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """(points x centroids) squared Euclidean distances via one matrix product."""
+    data_sq = np.einsum('ij,ij->i', data, data)
+    centroid_sq = np.einsum('ij,ij->i', centroids, centroids)
+    return np.maximum(data_sq[:, None] + centroid_sq[None, :] - 2.0 * (data @ centroids.T), 0.0)
+
+
+def kmeans_plus_plus(data: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    """Pick k initial centroids, each new one with probability ~ D(x)^2."""
+    n = data.shape[0]
+    centroids = np.empty((k, data.shape[1]), dtype=data.dtype)
+    centroids[0] = data[rng.integers(n)]
+    closest = squared_distances(data, centroids[:1])[:, 0]
+
+    for j in range(1, k):
+        total = closest.sum()
+        if total > 0:
+            choice = rng.choice(n, p=closest / total)
+        else:
+            choice = rng.integers(n)
+        centroids[j] = data[choice]
+        closest = np.minimum(closest, squared_distances(data, centroids[j:j + 1])[:, 0])
+
+    return centroids
+
+
+def geometric_mean_centroids(log_data: np.ndarray, labels: np.ndarray, k: int,
+                             previous: np.ndarray) -> np.ndarray:
+    """Per-cluster geometric means; empty clusters keep their previous centroid."""
+    one_hot = np.zeros((log_data.shape[0], k))
+    one_hot[np.arange(log_data.shape[0]), labels] = 1.0
+    counts = one_hot.sum(axis=0)
+    sums = one_hot.T @ log_data
+
+    centroids = previous.copy()
+    filled = counts > 0
+    centroids[filled] = np.exp(sums[filled] / counts[filled, None])
+    return centroids
+
+
+def kmeans(data: np.ndarray, k: int, max_iterations: int = 100, seed: Optional[int] = DEFAULT_SEED,
+           tolerance: float = 1e-4) -> KMeansResult:
+    """K-means with k-means++ seeding and geometric-mean centroid updates.
+
+    The same seed always yields the same clustering of the same data.
+    """
+    n = data.shape[0]
+    if k > n:
+        raise ValueError(f"Cannot create {k} clusters from {n} players")
+
+    rng = np.random.default_rng(seed)
+    log_data = np.log(data + EPSILON)
+    centroids = kmeans_plus_plus(data, k, rng)
+    labels = np.zeros(n, dtype=int)
+
+    iterations = 0
+    converged = False
+    while iterations < max_iterations and not converged:
+        labels = np.argmin(squared_distances(data, centroids), axis=1)
+
+        old_centroids = centroids
+        centroids = geometric_mean_centroids(log_data, labels, k, old_centroids)
+
+        converged = bool(np.all(np.abs(centroids - old_centroids) < tolerance))
+        iterations += 1
+
+    inertia = float(squared_distances(data, centroids)[np.arange(n), labels].sum())
+    print(f"K-means finished after {iterations} iterations (converged: {converged}, inertia: {inertia:.2f})")
+
+    return KMeansResult(labels=labels, centroids=centroids, iterations=iterations, inertia=inertia)
+
+
+def assign_labels(data: np.ndarray, centroids: np.ndarray, chunk_size: int = 8192):
+    """Nearest-centroid labels and total inertia, computed chunk by chunk."""
+    labels = np.empty(data.shape[0], dtype=int)
+    inertia = 0.0
+    for start in range(0, data.shape[0], chunk_size):
+        distances = squared_distances(data[start:start + chunk_size], centroids)
+        chunk_labels = np.argmin(distances, axis=1)
+        labels[start:start + chunk_size] = chunk_labels
+        inertia += float(distances[np.arange(chunk_labels.shape[0]), chunk_labels].sum())
+    return labels, inertia
+
+
+def minibatch_kmeans(data: np.ndarray, k: int, batch_size: int = 1024, max_iterations: int = 100,
+                     seed: Optional[int] = DEFAULT_SEED, tolerance: float = 1e-3,
+                     patience: int = 3) -> KMeansResult:
+    """Mini-batch k-means (Sculley, 2010) with geometric-mean centroids.
+
+    Each iteration only looks at `batch_size` random points: centroids move
+    towards the batch's per-cluster geometric means with a per-centroid
+    learning rate of 1 / points seen, so memory and time per iteration do
+    not depend on the size of the data. Seeding uses k-means++ on a sample.
+
+    Batches are noisy, so centroids never stop moving entirely. The run has
+    converged once no centroid moves more than `tolerance` times the
+    feature's range in a batch, for `patience` batches in a row.
+    """
+    n = data.shape[0]
+    if k > n:
+        raise ValueError(f"Cannot create {k} clusters from {n} players")
+
+    rng = np.random.default_rng(seed)
+    batch_size = min(batch_size, n)
+    init_sample = data[rng.choice(n, min(n, 3 * batch_size), replace=False)]
+    feature_range = np.ptp(init_sample, axis=0)
+    feature_range[feature_range == 0] = 1.0
+    centroids = kmeans_plus_plus(init_sample, k, rng)
+    log_centroids = np.log(centroids + EPSILON)
+    counts = np.zeros(k)
+
+    iterations = 0
+    quiet_batches = 0
+    converged = False
+    while iterations < max_iterations and not converged:
+        batch = data[rng.integers(0, n, batch_size)]
+        batch_labels = np.argmin(squared_distances(batch, centroids), axis=1)
+
+        one_hot = np.zeros((batch_size, k))
+        one_hot[np.arange(batch_size), batch_labels] = 1.0
+        batch_counts = one_hot.sum(axis=0)
+        batch_log_sums = one_hot.T @ np.log(batch + EPSILON)
+
+        filled = batch_counts > 0
+        counts[filled] += batch_counts[filled]
+        rate = batch_counts[filled] / counts[filled]
+        batch_means = batch_log_sums[filled] / batch_counts[filled, None]
+        log_centroids[filled] += rate[:, None] * (batch_means - log_centroids[filled])
+
+        old_centroids = centroids
+        centroids = np.exp(log_centroids)
+        shift = float(np.max(np.abs(centroids - old_centroids) / feature_range))
+        quiet_batches = quiet_batches + 1 if shift < tolerance else 0
+        converged = quiet_batches >= patience
+        iterations += 1
+
+    labels, inertia = assign_labels(data, centroids)
+    print(f"Mini-batch k-means finished after {iterations} iterations "
+          f"(converged: {converged}, inertia: {inertia:.2f})")
+
+    return KMeansResult(labels=labels, centroids=centroids, iterations=iterations, inertia=inertia)
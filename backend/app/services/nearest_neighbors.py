@@ -0,0 +1,154 @@
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Tuple
+from .kdtree import KDTree
+
+
+def euclidean_distances(matrix: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """Distance from `query` to every row of `matrix` in one pass."""
+    diff = matrix - query
+    return np.sqrt(np.einsum('ij,ij->i', diff, diff))
+
+
+def pairwise_distances(queries: np.ndarray, matrix: np.ndarray,
+                       matrix_sq_norms: Optional[np.ndarray] = None) -> np.ndarray:
+    """Distances between every query row and every matrix row via one GEMM."""
+    if matrix_sq_norms is None:
+        matrix_sq_norms = np.einsum('ij,ij->i', matrix, matrix)
+    query_sq_norms = np.einsum('ij,ij->i', queries, queries)
+    sq = query_sq_norms[:, None] + matrix_sq_norms[None, :] - 2.0 * (queries @ matrix.T)
+    return np.sqrt(np.maximum(sq, 0.0))
+
+
+def top_k(distances: np.ndarray, k: int, candidates: Optional[np.ndarray] = None) -> np.ndarray:
+    """Indices of the `k` smallest distances, closest first.
+
+    Only rows where `candidates` is True are considered. Selection is done
+    with a partition so only the k winners (and rows tying with the k-th)
+    get sorted; ties are broken by row index to keep results stable.
+    """
+    if candidates is not None:
+        rows = np.flatnonzero(candidates)
+        distances = distances[rows]
+    else:
+        rows = np.arange(distances.shape[0])
+
+    k = min(k, rows.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    if k < rows.shape[0]:
+        kth = np.partition(distances, k - 1)[k - 1]
+        selected = np.flatnonzero(distances <= kth)
+    else:
+        selected = np.arange(rows.shape[0])
+
+    order = np.lexsort((rows[selected], distances[selected]))[:k]
+    return rows[selected[order]]
+
+
+class SimilarityIndex:
+    """Exact k-NN over a dataset's normalized stat vectors.
+
+    Queries go to a KD-tree when the searched population is large enough
+    for it to win, and to a vectorized brute-force scan otherwise. The
+    default crossover comes from scripts/benchmark_similarity_index.py.
+    """
+
+    MIN_TREE_SIZE = 150_000
+    # Extra rows kept from the batched GEMM shortlist before exact re-ranking
+    BATCH_REFINE_MARGIN = 8
+
+    def __init__(self, stats: np.ndarray, season_ids: np.ndarray, season_slices: Dict[str, slice],
+                 min_tree_size: int = MIN_TREE_SIZE, leaf_size: int = 64):
+        self.stats = stats
+        self.season_ids = season_ids
+        self.season_slices = season_slices
+        self.season_codes = {season: code for code, season in enumerate(sorted(season_slices))}
+        self.min_tree_size = min_tree_size
+        self.tree = KDTree(stats, season_ids, leaf_size) if stats.shape[0] >= min_tree_size else None
+        self._stats64 = None
+        self._sq_norms = None
+
+    def query(self, vector: np.ndarray, k: int, candidates: Optional[np.ndarray] = None,
+              seasons: Optional[Iterable[str]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (row indices, distances) of the k nearest rows, closest first."""
+        slices = None
+        if seasons is not None:
+            slices = [self.season_slices[s] for s in seasons if s in self.season_slices]
+            if not slices:
+                return np.empty(0, dtype=np.intp), np.empty(0)
+
+        population = self.stats.shape[0] if slices is None else sum(s.stop - s.start for s in slices)
+        if self.tree is not None and population >= self.min_tree_size:
+            season_mask = None
+            if seasons is not None:
+                # The bitmask prunes whole subtrees; leaves mixing seasons are
+                # filtered row by row through the candidate mask
+                codes = [self.season_codes[s] for s in seasons if s in self.season_codes]
+                season_mask = sum(1 << code for code in set(codes))
+                in_seasons = np.isin(self.season_ids, codes)
+                candidates = in_seasons if candidates is None else candidates & in_seasons
+            return self.tree.query(vector, k, candidates, season_mask)
+
+        return self.brute_force(vector, k, candidates, slices)
+
+    def query_many(self, vectors: np.ndarray, ks: List[int],
+                   candidates: Optional[np.ndarray] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Batched k-NN: one (rows, distances) pair per query vector.
+
+        All distances come from a single matrix product; each query's
+        shortlist is then re-ranked with the same distance `query` uses so
+        batched and single answers agree. `candidates` is an optional
+        (queries x rows) boolean mask.
+        """
+        if not len(ks):
+            return []
+
+        if self._stats64 is None:
+            stats64 = self.stats.astype(np.float64)
+            self._sq_norms = np.einsum('ij,ij->i', stats64, stats64)
+            self._stats64 = stats64
+
+        distances = pairwise_distances(np.asarray(vectors, dtype=np.float64), self._stats64, self._sq_norms)
+        if candidates is not None:
+            distances[~candidates] = np.inf
+
+        rows_count = distances.shape[1]
+        shortlist_size = min(max(ks) + self.BATCH_REFINE_MARGIN, rows_count)
+        if shortlist_size < rows_count:
+            shortlists = np.argpartition(distances, shortlist_size - 1, axis=1)[:, :shortlist_size]
+        else:
+            shortlists = np.broadcast_to(np.arange(rows_count), distances.shape)
+
+        results = []
+        for i, k in enumerate(ks):
+            # Sorted so top_k breaks ties by row index, as `query` does
+            rows = np.sort(shortlists[i][np.isfinite(distances[i, shortlists[i]])])
+            exact = euclidean_distances(self.stats[rows], vectors[i])
+            selected = top_k(exact, k)
+            order = rows[selected]
+            results.append((order, exact[selected].astype(np.float64)))
+        return results
+
+    def brute_force(self, vector: np.ndarray, k: int, candidates: Optional[np.ndarray] = None,
+                    slices: Optional[List[slice]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        if slices is None:
+            rows = None
+            distances = euclidean_distances(self.stats, vector)
+        else:
+            rows = np.concatenate([np.arange(s.start, s.stop) for s in slices])
+            distances = euclidean_distances(self.stats[rows], vector)
+
+        subset = None
+        if candidates is not None:
+            subset = candidates if rows is None else candidates[rows]
+
+        neighbors = top_k(distances, k, subset)
+        neighbor_distances = distances[neighbors].astype(np.float64)
+        if rows is not None:
+            neighbors = rows[neighbors]
+        return neighbors, neighbor_distances
+
+
+def build_similarity_index(dataset) -> SimilarityIndex:
+    return SimilarityIndex(dataset.stats, dataset.season_ids, dataset.season_slices)
@@ -0,0 +1,91 @@
+import os
+import struct
+import numpy as np
+from typing import Optional, Tuple
+from .nearest_neighbors import build_similarity_index
+
+MAGIC = b"NBANBRS\0"
+FORMAT_VERSION = 1
+# magic, format version, k, rows, dataset fingerprint (sha256 hex)
+HEADER = struct.Struct("<8sIII64s")
+
+
+class NeighborTable:
+    """Precomputed top-K similar player-seasons for every row of a dataset.
+
+    Row i holds the dataset row indices of its K nearest candidates
+    (closest first, -1 padded) and their distances, computed with the same
+    distance and exclusions as PlayerSimilarityService. The table is only
+    valid for the dataset whose fingerprint it carries.
+
+    Binary layout (little endian): HEADER, then rows x K int32 neighbor
+    indices, then rows x K float32 distances.
+    """
+
+    def __init__(self, fingerprint: str, neighbors: np.ndarray, distances: np.ndarray):
+        self.fingerprint = fingerprint
+        self.neighbors = neighbors
+        self.distances = distances
+
+    @property
+    def k(self) -> int:
+        return self.neighbors.shape[1]
+
+    @property
+    def rows(self) -> int:
+        return self.neighbors.shape[0]
+
+    def lookup(self, row: int, num_similar: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        if num_similar > self.k or row >= self.rows:
+            return None
+        neighbors = self.neighbors[row, :max(num_similar, 0)]
+        keep = neighbors >= 0
+        return neighbors[keep].astype(np.intp), self.distances[row, :max(num_similar, 0)][keep].astype(np.float64)
+
+    @classmethod
+    def build(cls, dataset, k: int, batch_size: int = 512) -> 'NeighborTable':
+        index = dataset.similarity_index or build_similarity_index(dataset)
+        rows = len(dataset.records)
+        neighbors = np.full((rows, k), -1, dtype=np.int32)
+        distances = np.full((rows, k), np.inf, dtype=np.float32)
+
+        valid = np.flatnonzero(dataset.valid_rows)
+        for start in range(0, valid.shape[0], batch_size):
+            batch = valid[start:start + batch_size]
+            candidates = np.stack([dataset.candidate_rows(row) for row in batch.tolist()])
+            results = index.query_many(dataset.stats[batch], [k] * batch.shape[0], candidates)
+            for row, (found, found_distances) in zip(batch.tolist(), results):
+                neighbors[row, :found.shape[0]] = found
+                distances[row, :found.shape[0]] = found_distances
+
+        return cls(dataset.fingerprint, neighbors, distances)
+
+    def save(self, path: str) -> None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, self.k, self.rows, self.fingerprint.encode("ascii")))
+            f.write(np.ascontiguousarray(self.neighbors, dtype="<i4").tobytes())
+            f.write(np.ascontiguousarray(self.distances, dtype="<f4").tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, dataset=None) -> Optional['NeighborTable']:
+        """Read a table, returning None if it is missing, unreadable or stale."""
+        try:
+            with open(path, "rb") as f:
+                magic, version, k, rows, fingerprint = HEADER.unpack(f.read(HEADER.size))
+                if magic != MAGIC or version != FORMAT_VERSION:
+                    print(f"Ignoring neighbor table {path}: unsupported format")
+                    return None
+                fingerprint = fingerprint.decode("ascii")
+                if dataset is not None and (fingerprint != dataset.fingerprint or rows != len(dataset.records)):
+                    print(f"Ignoring stale neighbor table {path}: built for a different dataset")
+                    return None
+                neighbors = np.fromfile(f, dtype="<i4", count=rows * k).reshape(rows, k)
+                distances = np.fromfile(f, dtype="<f4", count=rows * k).reshape(rows, k)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Could not load neighbor table {path}: {e}")
+            return None
+
+        print(f"Loaded neighbor table {path} with top-{k} neighbors for {rows} players")
+        return cls(fingerprint, neighbors, distances)
@@ -0,0 +1,208 @@
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+from ..models.dataset import PlayerDataset
+from ..startup import log_startup_timings, timed
+from .nearest_neighbors import build_similarity_index
+from .neighbor_table import NeighborTable
+from .player_search import PlayerSearchIndex
+
+
+class PlayerDataStore:
+    """Owns the normalized PlayerDataset for the lifetime of the process.
+
+    The dataset is built on first use (or eagerly from the application
+    lifespan) and shared by every service and request. `reload()` rebuilds it
+    from the repository and swaps it in once it is ready, so readers never see
+    a partially built dataset. `refresh()` does the same for just the
+    seasons whose source data changed, and can run from a background thread
+    via `start_auto_refresh()`. Datasets are never modified once published,
+    so requests keep using the version they started with.
+
+    With `lazy` set, single-season work goes through `season_dataset()`,
+    which builds and normalizes just that season (normalization is per
+    season, so the values match the full dataset) and keeps at most
+    `max_cached_seasons` of them. The full dataset is still built on demand
+    for cross-season operations.
+    """
+
+    def __init__(self, player_repository, neighbor_table_path: Optional[str] = None,
+                 lazy: bool = False, max_cached_seasons: Optional[int] = None):
+        self.player_repository = player_repository
+        self.neighbor_table_path = neighbor_table_path
+        self.lazy = lazy
+        self.max_cached_seasons = max_cached_seasons
+        self._dataset: Optional[PlayerDataset] = None
+        self._season_datasets: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._season_lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._stop_refresh = threading.Event()
+
+    @property
+    def dataset(self) -> PlayerDataset:
+        dataset = self._dataset
+        if dataset is None:
+            dataset = self.load()
+        return dataset
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._dataset is not None
+
+    def load(self) -> PlayerDataset:
+        dataset = self._dataset
+        if dataset is not None:
+            return dataset
+        with self._lock:
+            if self._dataset is None:
+                self._dataset = self._build_dataset()
+                with self._season_lock:
+                    self._season_datasets.clear()
+                log_startup_timings()
+            return self._dataset
+
+    def reload(self) -> Optional[PlayerDataset]:
+        with self._lock:
+            self.player_repository.reload()
+            with self._season_lock:
+                self._season_datasets.clear()
+            if self.lazy and self._dataset is None:
+                return None
+            self._dataset = self._build_dataset()
+            return self._dataset
+
+    def refresh(self) -> List[str]:
+        """Rebuild the dataset for seasons the repository reports as changed.
+
+        Unchanged seasons keep their normalized stats; the new dataset replaces
+        the old one with a single reference swap. Returns the changed seasons.
+        """
+        with self._lock:
+            changed = self.player_repository.refresh()
+            if not changed:
+                return []
+
+            with self._season_lock:
+                for season in changed:
+                    self._season_datasets.pop(season, None)
+
+            current = self._dataset
+            if current is not None:
+                replacements = {season: self.player_repository.get_all_players(season) for season in changed}
+                dataset = current.replace_seasons(replacements)
+                dataset.data_version = self.player_repository.get_data_version()
+                self._build_indexes(dataset)
+                self._dataset = dataset
+                print(f"Swapped in dataset {dataset.fingerprint[:12]} with updated seasons {changed}")
+            return changed
+
+    def start_auto_refresh(self, interval: float) -> None:
+        """Call refresh() every `interval` seconds on a daemon thread."""
+        if self._refresh_thread is not None:
+            return
+        self._stop_refresh.clear()
+        self._refresh_thread = threading.Thread(
+            target=self._refresh_loop, args=(interval,), name="player-data-refresh", daemon=True
+        )
+        self._refresh_thread.start()
+
+    def stop_auto_refresh(self) -> None:
+        thread = self._refresh_thread
+        if thread is None:
+            return
+        self._stop_refresh.set()
+        thread.join()
+        self._refresh_thread = None
+
+    def _refresh_loop(self, interval: float) -> None:
+        while not self._stop_refresh.wait(interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing player data: {str(e)}")
+
+    def season_dataset(self, season: str) -> PlayerDataset:
+        """A dataset holding `season`: the full one if loaded (or not lazy), else that season alone."""
+        dataset = self._dataset
+        if dataset is not None or not self.lazy:
+            return self.dataset
+
+        with self._season_lock:
+            dataset = self._season_datasets.get(season)
+            if dataset is not None:
+                self._season_datasets.move_to_end(season)
+                return dataset
+
+        with timed("load season"):
+            raw_data = self.player_repository.get_all_players(season)
+        print(f"Loaded {len(raw_data)} players for season {season} from repository")
+        with timed("build season dataset"):
+            dataset = PlayerDataset(raw_data)
+            dataset.normalize_data()
+        log_startup_timings()
+        if not raw_data:
+            return dataset
+
+        with self._season_lock:
+            self._season_datasets[season] = dataset
+            self._season_datasets.move_to_end(season)
+            if self.max_cached_seasons is not None:
+                while len(self._season_datasets) > self.max_cached_seasons:
+                    self._season_datasets.popitem(last=False)
+        return dataset
+
+    def published_dataset(self, season: Optional[str] = None) -> Optional[PlayerDataset]:
+        """What `season_dataset(season)` (or `load()` without a season) returns, if it is built already.
+
+        Never reads the repository, so it is safe to call from the event loop.
+        """
+        dataset = self._dataset
+        if dataset is not None or season is None or not self.lazy:
+            return dataset
+        with self._season_lock:
+            return self._season_datasets.get(season)
+
+    def data_version(self) -> Optional[str]:
+        """Version of the data requests are served from, or None if the repository has none.
+
+        Pinned to the published dataset, so it changes exactly when a reload or
+        refresh swaps in new data; in lazy mode, before the full dataset is
+        built, it is the repository's current version.
+        """
+        dataset = self._dataset
+        if dataset is not None:
+            return dataset.data_version
+        return self.player_repository.get_data_version()
+
+    def seasons(self) -> List[str]:
+        """Seasons in ascending order, without loading player data in lazy mode."""
+        if self._dataset is not None or not self.lazy:
+            return list(self.dataset.season_table)
+        return sorted(self.player_repository.get_seasons())
+
+    def _build_dataset(self) -> PlayerDataset:
+        print("Loading player data from repository")
+        # Read before the rows: if the data changes in between, the next refresh catches it
+        data_version = self.player_repository.get_data_version()
+        with timed("load players"):
+            raw_data = self.player_repository.get_all_players()
+        print(f"Loaded {len(raw_data)} players from repository")
+
+        if not raw_data:
+            print("Warning: No player data returned from repository")
+            return PlayerDataset([])
+
+        with timed("build dataset"):
+            dataset = PlayerDataset(raw_data)
+            dataset.normalize_data()
+        dataset.data_version = data_version
+        with timed("build indexes"):
+            self._build_indexes(dataset)
+        return dataset
+
+    def _build_indexes(self, dataset: PlayerDataset) -> None:
+        dataset.similarity_index = build_similarity_index(dataset)
+        dataset.search_index = PlayerSearchIndex(dataset)
+        if self.neighbor_table_path:
+            dataset.neighbor_table = NeighborTable.load(self.neighbor_table_path, dataset)
@@ -0,0 +1,95 @@
+import base64
+import bisect
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+
+
+def encode_cursor(season: str, player: str, skip: int) -> str:
+    """Opaque cursor: the key of the last row sent, and how many rows with that key were sent."""
+    payload = json.dumps([season, player, skip], ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        season, player, skip = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(season, str) or not isinstance(player, str) or not isinstance(skip, int) or skip < 1:
+        raise ValueError("Invalid cursor")
+    return season, player, skip
+
+
+def project(rows: List[Dict[str, Any]], fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+    """Rows reduced to `fields`, in that order; columns a row lacks are left out."""
+    if not fields:
+        return rows
+    return [{field: row[field] for field in fields if field in row} for row in rows]
+
+
+class PlayerPages:
+    """Keyset pagination over the repository's raw player rows.
+
+    Pages are ordered by (Season, Player), with rows sharing a key kept in
+    repository order. A cursor names the last key sent rather than an
+    offset, so pages stay consistent when a refresh adds or removes rows
+    before it. Sorted views are cached per season and data version.
+    """
+
+    def __init__(self, player_repository, max_cached_views: int = 16):
+        self.player_repository = player_repository
+        self.max_cached_views = max_cached_views
+        self._views: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def page(self, season: Optional[str], limit: int, cursor: Optional[str] = None,
+             fields: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Up to `limit` rows after `cursor`, and the cursor for the next page (None on the last page)."""
+        rows, keys = self._sorted_view(season)
+        start = 0
+        if cursor:
+            last_season, last_player, skip = decode_cursor(cursor)
+            key = (last_season, last_player)
+            start = min(bisect.bisect_left(keys, key) + skip, bisect.bisect_right(keys, key))
+
+        stop = min(start + limit, len(rows))
+        next_cursor = None
+        if stop < len(rows):
+            last_key = keys[stop - 1]
+            next_cursor = encode_cursor(last_key[0], last_key[1], stop - bisect.bisect_left(keys, last_key))
+        return project(rows[start:stop], fields), next_cursor
+
+    def _sorted_view(self, season: Optional[str]) -> Tuple[List[Dict[str, Any]], List[Tuple[str, str]]]:
+        version = self.player_repository.get_data_version()
+        cache_key = (season or "", version)
+        if version is not None:
+            with self._lock:
+                view = self._views.get(cache_key)
+                if view is not None:
+                    self._views.move_to_end(cache_key)
+                    return view
+
+        players = self.player_repository.get_all_players(season)
+        # sorted() is stable, so rows sharing a key keep their repository order
+        rows = sorted(players, key=self._key)
+        view = (rows, [self._key(row) for row in rows])
+
+        if version is not None:
+            with self._lock:
+                # Views for an older data version will not be asked for again
+                for stale in [key for key in self._views if key[1] != version]:
+                    del self._views[stale]
+                self._views[cache_key] = view
+                while len(self._views) > self.max_cached_views:
+                    self._views.popitem(last=False)
+        return view
+
+    @staticmethod
+    def _key(player: Dict[str, Any]) -> Tuple[str, str]:
+        return str(player.get('Season', '')), str(player.get('Player', ''))
@@ -0,0 +1,93 @@
+import bisect
+import numpy as np
+from typing import List, Tuple
+from ..models.dataset import PlayerDataset, fold_name
+from ..models.player import PlayerSearchResult
+
+# Rank tiers: exact name, name prefix, prefix of a later word ("james" -> "LeBron James")
+EXACT, NAME_PREFIX, WORD_PREFIX = 0, 1, 2
+
+
+class PlayerSearchIndex:
+    """Typeahead over every player in a dataset.
+
+    One entry per player name with all the seasons it appears in. Folded
+    names and their word suffixes are kept in sorted arrays so a prefix is
+    two bisects away; matches rank by tier, then most recent season, then
+    name.
+    """
+
+    def __init__(self, dataset: PlayerDataset):
+        # One entry per name in the dataset's name table
+        names = list(dataset.name_table)
+        seasons: List[List[str]] = [[] for _ in names]
+        latest = np.zeros(len(names), dtype=np.int32)
+        for name_id, season_id in zip(dataset.name_ids.tolist(), dataset.season_ids.tolist()):
+            season = dataset.season_table[season_id]
+            # Rows are ordered by season, so each player's seasons arrive sorted
+            if not seasons[name_id] or seasons[name_id][-1] != season:
+                seasons[name_id].append(season)
+            latest[name_id] = season_id
+
+        self.names = names
+        self.seasons = [s[::-1] for s in seasons]
+        self._latest = latest
+        self._name_rank = np.argsort(np.argsort(np.array([fold_name(n) for n in names], dtype=object)))
+
+        full_keys: List[Tuple[str, int]] = []
+        word_keys: List[Tuple[str, int]] = []
+        for entry, name in enumerate(names):
+            folded = fold_name(name)
+            full_keys.append((folded, entry))
+            words = folded.split(' ')
+            for start in range(1, len(words)):
+                word_keys.append((' '.join(words[start:]), entry))
+        full_keys.sort()
+        word_keys.sort()
+
+        self._full_keys = [k for k, _ in full_keys]
+        self._full_entries = np.array([e for _, e in full_keys], dtype=np.int32)
+        self._word_keys = [k for k, _ in word_keys]
+        self._word_entries = np.array([e for _, e in word_keys], dtype=np.int32)
+
+    def search(self, query: str, limit: int = 10) -> List[PlayerSearchResult]:
+        prefix = fold_name(query)
+        if not prefix or limit <= 0:
+            return []
+
+        lo, hi = self._prefix_range(self._full_keys, prefix)
+        exact_hi = bisect.bisect_right(self._full_keys, prefix, lo, hi)
+        word_lo, word_hi = self._prefix_range(self._word_keys, prefix)
+
+        matches = np.concatenate((
+            self._full_entries[lo:exact_hi],
+            self._full_entries[exact_hi:hi],
+            self._word_entries[word_lo:word_hi],
+        ))
+        if not matches.size:
+            return []
+        tiers = np.concatenate((
+            np.full(exact_hi - lo, EXACT),
+            np.full(hi - exact_hi, NAME_PREFIX),
+            np.full(word_hi - word_lo, WORD_PREFIX),
+        ))
+
+        # Best tier per player, then most recent season first, then by name
+        order = np.lexsort((self._name_rank[matches], -self._latest[matches], tiers))
+        _, first = np.unique(matches[order], return_index=True)
+        ranked = order[np.sort(first)][:limit]
+
+        return [
+            PlayerSearchResult(
+                player=self.names[entry],
+                seasons=self.seasons[entry],
+                latest_season=self.seasons[entry][0]
+            )
+            for entry in matches[ranked].tolist()
+        ]
+
+    @staticmethod
+    def _prefix_range(keys: List[str], prefix: str) -> Tuple[int, int]:
+        lo = bisect.bisect_left(keys, prefix)
+        hi = bisect.bisect_left(keys, prefix + '\U0010ffff', lo)
+        return lo, hi
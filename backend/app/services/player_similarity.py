@@ -1,141 +1,164 @@
 from ..models.dataset import Player, PlayerDataset
 import numpy as np
-from typing import List, Dict, Any, Tuple
-from ..models.player import PlayerStats, SimilarPlayer
+from typing import List, Dict, Any, Optional, Tuple, Union
+from ..models.player import PlayerQuery, PlayerSearchResult, PlayerStats, SimilarPlayer
+from .player_data_store import PlayerDataStore
+from . import nearest_neighbors
+from .player_search import PlayerSearchIndex
+from .player_pages import PlayerPages, project
+from .encoded_payload import EncodedPayload, PayloadCache
+from .executors import BoundedExecutor
+from .single_flight import SingleFlight
 
 class PlayerSimilarityService:
-    def __init__(self, player_repository):
+    def __init__(self, player_repository, data_store: PlayerDataStore = None,
+                 executor: Optional[BoundedExecutor] = None, load_executor: Optional[BoundedExecutor] = None):
         self.player_repository = player_repository
-        self.dataset = None
-        self._data_loaded = False
+        self.data_store = data_store or PlayerDataStore(player_repository)
+        # Similarity queries run on `executor`; repository reads for the async entry points on `load_executor`
+        self.executor = executor or BoundedExecutor("similarity")
+        self.load_executor = load_executor or BoundedExecutor("similarity-load")
+        self.player_pages = PlayerPages(player_repository)
+        self._payloads = PayloadCache()
+        # Identical similarity queries in flight at the same time share one computation
+        self.single_flight = SingleFlight()
 
     def find_similar_players(self, player_name: str, season: str = "2023_24",
-                            num_similar: int = 5) -> Tuple[PlayerStats, List[SimilarPlayer]]:
-        self.load_data()
+                            num_similar: int = 5,
+                            seasons: Optional[List[str]] = None) -> Tuple[PlayerStats, List[SimilarPlayer]]:
+        return self.single_flight.do(self._query_key(player_name, season, num_similar, seasons),
+                                     self._find_similar_players, player_name, season, num_similar, seasons)
+
+    def _find_similar_players(self, player_name: str, season: str, num_similar: int,
+                              seasons: Optional[List[str]]) -> Tuple[PlayerStats, List[SimilarPlayer]]:
+        dataset = self.load_data()
 
         print(f"Finding similar players for {player_name} in season {season}")
 
-        if not self.dataset or not self.dataset.players:
+        if not dataset or not dataset.players:
             print("Error: No player data available")
             raise ValueError("No player data available")
 
-        try:
-            season_players = self.dataset.get_players_by_season(season)
-
-            if not season_players:
-                raise ValueError(f"No players found for season {season}")
-
-            query_player = self.dataset.get_player(player_name, season)
-            if not query_player:
-                raise ValueError(f"Player '{player_name}' not found in season {season}")
+        query_player = self._find_query_player(dataset, player_name, season)
 
-            player_stats_vector = self._get_player_stats_vector(query_player)
-        except ValueError as e:
-            print(f"Error getting player stats vector: {str(e)}")
-            raise ValueError(str(e))
+        try:
+            neighbors, distances = self._nearest_neighbors(dataset, query_player, num_similar, seasons)
+            return self._build_results(dataset, query_player, neighbors, distances)
         except Exception as e:
-            print(f"Unexpected error getting player stats vector: {str(e)}")
+            print(f"Error calculating similar players: {str(e)}")
             raise
 
-        distances = []
+    def find_similar_players_batch(self, queries: List[PlayerQuery]) -> List[Union[Tuple[PlayerStats, List[SimilarPlayer]], ValueError]]:
+        """Answer many queries with a single matrix-to-matrix distance computation.
 
-        try:
-            for idx, player in enumerate(self.dataset.players):
-                if player["Player"] == player_name and player["Season"] == season:
-                    continue
+        Results come back in query order; a query that cannot be answered
+        (unknown player or season) yields its ValueError instead of a result.
+        """
+        dataset = self.load_data()
 
-                try:
-                    compared_player_vector = self._get_player_stats_vector(player)
-
-                    if compared_player_vector.shape != player_stats_vector.shape:
-                        print(f"Warning: Vector shape mismatch for player {player['Player']}: {compared_player_vector.shape} vs {player_stats_vector.shape}")
-                        continue
-
-                    distance = self._calculate_distance(player_stats_vector, compared_player_vector)
-
-                    if np.isnan(distance) or np.isinf(distance):
-                        print(f"Warning: Invalid distance value for player {player['Player']}: {distance}")
-                        continue
-
-                    player_age = 0
-                    try:
-                        player_age = int(player["Age"]) if player["Age"] is not None else 0
-                    except (ValueError, TypeError):
-                        print(f"Warning: Could not convert age to int for player {player['Player']}")
-
-                    distances.append({
-                        'player': player["Player"],
-                        'season': player["Season"],
-                        'position': player["Pos"],
-                        'age': player_age,
-                        'distance': distance,
-                        'idx': idx
-                    })
-                except Exception as e:
-                    print(f"Error processing player {player['Player']}: {str(e)}")
-                    continue
-
-            if not distances:
-                raise ValueError(f"Could not calculate distances for any players similar to {player_name}")
-
-            distances.sort(key=lambda x: x['distance'])
-
-            similar_players = []
-            for i in range(min(num_similar, len(distances))):
-                player_info = distances[i]
-                idx = player_info['idx']
-                player_data = self.dataset.players[idx]
-
-                try:
-                    player_stats = self._player_to_stats(player_data)
-
-                    similar_player = SimilarPlayer(
-                        player=player_info['player'],
-                        season=player_info['season'],
-                        position=player_info['position'],
-                        age=player_info['age'],
-                        similarity_score=1.0 - (player_info['distance'] / 4.0),  # Normalize to 0-1 scale
-                        stats=player_stats
-                    )
+        print(f"Finding similar players for a batch of {len(queries)} queries")
 
-                    similar_players.append(similar_player)
-                except Exception as e:
-                    print(f"Error creating SimilarPlayer for {player_info['player']}: {str(e)}")
-                    continue
+        if not dataset or not dataset.players:
+            print("Error: No player data available")
+            raise ValueError("No player data available")
 
-            query_player_stats = self._player_to_stats(query_player)
+        results: List[Any] = [None] * len(queries)
+        resolved = []
+        for position, query in enumerate(queries):
+            try:
+                query_player = self._find_query_player(dataset, query.player_name, query.season)
+                if not np.isfinite(self._get_player_stats_vector(query_player)).all():
+                    raise ValueError(f"Could not calculate distances for any players similar to {query.player_name}")
+                resolved.append((position, query, query_player))
+            except ValueError as e:
+                results[position] = e
+
+        if resolved:
+            index = self._similarity_index(dataset)
+            vectors = np.stack([self._get_player_stats_vector(p) for _, _, p in resolved])
+            candidates = np.stack([dataset.candidate_rows(p.index) for _, _, p in resolved])
+            neighbors = index.query_many(vectors, [q.num_similar for _, q, _ in resolved], candidates)
+
+            for (position, query, query_player), (rows, distances) in zip(resolved, neighbors):
+                try:
+                    results[position] = self._build_results(dataset, query_player, rows, distances)
+                except ValueError as e:
+                    results[position] = e
 
-            print(f"Found {len(similar_players)} similar players")
-            return query_player_stats, similar_players
+        return results
 
-        except Exception as e:
-            print(f"Error calculating similar players: {str(e)}")
-            raise
+    async def find_similar_players_async(self, player_name: str, season: str = "2023_24", num_similar: int = 5,
+                                         seasons: Optional[List[str]] = None) -> Tuple[PlayerStats, List[SimilarPlayer]]:
+        return await self.single_flight.do_async(
+            self._query_key(player_name, season, num_similar, seasons),
+            lambda: self.executor.submit(self._find_similar_players, player_name, season, num_similar, seasons)
+        )
 
-    def load_data(self) -> None:
-        if not self._data_loaded:
-            try:
-                print("Loading player data from repository")
-                raw_data = self.player_repository.get_all_players()
-                print(f"Loaded {len(raw_data)} players from repository")
-
-                if not raw_data:
-                    print("Warning: No player data returned from repository")
-                    self.dataset = PlayerDataset([])
-                else:
-                    self.dataset = PlayerDataset(raw_data)
-                    self.dataset.normalize_data()
-
-                self._data_loaded = True
-            except Exception as e:
-                print(f"Error loading player data: {str(e)}")
-                self.dataset = PlayerDataset([])
-                self._data_loaded = True
-                raise
+    @staticmethod
+    def _query_key(player_name: str, season: str, num_similar: int, seasons: Optional[List[str]]) -> Tuple:
+        return player_name, season, num_similar, tuple(seasons) if seasons else None
+
+    async def find_similar_players_batch_async(self, queries: List[PlayerQuery]
+                                               ) -> List[Union[Tuple[PlayerStats, List[SimilarPlayer]], ValueError]]:
+        return await self.executor.run(self.find_similar_players_batch, queries)
+
+    async def get_players_async(self, season: Optional[str] = None,
+                                fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        return await self.load_executor.run(lambda: project(self.get_all_players(season), fields))
+
+    async def get_encoded_players_async(self, season: Optional[str] = None,
+                                        fields: Optional[List[str]] = None) -> Optional[EncodedPayload]:
+        """get_encoded_players() off the event loop; payloads already encoded are returned directly."""
+        dataset = self.data_store.published_dataset()
+        if dataset is not None and dataset.data_version is not None:
+            payload = self._payloads.peek(self._payload_key(season, fields), dataset.data_version)
+            if payload is not None:
+                return payload
+        return await self.load_executor.run(self.get_encoded_players, season, fields)
+
+    async def get_players_page_async(self, season: Optional[str], limit: int, cursor: Optional[str] = None,
+                                     fields: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return await self.load_executor.run(self.get_players_page, season, limit, cursor, fields)
+
+    async def search_players_async(self, query: str, limit: int = 10) -> List[PlayerSearchResult]:
+        # Searching built data is cheap enough for the event loop; building it is not
+        dataset = self.data_store.published_dataset()
+        if dataset is not None and dataset.search_index is not None:
+            return dataset.search_index.search(query, limit)
+        return await self.load_executor.run(self.search_players, query, limit)
+
+    async def get_seasons_async(self) -> List[str]:
+        return await self.load_executor.run(self.get_seasons)
+
+    def load_data(self) -> PlayerDataset:
+        return self.data_store.load()
 
     def get_all_players(self, season: str = None) -> List[Dict[str, Any]]:
         return self.player_repository.get_all_players(season)
 
+    def get_encoded_players(self, season: Optional[str] = None,
+                            fields: Optional[List[str]] = None) -> Optional[EncodedPayload]:
+        """The player list as JSON bytes, encoded once per data version; None if the data is unversioned."""
+        version = self.data_store.data_version()
+        if version is None:
+            return None
+        return self._payloads.get(self._payload_key(season, fields), version,
+                                  lambda: project(self.get_all_players(season), fields))
+
+    @staticmethod
+    def _payload_key(season: Optional[str], fields: Optional[List[str]]) -> Tuple:
+        return season or "", tuple(fields) if fields else None
+
+    def get_players_page(self, season: Optional[str], limit: int, cursor: Optional[str] = None,
+                         fields: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return self.player_pages.page(season, limit, cursor, fields)
+
+    def search_players(self, query: str, limit: int = 10) -> List[PlayerSearchResult]:
+        dataset = self.load_data()
+        if dataset.search_index is None:
+            dataset.search_index = PlayerSearchIndex(dataset)
+        return dataset.search_index.search(query, limit)
+
     def get_seasons(self) -> List[str]:
         try:
             seasons = self.player_repository.get_seasons()
@@ -145,74 +168,71 @@ class PlayerSimilarityService:
             print(f"Error retrieving seasons: {str(e)}")
             raise
 
-    def _calculate_distance(self, player_vector: np.ndarray, compared_player_vector: np.ndarray) -> float:
-        return np.sqrt(np.sum((player_vector - compared_player_vector) ** 2))
+    def _find_query_player(self, dataset: PlayerDataset, player_name: str, season: str) -> Player:
+        try:
+            season_players = dataset.get_players_by_season(season)
+
+            if not season_players:
+                raise ValueError(f"No players found for season {season}")
+
+            query_player = dataset.get_player(player_name, season)
+            if not query_player:
+                raise ValueError(f"Player '{player_name}' not found in season {season}")
+
+            return query_player
+        except ValueError as e:
+            print(f"Error getting player stats vector: {str(e)}")
+            raise ValueError(str(e))
+        except Exception as e:
+            print(f"Unexpected error getting player stats vector: {str(e)}")
+            raise
+
+    def _build_results(self, dataset: PlayerDataset, query_player: Player, neighbors: np.ndarray,
+                       distances: np.ndarray) -> Tuple[PlayerStats, List[SimilarPlayer]]:
+        similar_players = []
+        for idx, distance in zip(neighbors.tolist(), distances.tolist()):
+            player_data = dataset.players[idx]
 
-    def _get_player_stats_vector(self, player: Player) -> np.ndarray:
-        norm_cols = [
-            'PTS_norm', 'MP_norm', 'FG_norm', 'FGA_norm', 'FG3_norm', 'FG3A_norm',
-            'FG2_norm', 'FG2A_norm', 'FT_norm', 'FTA_norm', 'ORB_norm', 'DRB_norm',
-            'AST_norm', 'STL_norm', 'TOV_norm', 'BLK_norm'
-        ]
-
-        vector = []
-        for col in norm_cols:
-            try:
-                val = player.normalized_stats.get(col, 0.0)
-                if isinstance(val, str) and not val.strip():
-                    vector.append(0.0)
-                else:
-                    vector.append(float(val))
-            except (ValueError, TypeError) as e:
-                print(f"Warning: Could not convert normalized stat '{col}' to float: {e}. Using 0.0 instead.")
-                vector.append(0.0)
-
-        return np.array(vector)
-
-
-    def _player_to_stats(self, player: Player) -> PlayerStats:
-        data = player.data
-
-        def safe_convert(value, convert_func, default=0):
-            if value is None:
-                return default
-            if isinstance(value, str) and not value.strip():
-                return default
             try:
-                return convert_func(value)
-            except (ValueError, TypeError):
-                return default
-
-        return PlayerStats(
-            player=data.get('Player', ''),
-            season=data.get('Season', ''),
-            position=data.get('Pos', ''),
-            age=safe_convert(data.get('Age'), int),
-            team=data.get('Team', ''),
-            games_played=safe_convert(data.get('G'), int),
-            games_started=safe_convert(data.get('GS'), int),
-            minutes_per_game=safe_convert(data.get('MP'), float),
-            points_per_game=safe_convert(data.get('PTS'), float),
-            field_goals_per_game=safe_convert(data.get('FG'), float),
-            field_goal_attempts_per_game=safe_convert(data.get('FGA'), float),
-            field_goal_percentage=safe_convert(data.get('FG%'), float),
-            three_pointers_per_game=safe_convert(data.get('FG3'), float),
-            three_point_attempts_per_game=safe_convert(data.get('FG3A'), float),
-            three_point_percentage=safe_convert(data.get('FG3%'), float),
-            two_pointers_per_game=safe_convert(data.get('FG2'), float),
-            two_point_attempts_per_game=safe_convert(data.get('FG2A'), float),
-            two_point_percentage=safe_convert(data.get('FG2%'), float),
-            effective_field_goal_percentage=safe_convert(data.get('eFG%'), float),
-            free_throws_per_game=safe_convert(data.get('FT'), float),
-            free_throw_attempts_per_game=safe_convert(data.get('FTA'), float),
-            free_throw_percentage=safe_convert(data.get('FT%'), float),
-            offensive_rebounds_per_game=safe_convert(data.get('ORB'), float),
-            defensive_rebounds_per_game=safe_convert(data.get('DRB'), float),
-            total_rebounds_per_game=safe_convert(data.get('TRB'), float) if 'TRB' in data else safe_convert(data.get('ORB'), float) + safe_convert(data.get('DRB'), float),
-            assists_per_game=safe_convert(data.get('AST'), float),
-            steals_per_game=safe_convert(data.get('STL'), float),
-            blocks_per_game=safe_convert(data.get('BLK'), float),
-            turnovers_per_game=safe_convert(data.get('TOV'), float),
-            personal_fouls_per_game=safe_convert(data.get('PF'), float),
-            player_id=data.get('Player-additional', '')
-        )
+                player_stats = player_data.player_stats
+
+                similar_player = SimilarPlayer(
+                    player=player_data["Player"],
+                    season=player_data["Season"],
+                    position=player_data["Pos"],
+                    age=int(dataset.ages[idx]),
+                    similarity_score=1.0 - (distance / 4.0),  # Normalize to 0-1 scale
+                    stats=player_stats
+                )
+
+                similar_players.append(similar_player)
+            except Exception as e:
+                print(f"Error creating SimilarPlayer for {player_data['Player']}: {str(e)}")
+                continue
+
+        query_player_stats = query_player.player_stats
+
+        print(f"Found {len(similar_players)} similar players")
+        return query_player_stats, similar_players
+
+    def _nearest_neighbors(self, dataset: PlayerDataset, query_player: Player,
+                           num_similar: int, seasons: Optional[List[str]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        query_vector = self._get_player_stats_vector(query_player)
+        if not np.isfinite(query_vector).all():
+            raise ValueError(f"Could not calculate distances for any players similar to {query_player['Player']}")
+
+        if seasons is None and dataset.neighbor_table is not None:
+            precomputed = dataset.neighbor_table.lookup(query_player.index, num_similar)
+            if precomputed is not None:
+                return precomputed
+
+        candidates = dataset.candidate_rows(query_player.index)
+        return self._similarity_index(dataset).query(query_vector, num_similar, candidates, seasons)
+
+    def _similarity_index(self, dataset: PlayerDataset) -> nearest_neighbors.SimilarityIndex:
+        if dataset.similarity_index is None:
+            dataset.similarity_index = nearest_neighbors.build_similarity_index(dataset)
+        return dataset.similarity_index
+
+    def _get_player_stats_vector(self, player: Player) -> np.ndarray:
+        return player.stats_vector
@@ -0,0 +1,80 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution.
+
+    The first caller for a key starts the work; callers arriving while it is
+    in flight wait for it and get the same result, or the same exception.
+    Nothing is kept once the call finishes, so a later call runs again.
+    Sync callers (`do`) and async callers (`do_async`) share the same
+    in-flight calls. `stats()` counts hits (calls that joined one already
+    in flight) and misses (calls that started one).
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run `fn(*args, **kwargs)` in this thread, or wait for the call already in flight for `key`."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is None:
+                future = self._calls[key] = Future()
+                self._misses += 1
+                leader = True
+            else:
+                self._hits += 1
+                leader = False
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._forget(key, future)
+
+    async def do_async(self, key: Hashable, submit: Callable[[], Future]) -> Any:
+        """Await the call in flight for `key`, or start one with `submit()`.
+
+        `submit` starts the work elsewhere (e.g. BoundedExecutor.submit) and
+        returns its future. A waiter that is cancelled stops waiting without
+        cancelling the call the others are waiting for.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            if future is None:
+                future = submit()
+                self._calls[key] = future
+                self._misses += 1
+                leader = True
+            else:
+                self._hits += 1
+                leader = False
+
+        if leader:
+            # Outside the lock: the callback runs straight away if the call already finished
+            future.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def _forget(self, key: Hashable, future: Future) -> None:
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self._hits, "misses": self._misses, "in_flight": len(self._calls)}
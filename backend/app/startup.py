@@ -0,0 +1,45 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (phase, seconds) in the order the phases finished
+_phases: List[Tuple[str, float]] = []
+_reported = False
+
+
+def record(phase: str, seconds: float) -> None:
+    # Work after the process first became ready (reloads, more seasons) is not startup
+    if not _reported:
+        _phases.append((phase, seconds))
+
+
+@contextmanager
+def timed(phase: str):
+    """Record how long the block takes as a startup phase."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase, time.perf_counter() - start)
+
+
+def startup_timings() -> Dict[str, float]:
+    """Milliseconds per phase recorded so far; repeated phases are summed."""
+    timings: Dict[str, float] = {}
+    for phase, seconds in _phases:
+        timings[phase] = timings.get(phase, 0.0) + seconds * 1000
+    return timings
+
+
+def log_startup_timings() -> None:
+    """Log the breakdown once, when the process is first ready to serve data."""
+    global _reported
+    if _reported:
+        return
+    _reported = True
+    timings = startup_timings()
+    breakdown = ", ".join(f"{phase} {ms:.0f}ms" for phase, ms in timings.items())
+    logger.info(f"Startup: {sum(timings.values()):.0f}ms ({breakdown})")
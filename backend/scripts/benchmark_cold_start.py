@@ -0,0 +1,143 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Add the parent directory to the path so we can import from app
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+
+def api_gateway_event(path, query=""):
+    """A minimal API Gateway HTTP API (payload 2.0) GET event, as Lambda delivers it."""
+    return {
+        "version": "2.0",
+        "routeKey": "$default",
+        "rawPath": path,
+        "rawQueryString": query,
+        "headers": {"host": "localhost", "accept": "application/json", "user-agent": "cold-start-benchmark"},
+        "requestContext": {
+            "accountId": "123456789012",
+            "apiId": "local",
+            "domainName": "localhost",
+            "stage": "$default",
+            "requestId": "cold-start-benchmark",
+            "http": {
+                "method": "GET",
+                "path": path,
+                "protocol": "HTTP/1.1",
+                "sourceIp": "127.0.0.1",
+                "userAgent": "cold-start-benchmark",
+            },
+        },
+        "isBase64Encoded": False,
+    }
+
+
+class LambdaContext:
+    function_name = "cold-start-benchmark"
+    memory_limit_in_mb = 1024
+    aws_request_id = "cold-start-benchmark"
+
+    def get_remaining_time_in_millis(self):
+        return 20000
+
+
+def run_child(requests):
+    """Import the app and send `requests` through the Mangum handler, in this (fresh) process."""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        from app.main import handler
+        from app import startup
+    import_time = time.perf_counter() - start
+
+    invocations = []
+    for request in requests:
+        path, _, query = request.partition("?")
+        invocation_start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            response = handler(api_gateway_event(path, query), LambdaContext())
+        invocations.append({
+            "request": request,
+            "status": response["statusCode"],
+            "ms": (time.perf_counter() - invocation_start) * 1000,
+        })
+
+    print(json.dumps({
+        "import_ms": import_time * 1000,
+        "invocations": invocations,
+        "startup": startup.startup_timings(),
+    }))
+
+
+def cold_start(env, requests):
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", *requests],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report["process_ms"] = (time.perf_counter() - start) * 1000
+    return report
+
+
+def benchmark(data_dir, requests, runs):
+    from app.repositories.file_player_repository import FilePlayerRepository
+    from app.repositories import player_snapshot
+
+    artifact = os.path.join(tempfile.mkdtemp(), "data.snapshot")
+    with contextlib.redirect_stdout(io.StringIO()):
+        players = FilePlayerRepository(data_dir).get_all_players()
+        player_snapshot.write_snapshot(artifact, players, player_snapshot.source_fingerprint(data_dir))
+
+    base_env = dict(os.environ, USE_DYNAMODB="false", DATA_DIR=data_dir,
+                    AWS_LAMBDA_FUNCTION_NAME="cold-start-benchmark")
+    for name in ("DATA_ARTIFACT", "DATA_SNAPSHOT", "LAZY_SEASON_LOADING", "DATA_REFRESH_INTERVAL"):
+        base_env.pop(name, None)
+    modes = {
+        "csv": {},
+        "lazy": {"LAZY_SEASON_LOADING": "true"},
+        "artifact": {"DATA_ARTIFACT": artifact},
+    }
+
+    print(f"{runs} cold starts per mode, requests: {', '.join(requests)} (medians)\n")
+    request_columns = " ".join(f"{'request ' + str(i + 1):>10}" for i in range(len(requests)))
+    print(f"{'mode':>9} {'process':>9} {'import':>8} {request_columns}")
+    for name, mode_env in modes.items():
+        reports = [cold_start(dict(base_env, **mode_env), requests) for _ in range(runs)]
+        for report in reports:
+            failed = [i for i in report["invocations"] if i["status"] != 200]
+            if failed:
+                raise RuntimeError(f"{name}: {failed[0]['request']} returned {failed[0]['status']}")
+
+        def median(values):
+            return f"{statistics.median(values):.0f}ms"
+
+        invocation_times = [median([r["invocations"][i]["ms"] for r in reports]) for i in range(len(requests))]
+        print(f"{name:>9} {median([r['process_ms'] for r in reports]):>9} "
+              f"{median([r['import_ms'] for r in reports]):>8} " + " ".join(f"{t:>10}" for t in invocation_times))
+        phases = reports[len(reports) // 2]["startup"]
+        print(f"{'':>9} " + ", ".join(f"{phase} {ms:.0f}ms" for phase, ms in phases.items()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time Lambda-style cold starts of the API through the Mangum handler")
+    parser.add_argument("--data-dir", default="./data")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per mode")
+    parser.add_argument("--child", nargs="+", metavar="REQUEST", help=argparse.SUPPRESS)
+    parser.add_argument("requests", nargs="*",
+                        default=["/players/seasons", "/players?season=2023_24",
+                                 "/players/similar?player_name=LeBron%20James&season=2023_24"],
+                        help="Paths (with optional ?query) requested in order in each process")
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+    else:
+        benchmark(os.path.abspath(args.data_dir), args.requests, args.runs)
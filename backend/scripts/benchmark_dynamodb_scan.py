@@ -0,0 +1,69 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+# Add the parent directory to the path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.repositories.file_player_repository import FilePlayerRepository
+from app.repositories.dynamodb_player_repository import DynamoDBPlayerRepository
+from scripts.fake_dynamodb_table import FakeDynamoDBClient
+
+
+def timed_load(client, segments, packed=False):
+    repository = DynamoDBPlayerRepository(total_segments=segments, client=client, packed_seasons=packed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Read outside the timing, as a warm process would have it cached
+        repository.get_season_catalog()
+    client.requests = 0
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        players = repository.get_all_players()
+        seasons = repository.get_seasons()
+    return time.perf_counter() - start, client.requests, players, seasons
+
+
+def benchmark(data_dir, segment_counts, latency, page_size, packed=False):
+    with contextlib.redirect_stdout(io.StringIO()):
+        source = FilePlayerRepository(data_dir).get_all_players()
+    client = FakeDynamoDBClient(page_size=page_size, latency=latency)
+    client.load_items(source)
+    with contextlib.redirect_stdout(io.StringIO()):
+        catalog = DynamoDBPlayerRepository(client=client).repair_season_catalog()
+    print(f"Fake table: {len(client._items)} items, {page_size} items per page, {latency * 1000:.0f}ms per request\n")
+
+    def key(player):
+        return player['Season'], player['Player']
+
+    print(f"{'segments':>8} {'requests':>9} {'load+seasons':>13} {'speedup':>8}  same result")
+    baseline = None
+    for segments in segment_counts:
+        elapsed, requests, players, seasons = timed_load(client, segments)
+        if baseline is None:
+            baseline = (elapsed, sorted(players, key=key), seasons)
+        same = sorted(players, key=key) == baseline[1] and seasons == baseline[2]
+        print(f"{segments:>8} {requests:>9} {elapsed * 1000:>11.0f}ms {baseline[0] / elapsed:>7.1f}x  {same}")
+
+    if packed:
+        repository = DynamoDBPlayerRepository(client=client)
+        with contextlib.redirect_stdout(io.StringIO()):
+            for season in catalog['seasons']:
+                repository.write_packed_season(season)
+        elapsed, requests, players, seasons = timed_load(client, 1, packed=True)
+        same = sorted(players, key=key) == baseline[1] and seasons == baseline[2]
+        print(f"{'packed':>8} {requests:>9} {elapsed * 1000:>11.0f}ms {baseline[0] / elapsed:>7.1f}x  {same}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare sequential and segmented DynamoDB scans on a fake table")
+    parser.add_argument("--data-dir", default="./data")
+    parser.add_argument("--segments", default="1,2,4,8,16")
+    parser.add_argument("--latency", type=float, default=0.03, help="Seconds per request")
+    parser.add_argument("--page-size", type=int, default=500, help="Items per scan page")
+    parser.add_argument("--packed", action="store_true", help="Also time loading packed season items")
+    args = parser.parse_args()
+
+    benchmark(args.data_dir, [int(s) for s in args.segments.split(",")], args.latency, args.page_size, args.packed)
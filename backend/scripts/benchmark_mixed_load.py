@@ -0,0 +1,78 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+# Add the parent directory to the path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def heavy_load(client, stop, season_range, durations):
+    """Uncached clustering requests back to back: a new seed each time, so nothing is served from cache."""
+    seed = 1000
+    while not stop.is_set():
+        seed += 1
+        start = time.perf_counter()
+        response = await client.get(f"/players/clusters?seasons={season_range}&seed={seed}")
+        durations.append((time.perf_counter() - start) * 1000)
+        if response.status_code not in (200, 503):
+            raise RuntimeError(f"clusters returned {response.status_code}: {response.text}")
+
+
+async def cheap_load(client, path, requests, interval, latencies):
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = await client.get(path)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f"{path} returned {response.status_code}")
+        await asyncio.sleep(interval)
+
+
+async def run(heavy_clients, requests, interval, season_range, path):
+    import httpx
+    with contextlib.redirect_stdout(io.StringIO()):
+        from app.main import app
+        from app.dependencies import executor_stats, get_data_store
+        get_data_store().load()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        stop = asyncio.Event()
+        heavy_times, latencies = [], []
+        with contextlib.redirect_stdout(io.StringIO()):
+            heavy = [asyncio.create_task(heavy_load(client, stop, season_range, heavy_times))
+                     for _ in range(heavy_clients)]
+            await cheap_load(client, path, requests, interval, latencies)
+            stop.set()
+            await asyncio.gather(*heavy)
+
+    print(f"{path} with {heavy_clients} concurrent clustering clients ({len(heavy_times)} clustering runs, "
+          f"median {statistics.median(heavy_times):.0f}ms):" if heavy_times else f"{path} alone:")
+    print(f"  p50 {percentile(latencies, 0.5):.1f}ms  p90 {percentile(latencies, 0.9):.1f}ms  "
+          f"p99 {percentile(latencies, 0.99):.1f}ms  max {max(latencies):.1f}ms")
+    for name, stats in executor_stats().items():
+        print(f"  {name}: completed {stats['completed']}, peak queued {stats['peak_queued']}, "
+              f"rejected {stats['rejected']}, avg wait {stats['avg_wait_ms']:.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Latency of a cheap endpoint while uncached clustering runs on the same event loop")
+    parser.add_argument("--heavy-clients", type=int, default=2, help="Concurrent clustering request loops")
+    parser.add_argument("--requests", type=int, default=200, help="Cheap requests to time")
+    parser.add_argument("--interval", type=float, default=0.01, help="Seconds between cheap requests")
+    parser.add_argument("--seasons", default="2015_16-2023_24", help="Season range each clustering run covers")
+    parser.add_argument("--path", default="/players/seasons", help="Cheap endpoint to time")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.heavy_clients, args.requests, args.interval, args.seasons, args.path))
@@ -0,0 +1,76 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add the parent directory to the path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.repositories.file_player_repository import FilePlayerRepository
+from app.models.dataset import PlayerDataset
+from app.services.kdtree import KDTree
+from app.services.nearest_neighbors import SimilarityIndex
+
+
+def load_stats(data_dir):
+    with contextlib.redirect_stdout(io.StringIO()):
+        dataset = PlayerDataset(FilePlayerRepository(data_dir).get_all_players())
+        dataset.normalize_data()
+    return dataset.stats[dataset.valid_rows]
+
+
+def synthetic_stats(base, size, rng):
+    """Resample real vectors with a little noise so the data keeps its shape."""
+    rows = base[rng.integers(0, base.shape[0], size)]
+    noise = rng.normal(0, 0.02, rows.shape).astype(np.float32)
+    return np.clip(rows + noise, 0, 1)
+
+
+def time_queries(fn, queries):
+    start = time.perf_counter()
+    results = [fn(q) for q in queries]
+    return (time.perf_counter() - start) / len(queries) * 1000, results
+
+
+def benchmark(data_dir, sizes, k, num_queries, leaf_size, seed):
+    rng = np.random.default_rng(seed)
+    base = load_stats(data_dir)
+    print(f"Real dataset: {base.shape[0]} player-seasons x {base.shape[1]} stats")
+    print(f"k={k}, {num_queries} queries per size, leaf_size={leaf_size}\n")
+    print(f"{'rows':>10} {'build ms':>10} {'brute ms':>10} {'kd-tree ms':>11} {'speedup':>8}  exact")
+
+    for size in sizes:
+        stats = base if size == 0 else synthetic_stats(base, size, rng)
+        season_ids = np.zeros(stats.shape[0], dtype=np.int16)
+        index = SimilarityIndex(stats, season_ids, {"all": slice(0, stats.shape[0])}, min_tree_size=np.inf)
+
+        start = time.perf_counter()
+        tree = KDTree(stats, season_ids, leaf_size)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        queries = stats[rng.integers(0, stats.shape[0], num_queries)]
+        brute_ms, brute_results = time_queries(lambda q: index.brute_force(q, k), queries)
+        tree_ms, tree_results = time_queries(lambda q: tree.query(q, k), queries)
+
+        exact = all(np.allclose(b[1], t[1], atol=1e-5) for b, t in zip(brute_results, tree_results))
+        print(f"{stats.shape[0]:>10} {build_ms:>10.1f} {brute_ms:>10.3f} {tree_ms:>11.3f} "
+              f"{brute_ms / tree_ms:>7.2f}x  {'yes' if exact else 'NO'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Brute force vs KD-tree similarity search crossover")
+    parser.add_argument("--data-dir", default=os.path.join(os.path.dirname(__file__), "..", "data"))
+    parser.add_argument("--sizes", default="0,50000,100000,200000,400000,800000",
+                        help="Comma separated row counts; 0 means the real dataset")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--leaf-size", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    benchmark(args.data_dir, [int(s) for s in args.sizes.split(",")], args.k,
+              args.queries, args.leaf_size, args.seed)
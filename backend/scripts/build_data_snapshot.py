@@ -0,0 +1,54 @@
+import argparse
+import os
+import sys
+import time
+
+# Add the parent directory to the path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.repositories.csv_ingest import file_signature, season_files
+from app.repositories.file_player_repository import FilePlayerRepository
+from app.repositories import player_snapshot
+
+
+def build_data_snapshot(data_dir, output_path, table_name=None):
+    """Parse the season CSVs (or read a DynamoDB table) and write them as a memory-mappable snapshot"""
+    start = time.perf_counter()
+    sources = None
+    if table_name:
+        from app.repositories.dynamodb_player_repository import DynamoDBPlayerRepository
+        repository = DynamoDBPlayerRepository(table_name)
+        players = repository.get_all_players()
+        source_hash = f"dynamodb:{table_name}:v{repository.get_data_version()}"
+    else:
+        # Recorded so the server can trust the snapshot from a stat instead of hashing the CSVs
+        sources = {os.path.basename(path): file_signature(path) for _, path in season_files(data_dir)}
+        players = FilePlayerRepository(data_dir).get_all_players()
+        source_hash = player_snapshot.source_fingerprint(
+            data_dir, {file: file_hash for file, (_, _, file_hash) in sources.items()})
+    parse_time = time.perf_counter() - start
+
+    player_snapshot.write_snapshot(output_path, players, source_hash, sources)
+
+    start = time.perf_counter()
+    player_snapshot.read_snapshot(output_path, source_hash)
+    load_time = time.perf_counter() - start
+
+    print(f"\n=== Data snapshot built ===")
+    print(f"Players: {len(players)}")
+    print(f"Source hash: {source_hash}")
+    print(f"{'DynamoDB read' if table_name else 'CSV parse'} time: {parse_time:.2f}s")
+    print(f"Snapshot load time: {load_time:.2f}s")
+    print(f"Written to {output_path} ({os.path.getsize(output_path) / 1024:.0f} KiB)")
+    print(f"===========================")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the binary player stats snapshot")
+    parser.add_argument("--data-dir", default="./data")
+    parser.add_argument("--output", default="./data.snapshot")
+    parser.add_argument("--from-dynamodb", metavar="TABLE", default=None,
+                        help="Read the players from this DynamoDB table instead of the CSVs")
+    args = parser.parse_args()
+
+    build_data_snapshot(args.data_dir, args.output, args.from_dynamodb)
@@ -0,0 +1,40 @@
+import argparse
+import os
+import sys
+import time
+
+# Add the parent directory to the path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.repositories.file_player_repository import FilePlayerRepository
+from app.services.player_data_store import PlayerDataStore
+from app.services.neighbor_table import NeighborTable
+
+
+def build_neighbor_table(data_dir, output_path, k):
+    """Precompute the top-k similar players for every player-season in data_dir"""
+    dataset = PlayerDataStore(FilePlayerRepository(data_dir)).load()
+
+    start = time.perf_counter()
+    table = NeighborTable.build(dataset, k)
+    elapsed = time.perf_counter() - start
+
+    table.save(output_path)
+
+    print(f"\n=== Neighbor table built ===")
+    print(f"Players: {table.rows}")
+    print(f"Neighbors per player: {table.k}")
+    print(f"Build time: {elapsed:.2f}s")
+    print(f"Fingerprint: {table.fingerprint}")
+    print(f"Written to {output_path} ({os.path.getsize(output_path) / 1024:.0f} KiB)")
+    print(f"============================")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the precomputed similar-players table")
+    parser.add_argument("--data-dir", default="./data")
+    parser.add_argument("--output", default="./neighbors.bin")
+    parser.add_argument("--k", type=int, default=20, help="Neighbors stored per player-season")
+    args = parser.parse_args()
+
+    build_neighbor_table(args.data_dir, args.output, args.k)
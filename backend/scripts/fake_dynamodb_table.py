@@ -0,0 +1,236 @@
+import hashlib
+import random
+import threading
+import time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.exceptions import ClientError
+
+
+class FakeDynamoDBClient:
+    """In-memory stand-in for the low-level DynamoDB client, for one table.
+
+    Supports the calls DynamoDBPlayerRepository makes: paginated `scan` (with
+    Segment/TotalSegments, ProjectionExpression, ExpressionAttributeNames,
+    a `#name <> :value` FilterExpression and Select='COUNT'), `query` on the hash key, `get_item`, `put_item` (with an
+    optional `attribute_not_exists(...)` or `#name = :value` ConditionExpression)
+    and `batch_write_item`.
+    Items are kept in the low-level wire format, with numbers normalized
+    the way DynamoDB stores them ("1.50" reads back as "1.5"). Every request sleeps for
+    `latency` seconds and a page holds at most `page_size` items, standing in
+    for the network round trip and the 1 MB page limit. Segments split the
+    hash space of the partition key, the way DynamoDB spreads items over
+    partitions, so with few seasons they are not perfectly even.
+    """
+
+    def __init__(self, hash_key: str = 'Season', range_key: Optional[str] = 'Player',
+                 page_size: int = 500, latency: float = 0.0, unprocessed_rate: float = 0.0, seed: int = 0):
+        self.hash_key = hash_key
+        self.range_key = range_key
+        self.page_size = page_size
+        self.latency = latency
+        # Share of batch write requests handed back as UnprocessedItems, like throttling
+        self.unprocessed_rate = unprocessed_rate
+        self._random = random.Random(seed)
+        self.requests = 0
+        self._items: Dict[tuple, Dict[str, Dict[str, Any]]] = {}
+        self._order: Optional[List[Tuple[int, tuple]]] = None
+        self._segments: Dict[int, List[List[tuple]]] = {}
+        self._lock = threading.Lock()
+        self._serializer = TypeSerializer()
+        self._deserializer = TypeDeserializer()
+
+    def load_items(self, items: List[Dict[str, Any]]) -> int:
+        """Store plain python items, converting numbers the way the migration does.
+
+        Items missing a key attribute are skipped, as DynamoDB would reject
+        them. Returns the number of items stored.
+        """
+        stored = 0
+        for item in items:
+            if item.get(self.hash_key) in (None, '') or (self.range_key and item.get(self.range_key) in (None, '')):
+                continue
+            self._store({key: self._serializer.serialize(self._to_dynamo(value)) for key, value in item.items()})
+            stored += 1
+        return stored
+
+    def scan(self, TableName: str, Segment: int = 0, TotalSegments: int = 1,
+             ExclusiveStartKey: Optional[Dict[str, Any]] = None, Limit: Optional[int] = None,
+             ProjectionExpression: Optional[str] = None, Select: Optional[str] = None,
+             ExpressionAttributeNames: Optional[Dict[str, str]] = None, FilterExpression: Optional[str] = None,
+             ExpressionAttributeValues: Optional[Dict[str, Dict[str, Any]]] = None, **kwargs) -> Dict[str, Any]:
+        self._request()
+        keys = self._segment_keys(Segment, TotalSegments)
+        start = 0 if ExclusiveStartKey is None else keys.index(self._key(ExclusiveStartKey)) + 1
+        return self._page(keys, start, Limit, ProjectionExpression, ExpressionAttributeNames, Select,
+                          FilterExpression, ExpressionAttributeValues)
+
+    def query(self, TableName: str, KeyConditionExpression: str,
+              ExpressionAttributeValues: Dict[str, Dict[str, Any]],
+              ExpressionAttributeNames: Optional[Dict[str, str]] = None,
+              ExclusiveStartKey: Optional[Dict[str, Any]] = None, Limit: Optional[int] = None,
+              ProjectionExpression: Optional[str] = None, Select: Optional[str] = None,
+              **kwargs) -> Dict[str, Any]:
+        # Only equality on the hash key ("#name = :value") is supported
+        self._request()
+        (value,) = ExpressionAttributeValues.values()
+        hash_value = self._scalar(value)
+        with self._lock:
+            keys = sorted(key for key in self._items if key[0] == hash_value)
+        start = 0 if ExclusiveStartKey is None else keys.index(self._key(ExclusiveStartKey)) + 1
+        return self._page(keys, start, Limit, ProjectionExpression, ExpressionAttributeNames, Select)
+
+    def get_item(self, TableName: str, Key: Dict[str, Dict[str, Any]], **kwargs) -> Dict[str, Any]:
+        self._request()
+        with self._lock:
+            item = self._items.get(self._key(Key))
+        return {'Item': dict(item)} if item is not None else {}
+
+    def put_item(self, TableName: str, Item: Dict[str, Dict[str, Any]], ConditionExpression: Optional[str] = None,
+                 ExpressionAttributeNames: Optional[Dict[str, str]] = None,
+                 ExpressionAttributeValues: Optional[Dict[str, Dict[str, Any]]] = None, **kwargs) -> Dict[str, Any]:
+        self._request()
+        with self._lock:
+            if ConditionExpression is not None and not self._condition_holds(
+                    self._items.get(self._key(Item)), ConditionExpression,
+                    ExpressionAttributeNames or {}, ExpressionAttributeValues or {}):
+                raise ClientError({'Error': {'Code': 'ConditionalCheckFailedException',
+                                             'Message': 'The conditional request failed'}}, 'PutItem')
+            self._items[self._key(Item)] = self._normalize(Item)
+            self._order = None
+        return {}
+
+    def _condition_holds(self, item: Optional[Dict[str, Dict[str, Any]]], condition: str,
+                         names: Dict[str, str], values: Dict[str, Dict[str, Any]]) -> bool:
+        condition = condition.strip()
+        if condition.startswith('attribute_not_exists(') and condition.endswith(')'):
+            name = condition[len('attribute_not_exists('):-1].strip()
+            return item is None or names.get(name, name) not in item
+        operator = '<>' if '<>' in condition else '='
+        name, value = (part.strip() for part in condition.split(operator))
+        stored = (item or {}).get(names.get(name, name))
+        # Compared as values, as DynamoDB does: {'N': '3'} equals {'N': '3.0'}
+        if stored is None:
+            return False
+        equal = self._deserializer.deserialize(stored) == self._deserializer.deserialize(values[value])
+        return equal if operator == '=' else not equal
+
+    def batch_write_item(self, RequestItems: Dict[str, List[Dict[str, Any]]], **kwargs) -> Dict[str, Any]:
+        self._request()
+        unprocessed: Dict[str, List[Dict[str, Any]]] = {}
+        for table_name, requests in RequestItems.items():
+            for request in requests:
+                with self._lock:
+                    throttled = self._random.random() < self.unprocessed_rate
+                if throttled:
+                    unprocessed.setdefault(table_name, []).append(request)
+                elif 'PutRequest' in request:
+                    self._store(request['PutRequest']['Item'])
+                elif 'DeleteRequest' in request:
+                    with self._lock:
+                        self._items.pop(self._key(request['DeleteRequest']['Key']), None)
+                        self._order = None
+        return {'UnprocessedItems': unprocessed}
+
+    def _store(self, item: Dict[str, Dict[str, Any]]) -> None:
+        item = self._normalize(item)
+        with self._lock:
+            self._items[self._key(item)] = item
+            self._order = None
+
+    @classmethod
+    def _normalize(cls, item: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        return {name: cls._normalize_attribute(attribute) for name, attribute in item.items()}
+
+    @classmethod
+    def _normalize_attribute(cls, attribute: Dict[str, Any]) -> Dict[str, Any]:
+        """DynamoDB keeps numbers without redundant zeros or exponents: "0.0" -> "0", "1.50" -> "1.5"."""
+        (kind, value), = attribute.items()
+        if kind == 'N':
+            return {'N': cls._normalize_number(value)}
+        if kind == 'NS':
+            return {'NS': [cls._normalize_number(number) for number in value]}
+        if kind == 'M':
+            return {'M': cls._normalize(value)}
+        if kind == 'L':
+            return {'L': [cls._normalize_attribute(element) for element in value]}
+        return attribute
+
+    @staticmethod
+    def _normalize_number(value: str) -> str:
+        number = Decimal(value)
+        return '0' if number == 0 else format(number.normalize(), 'f')
+
+    def _page(self, keys: List[tuple], start: int, limit: Optional[int], projection: Optional[str],
+              names: Optional[Dict[str, str]], select: Optional[str] = None, filter_expression: Optional[str] = None,
+              values: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        page_size = min(limit or self.page_size, self.page_size)
+        page = keys[start:start + page_size]
+        attributes = None
+        if projection:
+            attributes = [(names or {}).get(name.strip(), name.strip()) for name in projection.split(',')]
+
+        # Copied under the lock: writers may be changing the table while a scan pages through it
+        with self._lock:
+            stored = [self._items[key] for key in page if key in self._items]
+        # Like DynamoDB, the filter runs after the page is read: it trims the response, not the read
+        matched = stored if filter_expression is None else [
+            item for item in stored if self._condition_holds(item, filter_expression, names or {}, values or {})
+        ]
+        items = []
+        for item in matched:
+            if attributes is not None:
+                item = {name: item[name] for name in attributes if name in item}
+            items.append(dict(item))
+
+        response = {'Count': len(matched), 'ScannedCount': len(page)}
+        if select != 'COUNT':
+            response['Items'] = items
+        if start + page_size < len(keys) and stored:
+            response['LastEvaluatedKey'] = {
+                name: value for name, value in stored[-1].items()
+                if name in (self.hash_key, self.range_key)
+            }
+        return response
+
+    def _segment_keys(self, segment: int, total_segments: int) -> List[tuple]:
+        """Keys whose hash-key hash falls in `segment` of `total_segments`, in table order."""
+        with self._lock:
+            if self._order is None:
+                self._order = sorted(
+                    (int.from_bytes(hashlib.md5(str(key[0]).encode()).digest(), 'big'), key)
+                    for key in self._items
+                )
+                self._segments = {}
+            if total_segments not in self._segments:
+                segments = [[] for _ in range(total_segments)]
+                for position, key in self._order:
+                    segments[position * total_segments >> 128].append(key)
+                self._segments[total_segments] = segments
+            return self._segments[total_segments][segment]
+
+    def _key(self, item: Dict[str, Dict[str, Any]]) -> tuple:
+        hash_value = self._scalar(item[self.hash_key])
+        if self.range_key is None:
+            return (hash_value,)
+        return hash_value, self._scalar(item[self.range_key])
+
+    @staticmethod
+    def _scalar(attribute: Dict[str, Any]) -> Any:
+        (value,) = attribute.values()
+        return value
+
+    def _request(self) -> None:
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    @staticmethod
+    def _to_dynamo(value: Any) -> Any:
+        if isinstance(value, float):
+            return None if value != value else Decimal(str(value))
+        if isinstance(value, int) and not isinstance(value, bool):
+            return Decimal(value)
+        return value
@@ -1,40 +1,48 @@
 import csv
 import os
+import sys
 import math
 import argparse
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.repositories.csv_ingest import ingest_season_files
+
 DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data_college')
 STATS = ['PTS', 'TRB', 'AST', 'STL', 'BLK', 'TOV', 'MP', 'FG', 'FGA', 'FT', 'FTA', 'ORB', 'DRB', 'FG3', 'FG3A', 'FG2', 'FG2A']
 COL_RENAMES = {'3P': 'FG3', '3PA': 'FG3A', '2P': 'FG2', '2PA': 'FG2A'}
 
 
-def load_players():
+def parse_college_csv(path, season):
     players = []
-    for fname in sorted(os.listdir(DATA_DIR)):
-        if not fname.endswith('.csv'):
-            continue
-        season = fname.replace('.csv', '')
-        with open(os.path.join(DATA_DIR, fname)) as f:
-            for row in csv.DictReader(f):
-                for old, new in COL_RENAMES.items():
-                    if old in row:
-                        row[new] = row.pop(old)
-                g = int(row.get('G', 0) or 0)
-                if g < 10:
-                    continue
-                p = {'Player': row['Player'], 'Season': season, 'Team': row.get('Team', ''), 'G': g}
-                for s in STATS:
-                    try:
-                        p[s] = float(row.get(s, 0) or 0)
-                    except ValueError:
-                        p[s] = 0.0
+    with open(path) as f:
+        for row in csv.DictReader(f):
+            for old, new in COL_RENAMES.items():
+                if old in row:
+                    row[new] = row.pop(old)
+            g = int(row.get('G', 0) or 0)
+            if g < 10:
+                continue
+            p = {'Player': row['Player'], 'Season': season, 'Team': row.get('Team', ''), 'G': g}
+            for s in STATS:
                 try:
-                    p['FG%'] = float(row.get('FG%', 0) or 0)
-                    p['FT%'] = float(row.get('FT%', 0) or 0)
+                    p[s] = float(row.get(s, 0) or 0)
                 except ValueError:
-                    p['FG%'] = 0.0
-                    p['FT%'] = 0.0
-                players.append(p)
+                    p[s] = 0.0
+            try:
+                p['FG%'] = float(row.get('FG%', 0) or 0)
+                p['FT%'] = float(row.get('FT%', 0) or 0)
+            except ValueError:
+                p['FG%'] = 0.0
+                p['FT%'] = 0.0
+            players.append(p)
+    return players
+
+
+def load_players(workers=None):
+    players = []
+    for season, rows in ingest_season_files(DATA_DIR, parse_college_csv, workers):
+        players.extend(rows)
     return players
 
 
@@ -90,8 +98,9 @@ if __name__ == '__main__':
     parser.add_argument('--player', default='Aday Mara', help='Nombre del jugador')
     parser.add_argument('--season', default='2025_26', help='Temporada (formato YYYY_YY)')
     parser.add_argument('--top', type=int, default=20, help='Numero de resultados')
+    parser.add_argument('--workers', type=int, default=None, help='Procesos para leer los CSV (por defecto, todos los nucleos)')
     args = parser.parse_args()
 
-    players = load_players()
+    players = load_players(args.workers)
     print(f"Cargados {len(players)} jugadores")
     find_similar(players, args.player, args.season, args.top)
@@ -1,18 +1,34 @@
-import boto3
-import pandas as pd
+import argparse
+import json
 import os
+import random
 import sys
-from decimal import Decimal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import boto3
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.exceptions import ClientError
 
 # Add the parent directory to the path so we can import from app
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.repositories.file_player_repository import FilePlayerRepository
+from app.repositories.dynamodb_player_repository import DynamoDBPlayerRepository
+from app.repositories.csv_ingest import file_signature, season_files
+
+REGION = 'eu-west-1'
+# BatchWriteItem accepts at most 25 put/delete requests
+BATCH_SIZE = 25
+MAX_ATTEMPTS = 8
+RETRYABLE_ERRORS = {'ProvisionedThroughputExceededException', 'ThrottlingException',
+                    'RequestLimitExceeded', 'InternalServerError'}
 
 
 def create_dynamodb_table(table_name):
     """Create the DynamoDB table if it doesn't exist"""
-    dynamodb = boto3.resource('dynamodb', region_name='eu-west-1')
+    dynamodb = boto3.resource('dynamodb', region_name=REGION)
 
     existing_tables = [table.name for table in dynamodb.tables.all()]
     if table_name in existing_tables:
@@ -49,69 +65,306 @@ def create_dynamodb_table(table_name):
     return table
 
 
-def migrate_data_to_dynamodb(data_dir, table_name, seasons=None):
-    """Migrate data from CSV files to DynamoDB"""
-    create_dynamodb_table(table_name)
+def to_dynamodb_item(player):
+    """Low-level attribute map for a player row; NaN and None become NULL."""
+    item = {}
+    for key, value in player.items():
+        if value is None or (isinstance(value, float) and value != value):
+            item[key] = {'NULL': True}
+        elif isinstance(value, bool):
+            item[key] = {'BOOL': value}
+        elif isinstance(value, (int, float)):
+            item[key] = {'N': str(value)}
+        else:
+            item[key] = {'S': str(value)}
+    return item
 
-    dynamodb = boto3.resource('dynamodb', region_name='eu-west-1')
-    table = dynamodb.Table(table_name)
 
-    file_repo = FilePlayerRepository(data_dir)
-    players_data = file_repo.get_all_players()
+def plain_item(item):
+    """Python values of a low-level attribute map, numbers as Decimal.
 
-    items_processed = 0
-    items_failed = 0
-    seasons_to_migrate = seasons if seasons else ['2024_25', '2025_26']
+    DynamoDB normalizes the numbers it stores ("1.50" reads back as "1.5"),
+    so items are compared by value, not by their wire strings.
+    """
+    deserializer = TypeDeserializer()
+    return {key: deserializer.deserialize(value) for key, value in item.items()}
 
-    print(f"Migrating seasons: {seasons_to_migrate}")
-    print(f"Total players loaded from CSV: {len(players_data)}")
 
-    season_counts = {}
-    for season in seasons_to_migrate:
-        season_counts[season] = 0
+def season_items(players):
+    """Items per season, one per (Season, Player) key; later rows win, as with put_item."""
+    seasons = {}
+    for player in players:
+        if not player.get('Season') or not player.get('Player'):
+            continue
+        seasons.setdefault(player['Season'], {})[player['Player']] = to_dynamodb_item(player)
+    return seasons
+
+
+class Checkpoint:
+    """Seasons already migrated to a table, keyed by the hash of their CSV file."""
+
+    def __init__(self, path, table_name):
+        self.path = path
+        self.table_name = table_name
+        self._lock = threading.Lock()
+        self.completed = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            if state.get('table') == table_name:
+                self.completed = state.get('completed', {})
+
+    def is_done(self, season, source_hash):
+        return self.completed.get(season, {}).get('source_hash') == source_hash
 
-    for player in players_data:
-        try:
-            item = player.copy()
-            season = item.get('Season')
+    def mark_done(self, season, source_hash, items):
+        with self._lock:
+            self.completed[season] = {'source_hash': source_hash, 'items': items}
+            if not self.path:
+                return
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'table': self.table_name, 'completed': self.completed}, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
 
-            if season not in seasons_to_migrate:
+
+class BatchWriter:
+    """Sends BatchWriteItem requests, retrying unprocessed items with jittered exponential backoff."""
+
+    def __init__(self, client, table_name):
+        self.client = client
+        self.table_name = table_name
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def write(self, requests):
+        pending = requests
+        for attempt in range(MAX_ATTEMPTS):
+            if attempt:
+                with self._lock:
+                    self.retries += 1
+                time.sleep(min(5.0, 0.05 * 2 ** attempt) * random.uniform(0.5, 1.0))
+            try:
+                response = self.client.batch_write_item(RequestItems={self.table_name: pending})
+            except ClientError as e:
+                if e.response.get('Error', {}).get('Code') not in RETRYABLE_ERRORS:
+                    raise
                 continue
+            pending = response.get('UnprocessedItems', {}).get(self.table_name, [])
+            if not pending:
+                return
+        raise RuntimeError(f"{len(pending)} items still unprocessed after {MAX_ATTEMPTS} attempts")
+
+
+def existing_players(client, table_name, season):
+    """Range keys currently stored for a season."""
+    request = {
+        'TableName': table_name,
+        'KeyConditionExpression': '#season = :season',
+        'ProjectionExpression': '#player',
+        'ExpressionAttributeNames': {'#season': 'Season', '#player': 'Player'},
+        'ExpressionAttributeValues': {':season': {'S': season}},
+    }
+    players = set()
+    while True:
+        response = client.query(**request)
+        players.update(item['Player']['S'] for item in response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            return players
+        request['ExclusiveStartKey'] = response['LastEvaluatedKey']
 
-            for key, value in list(item.items()):
-                if pd.isna(value):
-                    item[key] = None
-                elif isinstance(value, (int, float)):
-                    item[key] = Decimal(str(value))
 
-            table.put_item(Item=item)
-            items_processed += 1
-            season_counts[season] += 1
+def migrate_data_to_dynamodb(data_dir, table_name, seasons=None, workers=16, checkpoint_path=None, client=None,
+                             packed=False):
+    """Migrate data from CSV files to DynamoDB.
 
-            if items_processed % 100 == 0:
-                print(f"Processed {items_processed} items...")
+    Every season's rows are written with BatchWriteItem from a pool of
+    `workers` threads; rows that are no longer in the CSV are deleted. A
+    season is recorded in the checkpoint file once all its batches are in,
+    so a rerun skips it unless its CSV changed. With `packed`, every season
+    migrated also gets its packed item rewritten for the new catalog version.
+    Ends with a consistency report.
+    """
+    if client is None:
+        create_dynamodb_table(table_name)
+        client = boto3.client('dynamodb', region_name=REGION)
 
-        except Exception as e:
-            print(f"Error processing player {player.get('Player', 'Unknown')} ({player.get('Season', 'Unknown')}): {e}")
-            items_failed += 1
+    start = time.perf_counter()
+    files = dict(season_files(data_dir))
+    seasons_to_migrate = sorted(files) if seasons in (None, ['all']) else seasons
+    players_by_season = season_items(FilePlayerRepository(data_dir).get_all_players())
+    load_time = time.perf_counter() - start
+
+    checkpoint = Checkpoint(checkpoint_path, table_name)
+    writer = BatchWriter(client, table_name)
+    skipped, pending, failed, work = [], {}, {}, []
+    items_written = 0
+
+    print(f"Migrating seasons: {seasons_to_migrate}")
+    to_write = {}
+    for season in seasons_to_migrate:
+        if season not in files:
+            failed[season] = "no CSV file for this season"
+            continue
+        source_hash = file_signature(files[season])[2]
+        if checkpoint.is_done(season, source_hash):
+            skipped.append(season)
+        else:
+            to_write[season] = source_hash
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        stored = dict(zip(to_write, executor.map(
+            lambda season: existing_players(client, table_name, season), to_write
+        )))
+
+    for season, source_hash in to_write.items():
+        items = players_by_season.get(season, {})
+        stale = stored[season] - set(items)
+        requests = [{'PutRequest': {'Item': item}} for item in items.values()]
+        requests += [
+            {'DeleteRequest': {'Key': {'Season': {'S': season}, 'Player': {'S': player}}}}
+            for player in sorted(stale)
+        ]
+        batches = [requests[i:i + BATCH_SIZE] for i in range(0, len(requests), BATCH_SIZE)]
+        pending[season] = {'source_hash': source_hash, 'items': len(items), 'batches': len(batches)}
+        work.extend((season, batch) for batch in batches)
+
+    if skipped:
+        print(f"Skipping seasons already in the checkpoint: {skipped}")
+
+    def season_done(season):
+        state = pending[season]
+        checkpoint.mark_done(season, state['source_hash'], state['items'])
+        print(f"  {season}: {state['items']} players written")
+        return state['items']
+
+    for season, state in pending.items():
+        if state['batches'] == 0:
+            items_written += season_done(season)
+
+    write_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(writer.write, batch): season for season, batch in work}
+        for future in as_completed(futures):
+            season = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                failed.setdefault(season, str(e))
+                continue
+            pending[season]['batches'] -= 1
+            if pending[season]['batches'] == 0 and season not in failed:
+                items_written += season_done(season)
+    write_time = time.perf_counter() - write_start
+
+    migrated = [season for season in pending if season not in failed]
+    # Recount the migrated seasons so the API can list seasons with one key lookup
+    repository = DynamoDBPlayerRepository(table_name, client=client)
+    if migrated:
+        repository.update_season_catalog(migrated)
+    packed_seasons = []
+    if packed and migrated:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            written = list(executor.map(repository.write_packed_season, migrated))
+        packed_seasons = [season for season, ok in zip(migrated, written) if ok]
 
     print(f"\n=== Migration completed ===")
-    print(f"Total processed: {items_processed}")
-    print(f"Total failed: {items_failed}")
-    for season, count in season_counts.items():
-        print(f"  {season}: {count} players")
+    print(f"CSV load time: {load_time:.2f}s")
+    print(f"Write time: {write_time:.2f}s with {workers} workers "
+          f"({items_written / write_time if write_time > 0 else 0:.0f} items/s, {writer.retries} retried batches)")
+    print(f"Migrated: {len(migrated)} seasons, skipped: {len(skipped)}, failed: {len(failed)}")
+    if packed:
+        print(f"Packed: {len(packed_seasons)}/{len(migrated)} migrated seasons")
+    for season, error in sorted(failed.items()):
+        print(f"  {season} failed: {error}")
     print(f"==========================")
 
+    verify_migration(repository, players_by_season, [s for s in seasons_to_migrate if s not in failed], workers,
+                     repair=True)
+    return not failed
+
+
+def verify_migration(repository, players_by_season, seasons, workers=16, repair=False):
+    """Compare the table's per-season row counts, season catalog and a sample row with the CSV data.
+
+    Read-only unless `repair`: a missing or stale season catalog is then
+    reported and written back, so the API can list seasons without scanning.
+    Otherwise it counts as an inconsistency.
+    """
+    catalog = repository.get_season_catalog()
+    catalog_missing = catalog is None
+    if catalog_missing and repair:
+        catalog = repository.repair_season_catalog()
+
+    def check_season(season):
+        expected = players_by_season.get(season, {})
+        stored = repository.count_season_rows(season)
+        line = f"Season {season}: {stored} players in table, {len(expected)} in CSV"
+        consistent = stored == len(expected)
+        catalog_count = catalog['seasons'].get(season, {}).get('count', 0) if catalog else None
+        stale = catalog is not None and catalog_count != stored
+        if stale:
+            line += f", catalog lists {catalog_count}" + (" (recounted)" if repair else "")
+            consistent = consistent and repair
+        if expected:
+            player, item = next(iter(expected.items()))
+            response = repository.client.get_item(
+                TableName=repository.table_name,
+                Key={'Season': {'S': season}, 'Player': {'S': player}}
+            )
+            stored_item = response.get('Item')
+            if stored_item is None or plain_item(stored_item) != plain_item(item):
+                consistent = False
+                line += f", sample {player} differs"
+        return consistent, stale, f"{line} [{'ok' if consistent else 'MISMATCH'}]"
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(check_season, seasons))
+
+    stale_seasons = [season for season, (_, stale, _) in zip(seasons, results) if stale]
+    if stale_seasons and repair:
+        repository.update_season_catalog(stale_seasons)
+
+    print(f"\n=== DynamoDB Verification ===")
+    print(f"Table: {repository.table_name}")
+    mismatches = 0
+    for consistent, _, line in results:
+        mismatches += not consistent
+        print(line)
+
+    print(f"{len(seasons) - mismatches}/{len(seasons)} seasons consistent")
+    if catalog_missing:
+        print(f"Season catalog: missing{', rebuilt' if repair else ' [MISMATCH]'}")
+    print("=============================\n")
+    return mismatches == 0 and (repair or not catalog_missing)
+
 
 if __name__ == "__main__":
-    data_dir = sys.argv[1] if len(sys.argv) > 1 else "./data"
-    table_name = sys.argv[2] if len(sys.argv) > 2 else "nba-player-stats-dev"
-    seasons = sys.argv[3].split(',') if len(sys.argv) > 3 else ['2024_25', '2025_26']
+    parser = argparse.ArgumentParser(description="Migrate player CSVs to DynamoDB")
+    parser.add_argument("data_dir", nargs="?", default="./data")
+    parser.add_argument("table_name", nargs="?", default="nba-player-stats-dev")
+    parser.add_argument("seasons", nargs="?", default="2024_25,2025_26",
+                        help="Comma separated seasons, or 'all'")
+    parser.add_argument("--workers", type=int, default=16, help="Concurrent BatchWriteItem requests")
+    parser.add_argument("--checkpoint", default=None,
+                        help="Checkpoint file (default: .migration-<table>.json)")
+    parser.add_argument("--fresh", action="store_true", help="Ignore the checkpoint and migrate every season")
+    parser.add_argument("--packed", action="store_true",
+                        help="Also store each migrated season as one packed item (DYNAMODB_PACKED_SEASONS)")
+    args = parser.parse_args()
+
+    seasons = args.seasons.split(',')
+    checkpoint_path = args.checkpoint or f".migration-{args.table_name}.json"
+    if args.fresh and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
 
     print(f"=== DynamoDB Migration ===")
-    print(f"Data directory: {data_dir}")
-    print(f"Table name: {table_name}")
+    print(f"Data directory: {args.data_dir}")
+    print(f"Table name: {args.table_name}")
     print(f"Seasons: {seasons}")
+    print(f"Checkpoint: {checkpoint_path}")
     print(f"==========================\n")
 
-    migrate_data_to_dynamodb(data_dir, table_name, seasons)
+    ok = migrate_data_to_dynamodb(args.data_dir, args.table_name, seasons, args.workers, checkpoint_path,
+                                  packed=args.packed)
+    sys.exit(0 if ok else 1)
@@ -1,46 +1,40 @@
+import argparse
 import boto3
+import contextlib
+import io
+import os
 import sys
-from boto3.dynamodb.conditions import Key
 
-def verify_dynamodb_data(table_name, seasons=None):
-    """Verify data in DynamoDB table"""
-    dynamodb = boto3.resource('dynamodb', region_name='eu-west-1')
-    table = dynamodb.Table(table_name)
+# Add the parent directory to the path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-    seasons_to_check = seasons if seasons else ['2024_25', '2025_26']
+from app.repositories.file_player_repository import FilePlayerRepository
+from app.repositories.dynamodb_player_repository import DynamoDBPlayerRepository
+from scripts.migrate_to_dynamodb import REGION, season_items, verify_migration
 
-    print(f"\n=== DynamoDB Verification ===")
-    print(f"Table: {table_name}")
-    print(f"Seasons to verify: {seasons_to_check}\n")
 
-    for season in seasons_to_check:
-        try:
-            response = table.query(
-                KeyConditionExpression=Key('Season').eq(season)
-            )
+def verify_dynamodb_data(table_name, seasons=None, data_dir="./data", repair=False):
+    """Verify data in DynamoDB table against the CSV files (same report as the migration)
 
-            items = response.get('Items', [])
-            count = len(items)
+    Read-only unless `repair`, which writes a missing or stale season catalog back.
+    """
+    client = boto3.client('dynamodb', region_name=REGION)
+    repository = DynamoDBPlayerRepository(table_name, client=client)
 
-            print(f"Season {season}: {count} players")
-
-            if count > 0:
-                sample_player = items[0]
-                print(f"  Sample player: {sample_player.get('Player', 'N/A')}")
-                print(f"  Team: {sample_player.get('Team', 'N/A')}")
-                print(f"  PTS: {sample_player.get('PTS', 'N/A')}")
-            else:
-                print(f"  ⚠️  No players found for season {season}")
-            print()
-
-        except Exception as e:
-            print(f"Error querying season {season}: {e}\n")
-
-    print("=============================\n")
+    with contextlib.redirect_stdout(io.StringIO()):
+        players_by_season = season_items(FilePlayerRepository(data_dir).get_all_players())
+    seasons_to_check = sorted(players_by_season) if seasons in (None, ['all']) else seasons
+    return verify_migration(repository, players_by_season, seasons_to_check, repair=repair)
 
 
 if __name__ == "__main__":
-    table_name = sys.argv[1] if len(sys.argv) > 1 else "nba-player-stats-dev"
-    seasons = sys.argv[2].split(',') if len(sys.argv) > 2 else ['2024_25', '2025_26']
-
-    verify_dynamodb_data(table_name, seasons)
+    parser = argparse.ArgumentParser(description="Check a DynamoDB table against the player CSVs")
+    parser.add_argument("table_name", nargs="?", default="nba-player-stats-dev")
+    parser.add_argument("seasons", nargs="?", default="2024_25,2025_26", help="Comma separated seasons, or 'all'")
+    parser.add_argument("--data-dir", default="./data")
+    parser.add_argument("--repair", action="store_true",
+                        help="Rebuild a missing season catalog and recount stale seasons in it")
+    args = parser.parse_args()
+
+    ok = verify_dynamodb_data(args.table_name, args.seasons.split(','), args.data_dir, args.repair)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,72 @@
+import os
+import random
+import shutil
+
+import pytest
+
+from app.models.dataset import NORMALIZED_STATS
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+SEASONS = ["2021_22", "2022_23", "2023_24"]
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """A temporary data directory holding copies of the SEASONS CSVs."""
+    directory = tmp_path / "data"
+    directory.mkdir()
+    for season in SEASONS:
+        shutil.copy(os.path.join(DATA_DIR, f"{season}.csv"), directory / f"{season}.csv")
+    return str(directory)
+
+
+@pytest.fixture
+def api(data_dir, monkeypatch):
+    """A TestClient for the app reading `data_dir`, with fresh process-wide singletons.
+
+    The lifespan is not run, so the data is loaded lazily as on Lambda.
+    """
+    from fastapi.testclient import TestClient
+    from app import dependencies
+    from app.main import app
+
+    monkeypatch.setenv("DATA_DIR", data_dir)
+    for name in ("DATA_ARTIFACT", "USE_DYNAMODB", "DATA_SNAPSHOT", "LAZY_SEASON_LOADING",
+                 "NEIGHBOR_TABLE_PATH", "DATA_REFRESH_INTERVAL", "ADMIN_TOKEN"):
+        monkeypatch.delenv(name, raising=False)
+    for name in ("_data_store", "_similarity_service", "_clustering_service"):
+        monkeypatch.setattr(dependencies, name, None)
+    monkeypatch.setattr(dependencies, "_executors", {})
+    yield TestClient(app)
+    dependencies.shutdown_executors()
+
+
+def edit_season(data_dir, season):
+    """Raise the first player's points in `season` by ten."""
+    path = os.path.join(data_dir, f"{season}.csv")
+    with open(path, encoding="utf-8") as f:
+        header, first, rest = f.read().split("\n", 2)
+    columns = header.split(",")
+    values = first.split(",")
+    pts = columns.index("PTS")
+    values[pts] = f"{float(values[pts]) + 10:.1f}"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join([header, ",".join(values), rest]))
+
+
+def touch(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+
+
+def make_rows(seasons=("2022_23", "2023_24"), players_per_season=30, seed=0):
+    """Synthetic player rows with random stats, one per player and season."""
+    rng = random.Random(seed)
+    rows = []
+    for season in seasons:
+        for i in range(players_per_season):
+            row = {"Player": f"Player {i}", "Season": season, "Pos": "G", "Age": 20 + i % 15,
+                   "Team": "AAA", "G": 60, "GS": 30, "Player-additional": f"player{i:02d}"}
+            row.update({stat: round(rng.uniform(0, 30), 1) for stat in NORMALIZED_STATS})
+            rows.append(row)
+    return rows
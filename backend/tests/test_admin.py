@@ -0,0 +1,38 @@
+from app import dependencies
+from app.repositories.file_player_repository import FilePlayerRepository
+from app.services.player_data_store import PlayerDataStore
+
+from conftest import edit_season
+
+TOKEN = "s3cret"
+
+
+def test_reload_is_disabled_without_a_token(api):
+    assert api.post("/admin/reload").status_code == 404
+
+
+def test_reload_rejects_a_wrong_token(api, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", TOKEN)
+    assert api.post("/admin/reload").status_code == 401
+    assert api.post("/admin/reload", headers={"Authorization": "Bearer nope"}).status_code == 401
+    assert api.get("/admin/reload").status_code == 405
+
+
+def test_reload_swaps_in_the_new_dataset(api, data_dir, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", TOKEN)
+    before = api.get("/players", params={"season": "2022_23"}).json()
+    store = dependencies.get_data_store()
+    dataset = store.load()
+
+    edit_season(data_dir, "2022_23")
+    response = api.post("/admin/reload", headers={"Authorization": f"Bearer {TOKEN}"})
+    assert response.status_code == 200
+
+    fresh = PlayerDataStore(FilePlayerRepository(data_dir, ingest_workers=1)).load()
+    assert store.dataset is not dataset
+    assert store.dataset.fingerprint == fresh.fingerprint != dataset.fingerprint
+    assert response.json() == {"status": "reloaded", "data_version": fresh.data_version}
+
+    after = api.get("/players", params={"season": "2022_23"}).json()
+    assert after != before
+    assert after == [record for record in fresh.records if record["Season"] == "2022_23"]
@@ -65,6 +65,38 @@ def test_api(player_name="LeBron James", season="2023_24", num_similar=5):
                   f"APG: {player['stats']['assists_per_game']:.1f}")
     else:
         print(f"Error: {response.text}")
+    print("\n" + "-"*50 + "\n")
+
+    # Test the batch similar players endpoint
+    print(f"Testing batch similar players endpoint for {player_name} in {season}...")
+    response = requests.post(
+        f"{base_url}/players/similar/batch",
+        json={"queries": [
+            {"player_name": player_name, "season": season, "num_similar": num_similar},
+            {"player_name": "Unknown Player", "season": season, "num_similar": num_similar}
+        ]}
+    )
+    print(f"Status code: {response.status_code}")
+    if response.status_code == 200:
+        for result in response.json()["results"]:
+            if result["error"]:
+                print(f"{result['player_name']}: error: {result['error']}")
+            else:
+                similar = result["result"]["similar_players"]
+                print(f"{result['player_name']}: {[p['player'] for p in similar]}")
+    else:
+        print(f"Error: {response.text}")
+    print("\n" + "-"*50 + "\n")
+
+    # Test the metrics endpoint
+    print("Testing metrics endpoint...")
+    response = requests.get(f"{base_url}/metrics")
+    print(f"Status code: {response.status_code}")
+    if response.status_code == 200:
+        for name, stats in response.json()["executors"].items():
+            print(f"{name}: {stats['completed']} completed, {stats['queued']} queued, {stats['rejected']} rejected")
+    else:
+        print(f"Error: {response.text}")
 
 if __name__ == "__main__":
     if len(sys.argv) > 1:
@@ -0,0 +1,147 @@
+import asyncio
+import threading
+
+from app.services.clustering import ClusteringService
+from app.services.executors import BoundedExecutor
+from app.services.player_data_store import PlayerDataStore
+
+from conftest import make_rows
+
+SEASON = "2023_24"
+
+
+class StubRepository:
+    """Rows from make_rows(); `block_first_read` holds the first read until `release` is set."""
+
+    def __init__(self, rows, block_first_read=False):
+        self.rows = rows
+        self.version = "v1"
+        self.reads = 0
+        self.first_read_started = threading.Event()
+        self.release = threading.Event()
+        if not block_first_read:
+            self.release.set()
+        self._lock = threading.Lock()
+
+    def get_all_players(self, season=None):
+        with self._lock:
+            self.reads += 1
+            first = self.reads == 1
+        if first:
+            self.first_read_started.set()
+            self.release.wait()
+        return [row for row in self.rows if not season or row["Season"] == season]
+
+    def get_seasons(self):
+        return sorted({row["Season"] for row in self.rows}, reverse=True)
+
+    def get_data_version(self):
+        return self.version
+
+    def reload(self):
+        pass
+
+
+def make_service(repository, lazy=False, compute_workers=1, cache_size=32):
+    store = PlayerDataStore(repository, lazy=lazy)
+    service = ClusteringService(repository, store, cache_size=cache_size,
+                                executor=BoundedExecutor("compute", max_workers=compute_workers),
+                                load_executor=BoundedExecutor("load", max_workers=2))
+    return store, service
+
+
+def test_loading_request_does_not_deadlock_a_one_worker_pool():
+    # One request is still loading the season when the data gets published and a
+    # second request starts the shared k-means run on the only compute worker
+    repository = StubRepository(make_rows(players_per_season=40), block_first_read=True)
+    store, service = make_service(repository, lazy=True, compute_workers=1)
+
+    async def scenario():
+        loading = asyncio.create_task(service.get_clustering_async(SEASON, 3))
+        await asyncio.to_thread(repository.first_read_started.wait, 5)
+        await asyncio.to_thread(store.season_dataset, SEASON)
+        leader = asyncio.create_task(service.get_clustering_async(SEASON, 3))
+        await asyncio.sleep(0.05)
+        repository.release.set()
+        return await asyncio.wait_for(asyncio.gather(loading, leader), timeout=10)
+
+    try:
+        first, second = asyncio.run(scenario())
+    finally:
+        repository.release.set()
+        service.executor.shutdown(wait=False)
+        service.load_executor.shutdown(wait=False)
+    assert first.model_dump() == second.model_dump()
+    assert service.executor.stats()["completed"] == 1
+
+
+def counting_runs(service):
+    """Wrap the service's k-means entry points; returns the list of (season or seasons) it ran for."""
+    runs = []
+    cluster_players, cluster_seasons = service.cluster_players, service.cluster_seasons
+
+    def counted_players(season, num_clusters, **kwargs):
+        runs.append(season)
+        return cluster_players(season, num_clusters, **kwargs)
+
+    def counted_seasons(seasons, num_clusters, **kwargs):
+        runs.append(tuple(seasons))
+        return cluster_seasons(seasons, num_clusters, **kwargs)
+
+    service.cluster_players, service.cluster_seasons = counted_players, counted_seasons
+    return runs
+
+
+def test_repeat_requests_hit_the_cache():
+    _, service = make_service(StubRepository(make_rows()))
+    runs = counting_runs(service)
+    first = service.get_clustering(SEASON, 3)
+    assert service.get_clustering(SEASON, 3) is first
+    cluster = first.clusters[0]
+    assert service.get_cluster(cluster.cluster_id, SEASON, 3) is cluster
+    assert service.get_encoded_clustering(SEASON, 3) is service.get_encoded_clustering(SEASON, 3)
+    assert asyncio.run(service.get_clustering_async(SEASON, 3)) is first
+    assert runs == [SEASON]
+
+
+def test_every_key_part_is_cached_separately():
+    _, service = make_service(StubRepository(make_rows()))
+    runs = counting_runs(service)
+    for season, num_clusters, seed, seasons in [(SEASON, 3, 1, None), (SEASON, 4, 1, None), (SEASON, 3, 2, None),
+                                                ("2022_23", 3, 1, None), (SEASON, 3, 1, ["2022_23", "2023_24"])]:
+        service.get_clustering(season, num_clusters, seed, seasons)
+        service.get_clustering(season, num_clusters, seed, seasons)
+    assert runs == [SEASON, SEASON, SEASON, "2022_23", ("2022_23", "2023_24")]
+
+
+def test_least_recently_used_entry_is_evicted():
+    _, service = make_service(StubRepository(make_rows()), cache_size=2)
+    runs = counting_runs(service)
+    service.get_clustering(SEASON, 2)
+    service.get_clustering(SEASON, 3)
+    service.get_clustering(SEASON, 2)
+    service.get_clustering(SEASON, 4)
+    assert len(service._cache) == 2
+    service.get_clustering(SEASON, 2)
+    assert runs == [SEASON] * 3
+
+    service.get_clustering(SEASON, 3)
+    assert runs == [SEASON] * 4
+
+
+def test_reload_with_new_data_invalidates_cached_results():
+    repository = StubRepository(make_rows())
+    store, service = make_service(repository)
+    runs = counting_runs(service)
+    before = service.get_clustering(SEASON, 3)
+
+    store.reload()
+    assert service.get_clustering(SEASON, 3) is before
+
+    repository.rows = make_rows(seed=1)
+    repository.version = "v2"
+    store.reload()
+    after = service.get_clustering(SEASON, 3)
+    assert after is not before
+    assert after.model_dump() == make_service(StubRepository(make_rows(seed=1)))[1].get_clustering(SEASON, 3).model_dump()
+    assert runs == [SEASON, SEASON]
@@ -0,0 +1,14 @@
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_importing_the_app_does_not_load_numpy_or_the_services():
+    # A fresh interpreter: this test process has long since imported everything
+    code = ("import sys, app.main; "
+            "print(sorted(m for m in ('numpy', 'boto3', 'app.models.dataset', 'app.services.player_data_store', "
+            "'app.services.player_similarity', 'app.services.clustering') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
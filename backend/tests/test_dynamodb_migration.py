@@ -0,0 +1,127 @@
+import json
+import re
+
+import pytest
+from botocore.exceptions import ClientError
+
+from app.repositories.dynamodb_player_repository import DynamoDBPlayerRepository
+from app.repositories.file_player_repository import FilePlayerRepository
+from scripts.fake_dynamodb_table import FakeDynamoDBClient
+from scripts import migrate_to_dynamodb
+from scripts.migrate_to_dynamodb import migrate_data_to_dynamodb, plain_item, season_items, verify_migration
+
+from conftest import SEASONS, edit_season
+
+TABLE = "players"
+
+
+@pytest.fixture
+def migrated(data_dir, tmp_path):
+    """A fake table the CSVs in data_dir were migrated to, with its catalog."""
+    client = FakeDynamoDBClient()
+    assert migrate_data_to_dynamodb(data_dir, TABLE, SEASONS, workers=4,
+                                    checkpoint_path=str(tmp_path / "checkpoint.json"), client=client)
+    return client
+
+
+class RecordingClient:
+    """Delegates to a fake table, recording the seasons written and failing every batch of `failing_season`."""
+
+    def __init__(self, client, failing_season=None):
+        self.client = client
+        self.failing_season = failing_season
+        self.written = set()
+
+    def batch_write_item(self, RequestItems, **kwargs):
+        seasons = {request["PutRequest"]["Item"]["Season"]["S"]
+                   for requests in RequestItems.values() for request in requests if "PutRequest" in request}
+        if self.failing_season in seasons:
+            raise ClientError({"Error": {"Code": "ValidationException", "Message": "bad item"}}, "BatchWriteItem")
+        self.written |= seasons
+        return self.client.batch_write_item(RequestItems=RequestItems, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+def verify(client, data_dir, repair=False):
+    repository = DynamoDBPlayerRepository(TABLE, client=client)
+    players_by_season = season_items(FilePlayerRepository(data_dir).get_all_players())
+    return verify_migration(repository, players_by_season, SEASONS, workers=4, repair=repair)
+
+
+def catalog_item(client):
+    repository = DynamoDBPlayerRepository(TABLE, client=client)
+    return client.get_item(TableName=TABLE, Key=repository._catalog_key()).get("Item")
+
+
+def test_verify_reports_a_missing_catalog_without_writing(migrated, data_dir):
+    del migrated._items[("#catalog", "#seasons")]
+    items = dict(migrated._items)
+
+    assert not verify(migrated, data_dir)
+    assert migrated._items == items
+
+    assert verify(migrated, data_dir, repair=True)
+    assert catalog_item(migrated) is not None
+    assert verify(migrated, data_dir)
+
+
+def test_verify_reports_a_stale_catalog_count(migrated, data_dir):
+    assert verify(migrated, data_dir)
+    repository = DynamoDBPlayerRepository(TABLE, client=migrated)
+    catalog = repository.get_season_catalog()
+    repository._write_catalog({"2022_23": catalog["seasons"]["2022_23"]["count"] + 1})
+    item = catalog_item(migrated)
+
+    assert not verify(migrated, data_dir)
+    assert catalog_item(migrated) == item
+
+    assert verify(migrated, data_dir, repair=True)
+    assert verify(migrated, data_dir)
+
+
+def test_rerun_resumes_from_the_checkpoint(data_dir, tmp_path):
+    checkpoint = str(tmp_path / "checkpoint.json")
+    table = FakeDynamoDBClient()
+    failing = RecordingClient(table, failing_season="2022_23")
+    assert not migrate_data_to_dynamodb(data_dir, TABLE, SEASONS, workers=4, checkpoint_path=checkpoint, client=failing)
+    with open(checkpoint) as f:
+        assert sorted(json.load(f)["completed"]) == ["2021_22", "2023_24"]
+
+    rerun = RecordingClient(table)
+    assert migrate_data_to_dynamodb(data_dir, TABLE, SEASONS, workers=4, checkpoint_path=checkpoint, client=rerun)
+    assert rerun.written == {"2022_23"}
+    assert verify(table, data_dir)
+
+    # A season whose CSV changed since it was checkpointed is migrated again
+    edit_season(data_dir, "2021_22")
+    rerun = RecordingClient(table)
+    assert migrate_data_to_dynamodb(data_dir, TABLE, SEASONS, workers=4, checkpoint_path=checkpoint, client=rerun)
+    assert rerun.written == {"2021_22"}
+    assert verify(table, data_dir)
+
+
+def test_unprocessed_items_are_retried_until_written(data_dir, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(migrate_to_dynamodb.time, "sleep", lambda seconds: None)
+    table = FakeDynamoDBClient(unprocessed_rate=0.3)
+    # One worker keeps the fake's seeded throttling deterministic
+    assert migrate_data_to_dynamodb(data_dir, TABLE, SEASONS, workers=1,
+                                    checkpoint_path=str(tmp_path / "checkpoint.json"), client=table)
+    table.unprocessed_rate = 0.0
+    assert int(re.search(r"(\d+) retried batches", capsys.readouterr().out).group(1)) > 0
+
+    expected = season_items(FilePlayerRepository(data_dir).get_all_players())
+    stored = {key: plain_item(item) for key, item in table._items.items() if not key[0].startswith("#")}
+    assert stored == {(season, player): plain_item(item)
+                      for season, items in expected.items() for player, item in items.items()}
+    assert verify(table, data_dir)
+
+
+def test_verify_catches_a_changed_field_in_the_sample_row(migrated, data_dir):
+    expected = season_items(FilePlayerRepository(data_dir).get_all_players())
+    player = next(iter(expected["2023_24"]))
+    item = migrated._items[("2023_24", player)]
+    item["PTS"] = {"N": str(float(item["PTS"]["N"]) + 1)}
+
+    assert not verify(migrated, data_dir)
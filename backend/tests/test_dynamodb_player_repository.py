@@ -0,0 +1,115 @@
+import pytest
+from botocore.exceptions import ClientError
+
+from app.repositories.dynamodb_player_repository import DynamoDBPlayerRepository
+from app.repositories.file_player_repository import FilePlayerRepository
+from scripts.fake_dynamodb_table import FakeDynamoDBClient
+
+PAGE_SIZE = 50
+
+
+@pytest.fixture
+def table(data_dir):
+    """A fake table with the CSV rows of data_dir and a season catalog, paged small enough to need several pages."""
+    client = FakeDynamoDBClient(page_size=PAGE_SIZE)
+    client.load_items(FilePlayerRepository(data_dir, ingest_workers=1).get_all_players())
+    DynamoDBPlayerRepository(client=client).repair_season_catalog()
+    return client
+
+
+class FailingSegmentClient:
+    """Delegates to a fake table, but the first scan of `segment` past its first page fails."""
+
+    def __init__(self, client, segment):
+        self.client = client
+        self.segment = segment
+        self.failed = False
+
+    def scan(self, **kwargs):
+        if kwargs.get("Segment") == self.segment and "ExclusiveStartKey" in kwargs and not self.failed:
+            self.failed = True
+            raise ClientError({"Error": {"Code": "ProvisionedThroughputExceededException", "Message": "slow down"}},
+                              "Scan")
+        return self.client.scan(**kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+def by_key(players):
+    return sorted(players, key=lambda player: (player["Season"], player["Player"]))
+
+
+def test_serial_scan_follows_last_evaluated_key(table):
+    rows = len(table._items) - 1  # less the catalog
+    table.requests = 0
+    players = DynamoDBPlayerRepository(client=table, total_segments=1).get_all_players()
+    assert table.requests == -(-rows // PAGE_SIZE)
+    assert len({(player["Season"], player["Player"]) for player in players}) == len(players) > 0
+
+
+@pytest.mark.parametrize("segments", [2, 4, 16])
+def test_segmented_scan_returns_the_serial_rows(table, segments):
+    serial = DynamoDBPlayerRepository(client=table, total_segments=1).get_all_players()
+    segmented = DynamoDBPlayerRepository(client=table, total_segments=segments).get_all_players()
+    assert by_key(segmented) == by_key(serial)
+
+
+def test_segmented_scan_repeats_in_the_same_order(table):
+    first = DynamoDBPlayerRepository(client=table, total_segments=4).get_all_players()
+    second = DynamoDBPlayerRepository(client=table, total_segments=4).get_all_players()
+    assert first == second
+
+
+def test_failed_segment_fails_the_read_without_caching_a_partial_result(table):
+    serial = DynamoDBPlayerRepository(client=table, total_segments=1).get_all_players()
+    client = FailingSegmentClient(table, segment=1)
+    repository = DynamoDBPlayerRepository(client=client, total_segments=4)
+
+    assert repository.get_all_players() == []
+    assert client.failed
+    assert by_key(repository.get_all_players()) == by_key(serial)
+
+
+@pytest.fixture
+def packed_table(table):
+    repository = DynamoDBPlayerRepository(client=table)
+    for season in repository.get_season_catalog()["seasons"]:
+        assert repository.write_packed_season(season)
+    return table
+
+
+def test_packed_reads_return_the_scanned_rows(packed_table):
+    scanned = DynamoDBPlayerRepository(client=packed_table)
+    packed = DynamoDBPlayerRepository(client=packed_table, packed_seasons=True)
+    packed_table.requests = 0
+    rows = scanned.get_all_players()
+    scan_requests, packed_table.requests = packed_table.requests, 0
+    assert by_key(packed.get_all_players()) == by_key(rows)
+    assert packed_table.requests < scan_requests
+    for season in scanned.get_seasons():
+        assert packed.get_all_players(season) == scanned.get_all_players(season)
+
+
+def test_packed_items_never_leak_into_rows_or_seasons(packed_table):
+    repository = DynamoDBPlayerRepository(client=packed_table, total_segments=4)
+    players = repository.get_all_players()
+    assert players
+    assert not any(player["Season"].startswith("#") for player in players)
+    assert not any(season.startswith("#") for season in repository.get_seasons())
+    assert repository.get_all_players(DynamoDBPlayerRepository.PACKED_SEASON) == []
+
+
+@pytest.mark.parametrize("damage", ["missing", "stale"])
+def test_unusable_packed_item_falls_back_to_the_rows(packed_table, damage):
+    scanned = DynamoDBPlayerRepository(client=packed_table)
+    expected = by_key(scanned.get_all_players())
+    key = (DynamoDBPlayerRepository.PACKED_SEASON, "2022_23")
+    if damage == "missing":
+        del packed_table._items[key]
+    else:
+        packed_table._items[key]["Version"] = {"N": "-1"}
+
+    repository = DynamoDBPlayerRepository(client=packed_table, packed_seasons=True)
+    assert repository.get_all_players("2022_23") == scanned.get_all_players("2022_23")
+    assert by_key(repository.get_all_players()) == expected
@@ -0,0 +1,59 @@
+import gzip
+import json
+
+from fastapi.encoders import jsonable_encoder
+
+from app.models.dataset import PlayerDataset
+from app.models.cluster import ClusteringResult, PlayerCluster
+from app.services.encoded_payload import EncodedPayload, dumps
+
+from conftest import make_rows
+
+
+def starlette_json(value):
+    return json.dumps(jsonable_encoder(value), ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def make_result():
+    dataset = PlayerDataset(make_rows(players_per_season=6))
+    players = [dataset.player_stats(i) for i in range(len(dataset.records))]
+    clusters = [PlayerCluster(cluster_id=i, players=players[i::2], centroid={"PTS": 1.5 * i}) for i in range(2)]
+    return ClusteringResult(clusters=clusters, season="2023_24", num_clusters=2, seed=7, iterations=3, inertia=1.25)
+
+
+def test_models_encode_like_jsonable_encoder():
+    result = make_result()
+    assert dumps(result) == starlette_json(result)
+    assert dumps(result.clusters) == starlette_json(result.clusters)
+    assert dumps({"result": result, "names": ["Jokić"]}) == starlette_json({"result": result, "names": ["Jokić"]})
+
+
+def test_rows_encode_like_jsonable_encoder():
+    rows = make_rows(players_per_season=5)
+    assert dumps(rows) == starlette_json(rows)
+
+
+def test_payload_is_compressed_when_built(monkeypatch):
+    body = dumps(make_rows(players_per_season=20))
+    payload = EncodedPayload(body)
+
+    def no_compression(*args, **kwargs):
+        raise AssertionError("compressed while serving")
+
+    monkeypatch.setattr(gzip, "compress", no_compression)
+    compressed, encoding = payload.body_for("gzip, deflate")
+    assert encoding == "gzip"
+    assert gzip.decompress(compressed) == body
+    assert payload.body_for("gzip, deflate")[0] is compressed
+
+
+def test_payload_honours_accept_encoding():
+    body = dumps(make_rows(players_per_season=20))
+    payload = EncodedPayload(body)
+    assert payload.body_for("") == (body, None)
+    assert payload.body_for("gzip;q=0, identity") == (body, None)
+    assert payload.body_for("*")[1] in ("br", "gzip")
+
+    small = EncodedPayload(b'{"ok":true}')
+    assert small.body_for("gzip") == (b'{"ok":true}', None)
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.executors import BoundedExecutor, ExecutorBusyError
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def gate():
+    """An event blocking jobs until the test sets it; set on teardown so no pool thread is left waiting."""
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def fill(executor, gate, jobs):
+    futures = [executor.submit(gate.wait) for _ in range(jobs)]
+    wait_for(lambda: executor.stats()["running"] == min(jobs, executor.max_workers))
+    return futures
+
+
+def test_accepts_workers_plus_queue_jobs(gate):
+    executor = BoundedExecutor("test", max_workers=2, max_queue=3)
+    futures = fill(executor, gate, 5)
+    stats = executor.stats()
+    assert (stats["running"], stats["queued"]) == (2, 3)
+    # Jobs leave the queue as soon as a worker picks them up, so the peak depends on timing
+    assert 3 <= stats["peak_queued"] <= 5
+
+    gate.set()
+    assert all(future.result(timeout=5) for future in futures)
+    wait_for(lambda: executor.stats()["completed"] == 5)
+    assert executor.stats()["queued"] == executor.stats()["running"] == 0
+
+
+def test_rejects_when_full_and_accepts_again_once_drained(gate):
+    executor = BoundedExecutor("test", max_workers=2, max_queue=1)
+    futures = fill(executor, gate, 3)
+    with pytest.raises(ExecutorBusyError):
+        executor.submit(gate.wait)
+    assert executor.stats()["rejected"] == 1
+
+    gate.set()
+    for future in futures:
+        future.result(timeout=5)
+    # Slots are released by a done callback, just after the result is set
+    wait_for(lambda: executor._slots._value == 3)
+    assert executor.submit(lambda: "again").result(timeout=5) == "again"
+
+
+def test_one_worker_without_a_queue_runs_one_job_at_a_time(gate):
+    executor = BoundedExecutor("test", max_workers=1, max_queue=0)
+    first = executor.submit(gate.wait)
+    with pytest.raises(ExecutorBusyError):
+        executor.submit(gate.wait)
+
+    gate.set()
+    assert first.result(timeout=5)
+    wait_for(lambda: executor._slots._value == 1)
+    assert asyncio.run(executor.run(sum, [1, 2, 3])) == 6
+
+
+def test_run_propagates_errors_and_counts_them():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=0)
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        asyncio.run(executor.run(fail))
+    wait_for(lambda: executor.stats()["completed"] == 1)
+    assert executor.stats()["failed"] == 1
+    assert executor.submit(lambda: 1).result(timeout=5) == 1
+
+
+def test_shutdown_cancels_queued_jobs_and_releases_their_slots(gate):
+    executor = BoundedExecutor("test", max_workers=1, max_queue=2)
+    running, *queued = fill(executor, gate, 3)
+    executor.shutdown(wait=False)
+    assert all(future.cancelled() for future in queued)
+    stats = executor.stats()
+    assert (stats["queued"], stats["cancelled"]) == (0, 2)
+
+    gate.set()
+    assert running.result(timeout=5)
+    with pytest.raises(RuntimeError):
+        executor.submit(gate.wait)
+    wait_for(lambda: executor._slots._value == 3)
+    assert executor.stats()["queued"] == 0
@@ -0,0 +1,139 @@
+import builtins
+import os
+import shutil
+from collections import Counter
+
+import pytest
+
+from app.repositories import player_snapshot
+from app.repositories.csv_ingest import file_signature
+from app.repositories.file_player_repository import FilePlayerRepository
+
+from conftest import DATA_DIR, SEASONS, edit_season, touch
+
+
+@pytest.fixture
+def csv_reads(monkeypatch):
+    """Counts how often each CSV file is opened."""
+    reads = Counter()
+    real_open = builtins.open
+
+    def counting_open(file, *args, **kwargs):
+        if isinstance(file, str) and file.endswith(".csv"):
+            reads[os.path.basename(file)] += 1
+        return real_open(file, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "open", counting_open)
+    return reads
+
+
+def test_source_fingerprint_reuses_known_digests(data_dir, csv_reads):
+    expected = player_snapshot.source_fingerprint(data_dir)
+    hashes = {f"{season}.csv": file_signature(os.path.join(data_dir, f"{season}.csv"))[2] for season in SEASONS}
+    csv_reads.clear()
+    assert player_snapshot.source_fingerprint(data_dir, hashes) == expected
+    assert not csv_reads
+
+
+def test_fresh_snapshot_load_opens_no_csv(data_dir, tmp_path, csv_reads):
+    snapshot = str(tmp_path / "data.snapshot")
+    parsed = FilePlayerRepository(data_dir, snapshot_path=snapshot, ingest_workers=1)
+    assert os.path.exists(snapshot)
+
+    csv_reads.clear()
+    loaded = FilePlayerRepository(data_dir, snapshot_path=snapshot, ingest_workers=1)
+    assert loaded.get_all_players() == parsed.get_all_players()
+    assert loaded.get_seasons() == parsed.get_seasons()
+    assert loaded.get_data_version() == parsed.get_data_version()
+    # Every file matches the snapshot by mtime and size, so none is hashed
+    assert not csv_reads
+
+
+def test_touched_csv_is_hashed_once_then_trusted_again(data_dir, tmp_path, csv_reads):
+    snapshot = str(tmp_path / "data.snapshot")
+    parsed = FilePlayerRepository(data_dir, snapshot_path=snapshot, ingest_workers=1)
+    touch(os.path.join(data_dir, "2022_23.csv"))
+
+    csv_reads.clear()
+    loaded = FilePlayerRepository(data_dir, snapshot_path=snapshot, ingest_workers=1)
+    assert loaded.get_all_players() == parsed.get_all_players()
+    # Hashed for the freshness check, not parsed: the snapshot still matches the content
+    assert csv_reads == Counter({f"{season}.csv": 1 for season in SEASONS})
+
+    csv_reads.clear()
+    FilePlayerRepository(data_dir, snapshot_path=snapshot, ingest_workers=1)
+    assert not csv_reads
+
+
+def test_read_snapshot_closes_the_mapping(data_dir, tmp_path, monkeypatch):
+    snapshot = str(tmp_path / "data.snapshot")
+    FilePlayerRepository(data_dir, snapshot_path=snapshot, ingest_workers=1)
+    mappings = []
+    real_mmap = player_snapshot.mmap.mmap
+
+    def recording_mmap(*args, **kwargs):
+        mappings.append(real_mmap(*args, **kwargs))
+        return mappings[-1]
+
+    monkeypatch.setattr(player_snapshot.mmap, "mmap", recording_mmap)
+    assert player_snapshot.read_snapshot(snapshot)
+    assert len(mappings) == 1 and mappings[0].closed
+
+
+def test_stale_snapshot_is_rebuilt(data_dir, tmp_path):
+    snapshot = str(tmp_path / "data.snapshot")
+    FilePlayerRepository(data_dir, snapshot_path=snapshot, ingest_workers=1)
+    os.remove(os.path.join(data_dir, "2021_22.csv"))
+
+    repository = FilePlayerRepository(data_dir, snapshot_path=snapshot, ingest_workers=1)
+    assert repository.get_seasons() == ["2023_24", "2022_23"]
+    assert player_snapshot.read_snapshot(snapshot, player_snapshot.source_fingerprint(data_dir)) is not None
+
+
+def test_lazy_scan_opens_no_csv(data_dir, csv_reads):
+    repository = FilePlayerRepository(data_dir, lazy=True)
+    assert repository.get_seasons() == ["2023_24", "2022_23", "2021_22"]
+    assert repository.get_data_version() is not None
+    assert repository.refresh() == []
+    assert not csv_reads
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_refresh_picks_up_edited_added_and_removed_files(data_dir, lazy):
+    repository = FilePlayerRepository(data_dir, ingest_workers=1, lazy=lazy)
+    repository.get_all_players()
+    version = repository.get_data_version()
+
+    edit_season(data_dir, "2022_23")
+    shutil.copy(os.path.join(DATA_DIR, "2020_21.csv"), os.path.join(data_dir, "2020_21.csv"))
+    os.remove(os.path.join(data_dir, "2021_22.csv"))
+
+    assert repository.refresh() == ["2020_21", "2021_22", "2022_23"]
+    fresh = FilePlayerRepository(data_dir, ingest_workers=1)
+    assert repository.get_all_players() == fresh.get_all_players()
+    assert repository.get_seasons() == fresh.get_seasons() == ["2023_24", "2022_23", "2020_21"]
+    assert repository.get_data_version() == fresh.get_data_version() != version
+    assert repository.refresh() == []
+
+
+def test_refresh_ignores_touched_files(data_dir):
+    repository = FilePlayerRepository(data_dir, ingest_workers=1)
+    players = repository.get_all_players()
+    version = repository.get_data_version()
+
+    for season in SEASONS:
+        touch(os.path.join(data_dir, f"{season}.csv"))
+
+    assert repository.refresh() == []
+    assert repository.get_all_players() is players
+    assert repository.get_data_version() == version
+
+
+def test_lazy_and_eager_loads_give_the_same_version(data_dir):
+    eager = FilePlayerRepository(data_dir, ingest_workers=1)
+    lazy = FilePlayerRepository(data_dir, ingest_workers=1, lazy=True)
+    assert lazy.get_data_version() == eager.get_data_version()
+    lazy.get_all_players()
+    assert lazy.get_data_version() == eager.get_data_version()
+    eager.reload()
+    assert lazy.get_data_version() == eager.get_data_version()
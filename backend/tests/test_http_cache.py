@@ -0,0 +1,69 @@
+import os
+
+from app import dependencies
+from app.repositories.file_player_repository import FilePlayerRepository
+
+from conftest import SEASONS, edit_season, touch
+
+
+def test_no_etag_until_the_data_store_is_built(api):
+    # Building the store on the event loop just to tag a response is what this avoids
+    assert api.get("/players/seasons").headers.get("etag") is None
+    assert dependencies._data_store is not None
+    assert api.get("/players/seasons").headers["etag"].startswith('W/"')
+
+
+def test_matching_if_none_match_gets_304(api):
+    api.get("/players/seasons")
+    response = api.get("/players", params={"season": "2022_23"}, headers={"Accept-Encoding": "gzip"})
+    etag = response.headers["etag"]
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["cache-control"] == "public, max-age=60"
+
+    for if_none_match in (etag, etag[2:], f'"other", {etag}', "*"):
+        cached = api.get("/players", params={"season": "2022_23"}, headers={"If-None-Match": if_none_match})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["etag"] == etag
+        assert cached.headers["cache-control"] == "public, max-age=60"
+        assert cached.headers["vary"] == "Accept-Encoding"
+
+    stale = api.get("/players", params={"season": "2022_23"}, headers={"If-None-Match": 'W/"other"'})
+    assert stale.status_code == 200
+    assert stale.headers["etag"] == etag
+
+
+def test_non_get_requests_are_neither_tagged_nor_answered_with_304(api):
+    api.get("/players/seasons")
+    etag = api.get("/players/seasons").headers["etag"]
+    player = api.get("/players", params={"season": "2023_24", "limit": 1}).json()[0]["Player"]
+
+    response = api.post("/players/similar", json={"player_name": player, "season": "2023_24"},
+                        headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert "etag" not in response.headers
+    assert "cache-control" not in response.headers
+
+
+def test_etag_changes_with_the_data_only(api, data_dir):
+    api.get("/players/seasons")
+    etag = api.get("/players/seasons").headers["etag"]
+    store = dependencies.get_data_store()
+
+    for season in SEASONS:
+        touch(os.path.join(data_dir, f"{season}.csv"))
+    store.refresh()
+    assert api.get("/players/seasons").headers["etag"] == etag
+
+    edit_season(data_dir, "2022_23")
+    store.refresh()
+    assert api.get("/players/seasons").headers["etag"] != etag
+
+
+def test_lazy_and_eager_loads_share_one_version(api, data_dir, monkeypatch):
+    monkeypatch.setenv("LAZY_SEASON_LOADING", "true")
+    api.get("/players/seasons")
+    etag = api.get("/players", params={"season": "2022_23"}).headers["etag"]
+    # The first full load hashes every file; the version must not move because of it
+    assert api.get("/players").headers["etag"] == etag
+    assert dependencies.get_data_store().data_version() == FilePlayerRepository(data_dir, ingest_workers=1).get_data_version()
@@ -0,0 +1,49 @@
+import numpy as np
+
+from app.services.kmeans import kmeans, minibatch_kmeans
+
+
+def separated_clusters(points_per_cluster=2000, seed=0):
+    """Four tight, far-apart blobs in the positive range the geometric-mean update needs."""
+    rng = np.random.default_rng(seed)
+    centers = np.array([[1.0, 1.0, 1.0], [9.0, 1.0, 1.0], [1.0, 9.0, 1.0], [1.0, 1.0, 9.0]])
+    data = np.concatenate([center + rng.normal(0, 0.05, (points_per_cluster, 3)) for center in centers])
+    truth = np.repeat(np.arange(len(centers)), points_per_cluster)
+    return data, truth, centers
+
+
+def assert_recovers_clusters(labels, truth):
+    # Every true blob maps to exactly one label, and no two blobs share one
+    mapping = {int(t): set(labels[truth == t].tolist()) for t in np.unique(truth)}
+    assert all(len(found) == 1 for found in mapping.values())
+    assert len({found.pop() for found in mapping.values()}) == len(mapping)
+
+
+def test_minibatch_converges_early_on_separated_data():
+    data, truth, centers = separated_clusters()
+    result = minibatch_kmeans(data, 4, batch_size=256, max_iterations=100, seed=1)
+    assert result.iterations < 100
+    assert_recovers_clusters(result.labels, truth)
+    # Each true center has a centroid right on top of it
+    distances = np.linalg.norm(centers[:, None, :] - result.centroids[None, :, :], axis=2)
+    assert distances.min(axis=1).max() < 0.05
+
+
+def test_minibatch_runs_to_max_iterations_with_zero_tolerance():
+    data, _, _ = separated_clusters(points_per_cluster=200)
+    assert minibatch_kmeans(data, 4, batch_size=64, max_iterations=15, seed=1, tolerance=0).iterations == 15
+
+
+def test_same_seed_gives_same_clustering():
+    data, _, _ = separated_clusters(points_per_cluster=300)
+    first = minibatch_kmeans(data, 4, batch_size=128, seed=7)
+    second = minibatch_kmeans(data, 4, batch_size=128, seed=7)
+    np.testing.assert_array_equal(first.labels, second.labels)
+    assert first.iterations == second.iterations
+
+
+def test_kmeans_recovers_separated_clusters():
+    data, truth, _ = separated_clusters(points_per_cluster=300)
+    result = kmeans(data, 4, seed=1)
+    assert result.iterations < 100
+    assert_recovers_clusters(result.labels, truth)
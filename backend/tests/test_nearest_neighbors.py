@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from app.services.nearest_neighbors import SimilarityIndex, euclidean_distances
+
+SEASONS = ["2021_22", "2022_23", "2023_24"]
+
+
+def make_index(rows_per_season=400, dims=16, seed=0, **kwargs):
+    rng = np.random.default_rng(seed)
+    stats = rng.random((rows_per_season * len(SEASONS), dims)).astype(np.float32)
+    season_ids = np.repeat(np.arange(len(SEASONS), dtype=np.int16), rows_per_season)
+    season_slices = {
+        season: slice(code * rows_per_season, (code + 1) * rows_per_season)
+        for code, season in enumerate(SEASONS)
+    }
+    return SimilarityIndex(stats, season_ids, season_slices, **kwargs)
+
+
+def brute_force_answer(index, vector, k, candidates=None, seasons=None):
+    slices = None if seasons is None else [index.season_slices[s] for s in seasons]
+    return index.brute_force(vector, k, candidates, slices)
+
+
+def assert_same(actual, expected):
+    np.testing.assert_array_equal(actual[0], expected[0])
+    np.testing.assert_allclose(actual[1], expected[1], rtol=1e-6, atol=1e-6)
+
+
+def test_tree_is_built_when_min_tree_size_is_zero():
+    assert make_index(min_tree_size=0, leaf_size=8).tree is not None
+    assert make_index().tree is None
+
+
+@pytest.mark.parametrize("k", [1, 5, 37])
+@pytest.mark.parametrize("seasons", [None, ["2022_23"], ["2021_22", "2023_24"]])
+def test_tree_query_matches_brute_force(k, seasons):
+    index = make_index(min_tree_size=0, leaf_size=8)
+    rng = np.random.default_rng(1)
+    for _ in range(20):
+        vector = rng.random(index.stats.shape[1]).astype(np.float32)
+        assert_same(index.query(vector, k, seasons=seasons), brute_force_answer(index, vector, k, seasons=seasons))
+
+
+def test_tree_query_respects_candidates():
+    index = make_index(min_tree_size=0, leaf_size=8)
+    rng = np.random.default_rng(2)
+    for row in rng.integers(0, index.stats.shape[0], 10).tolist():
+        candidates = np.ones(index.stats.shape[0], dtype=bool)
+        candidates[row] = False
+        candidates[rng.integers(0, index.stats.shape[0], 200)] = False
+        vector = index.stats[row]
+        actual = index.query(vector, 10, candidates, seasons=["2022_23", "2023_24"])
+        assert row not in actual[0].tolist()
+        assert_same(actual, brute_force_answer(index, vector, 10, candidates, ["2022_23", "2023_24"]))
+
+
+def test_unknown_seasons_return_nothing():
+    index = make_index(min_tree_size=0, leaf_size=8)
+    rows, distances = index.query(index.stats[0], 5, seasons=["1999_00"])
+    assert rows.size == 0 and distances.size == 0
+
+
+def test_query_many_matches_single_queries():
+    index = make_index(min_tree_size=0, leaf_size=8)
+    rng = np.random.default_rng(3)
+    query_rows = rng.integers(0, index.stats.shape[0], 12)
+    vectors = index.stats[query_rows]
+    ks = [1, 3, 5, 8, 13, 21, 2, 4, 6, 9, 10, 11]
+    candidates = np.ones((len(query_rows), index.stats.shape[0]), dtype=bool)
+    candidates[np.arange(len(query_rows)), query_rows] = False
+
+    results = index.query_many(vectors, ks, candidates)
+    for i, (rows, distances) in enumerate(results):
+        assert_same((rows, distances), index.query(vectors[i], ks[i], candidates[i]))
+        assert_same((rows, distances), brute_force_answer(index, vectors[i], ks[i], candidates[i]))
+
+
+def test_ties_are_broken_by_row_index():
+    index = make_index(min_tree_size=0, leaf_size=4)
+    # Coarse values make many rows equidistant from each query
+    index.stats[:] = np.round(index.stats * 4) / 4
+    index = SimilarityIndex(index.stats, index.season_ids, index.season_slices, min_tree_size=0, leaf_size=4)
+    query_rows = np.arange(0, index.stats.shape[0], 97)
+    batched = index.query_many(index.stats[query_rows], [9] * len(query_rows))
+    for row, many in zip(query_rows.tolist(), batched):
+        expected = brute_force_answer(index, index.stats[row], 9)
+        distances = euclidean_distances(index.stats, index.stats[row])
+        order = np.lexsort((np.arange(distances.shape[0]), distances))[:9]
+        np.testing.assert_array_equal(expected[0], order)
+        assert_same(index.query(index.stats[row], 9), expected)
+        assert_same(many, expected)
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from app.repositories.file_player_repository import FilePlayerRepository
+from app.services.neighbor_table import NeighborTable
+from app.services.nearest_neighbors import build_similarity_index
+from app.services.player_data_store import PlayerDataStore
+from app.services.player_similarity import PlayerSimilarityService
+
+from conftest import edit_season
+
+K = 10
+
+
+@pytest.fixture
+def table_path(data_dir, tmp_path):
+    path = str(tmp_path / "neighbors.bin")
+    NeighborTable.build(PlayerDataStore(FilePlayerRepository(data_dir, ingest_workers=1)).load(), K).save(path)
+    return path
+
+
+def make_service(data_dir, table_path=None):
+    data_store = PlayerDataStore(FilePlayerRepository(data_dir, ingest_workers=1), neighbor_table_path=table_path)
+    return PlayerSimilarityService(data_store.player_repository, data_store), data_store.load()
+
+
+def sample_rows(dataset, count=25):
+    valid = np.flatnonzero(dataset.valid_rows)
+    return np.random.default_rng(0).choice(valid, count, replace=False).tolist()
+
+
+def similar(service, dataset, row, num_similar):
+    player = dataset.records[row]
+    _, players = service.find_similar_players(player["Player"], player["Season"], num_similar)
+    return [p.model_dump() for p in players]
+
+
+def test_table_matches_brute_force(data_dir, table_path):
+    dataset = PlayerDataStore(FilePlayerRepository(data_dir, ingest_workers=1)).load()
+    table = NeighborTable.load(table_path, dataset)
+    index = dataset.similarity_index or build_similarity_index(dataset)
+    for row in sample_rows(dataset):
+        for num_similar in (1, 5, K):
+            neighbors, distances = table.lookup(row, num_similar)
+            expected_neighbors, expected_distances = index.brute_force(
+                dataset.stats[row], num_similar, dataset.candidate_rows(row))
+            np.testing.assert_array_equal(neighbors, expected_neighbors)
+            np.testing.assert_allclose(distances, expected_distances, rtol=1e-5)
+
+
+def test_service_answers_from_the_table_like_from_the_index(data_dir, table_path):
+    with_table, dataset = make_service(data_dir, table_path)
+    assert dataset.neighbor_table is not None
+    without_table, _ = make_service(data_dir)
+
+    def no_index(*args, **kwargs):
+        raise AssertionError("answered from the index")
+
+    dataset.similarity_index = build_similarity_index(dataset)
+    dataset.similarity_index.query = no_index
+    for row in sample_rows(dataset, 10):
+        assert similar(with_table, dataset, row, 5) == similar(without_table, dataset, row, 5)
+
+
+def test_more_neighbors_than_stored_falls_back_to_the_index(data_dir, table_path):
+    with_table, dataset = make_service(data_dir, table_path)
+    without_table, _ = make_service(data_dir)
+    row = sample_rows(dataset, 1)[0]
+    assert dataset.neighbor_table.lookup(row, K + 1) is None
+    assert similar(with_table, dataset, row, K + 1) == similar(without_table, dataset, row, K + 1)
+
+
+def test_stale_table_is_ignored(data_dir, table_path):
+    edit_season(data_dir, "2022_23")
+    with_table, dataset = make_service(data_dir, table_path)
+    assert NeighborTable.load(table_path) is not None
+    assert dataset.neighbor_table is None
+
+    without_table, _ = make_service(data_dir)
+    for row in sample_rows(dataset, 5):
+        assert similar(with_table, dataset, row, 5) == similar(without_table, dataset, row, 5)
+
+
+def test_save_and_load_round_trip(data_dir, table_path, tmp_path):
+    table = NeighborTable.load(table_path)
+    path = str(tmp_path / "copy.bin")
+    table.save(path)
+    copy = NeighborTable.load(path)
+    assert (copy.fingerprint, copy.k, copy.rows) == (table.fingerprint, K, table.rows)
+    np.testing.assert_array_equal(copy.neighbors, table.neighbors)
+    np.testing.assert_array_equal(copy.distances, table.distances)
@@ -0,0 +1,64 @@
+import os
+import shutil
+
+from app.repositories.file_player_repository import FilePlayerRepository
+from app.services.player_data_store import PlayerDataStore
+
+from conftest import DATA_DIR, SEASONS, edit_season, touch
+
+
+def make_store(data_dir):
+    store = PlayerDataStore(FilePlayerRepository(data_dir, ingest_workers=1))
+    store.load()
+    return store
+
+
+def assert_same_dataset(dataset, expected):
+    assert dataset.fingerprint == expected.fingerprint
+    assert dataset.records == expected.records
+    assert dataset.season_table == expected.season_table
+    assert dataset.data_version == expected.data_version
+    assert (dataset.valid_rows == expected.valid_rows).all()
+
+
+def test_refresh_matches_a_fresh_build(data_dir):
+    store = make_store(data_dir)
+    before = store.dataset
+
+    edit_season(data_dir, "2022_23")
+    shutil.copy(os.path.join(DATA_DIR, "2020_21.csv"), os.path.join(data_dir, "2020_21.csv"))
+    os.remove(os.path.join(data_dir, "2021_22.csv"))
+
+    assert store.refresh() == ["2020_21", "2021_22", "2022_23"]
+    assert store.dataset is not before
+    assert before.season_table == sorted(SEASONS)
+    assert_same_dataset(store.dataset, make_store(data_dir).dataset)
+    assert store.dataset.similarity_index is not None
+    assert store.dataset.search_index is not None
+
+
+def test_each_kind_of_change_matches_a_fresh_build(data_dir):
+    store = make_store(data_dir)
+
+    edit_season(data_dir, "2023_24")
+    assert store.refresh() == ["2023_24"]
+    assert_same_dataset(store.dataset, make_store(data_dir).dataset)
+
+    shutil.copy(os.path.join(DATA_DIR, "2020_21.csv"), os.path.join(data_dir, "2020_21.csv"))
+    assert store.refresh() == ["2020_21"]
+    assert_same_dataset(store.dataset, make_store(data_dir).dataset)
+
+    os.remove(os.path.join(data_dir, "2022_23.csv"))
+    assert store.refresh() == ["2022_23"]
+    assert_same_dataset(store.dataset, make_store(data_dir).dataset)
+
+
+def test_touched_files_do_not_swap_the_dataset(data_dir):
+    store = make_store(data_dir)
+    dataset = store.dataset
+
+    for season in SEASONS:
+        touch(os.path.join(data_dir, f"{season}.csv"))
+
+    assert store.refresh() == []
+    assert store.dataset is dataset
@@ -0,0 +1,118 @@
+import math
+
+import pytest
+from pydantic import ValidationError
+
+from app.models.player import PlayerStats
+from app.repositories.file_player_repository import FilePlayerRepository
+
+
+def safe_convert(value, convert_func, default=0):
+    if value is None:
+        return default
+    if isinstance(value, str) and not value.strip():
+        return default
+    try:
+        return convert_func(value)
+    except (ValueError, TypeError):
+        return default
+
+
+def field_by_field(data):
+    """The converter both services used before PlayerStats.from_record, kept as the reference."""
+    return PlayerStats(
+        player=data.get('Player', ''),
+        season=data.get('Season', ''),
+        position=data.get('Pos', ''),
+        age=safe_convert(data.get('Age'), int),
+        team=data.get('Team', ''),
+        games_played=safe_convert(data.get('G'), int),
+        games_started=safe_convert(data.get('GS'), int),
+        minutes_per_game=safe_convert(data.get('MP'), float),
+        points_per_game=safe_convert(data.get('PTS'), float),
+        field_goals_per_game=safe_convert(data.get('FG'), float),
+        field_goal_attempts_per_game=safe_convert(data.get('FGA'), float),
+        field_goal_percentage=safe_convert(data.get('FG%'), float),
+        three_pointers_per_game=safe_convert(data.get('FG3'), float),
+        three_point_attempts_per_game=safe_convert(data.get('FG3A'), float),
+        three_point_percentage=safe_convert(data.get('FG3%'), float),
+        two_pointers_per_game=safe_convert(data.get('FG2'), float),
+        two_point_attempts_per_game=safe_convert(data.get('FG2A'), float),
+        two_point_percentage=safe_convert(data.get('FG2%'), float),
+        effective_field_goal_percentage=safe_convert(data.get('eFG%'), float),
+        free_throws_per_game=safe_convert(data.get('FT'), float),
+        free_throw_attempts_per_game=safe_convert(data.get('FTA'), float),
+        free_throw_percentage=safe_convert(data.get('FT%'), float),
+        offensive_rebounds_per_game=safe_convert(data.get('ORB'), float),
+        defensive_rebounds_per_game=safe_convert(data.get('DRB'), float),
+        total_rebounds_per_game=safe_convert(data.get('TRB'), float) if 'TRB' in data else
+        safe_convert(data.get('ORB'), float) + safe_convert(data.get('DRB'), float),
+        assists_per_game=safe_convert(data.get('AST'), float),
+        steals_per_game=safe_convert(data.get('STL'), float),
+        blocks_per_game=safe_convert(data.get('BLK'), float),
+        turnovers_per_game=safe_convert(data.get('TOV'), float),
+        personal_fouls_per_game=safe_convert(data.get('PF'), float),
+        player_id=data.get('Player-additional', '')
+    )
+
+
+def assert_same(actual, expected):
+    assert actual.model_dump_json() == expected.model_dump_json()
+    assert actual.model_fields_set == expected.model_fields_set
+    for field, value in expected.model_dump().items():
+        other = getattr(actual, field)
+        assert type(other) is type(value), field
+        assert other == value or (math.isnan(other) and math.isnan(value)), field
+
+
+BASE = {"Player": "Nikola Jokić", "Season": "2023_24", "Pos": "C", "Age": "28", "Team": "DEN", "G": "79",
+        "GS": "79", "MP": "34.6", "PTS": "26.4", "ORB": "2.8", "DRB": "9.9", "TRB": "12.4", "AST": "9.0",
+        "Player-additional": "jokicni01"}
+
+
+@pytest.mark.parametrize("changes", [
+    {},
+    {"PTS": None, "Age": None, "MP": None},
+    {"PTS": float("nan"), "Age": float("nan"), "G": float("nan")},
+    {"PTS": "", "Age": "  ", "G": ""},
+    {"PTS": "n/a", "Age": "28.0", "G": "abc"},
+    {"Age": 28.0, "G": 79.0, "PTS": 26},
+    {"PTS": "inf", "MP": "-1e3"},
+    {"TRB": None},
+    {"TRB": ""},
+], ids=["plain", "none", "nan", "blank", "unparsable", "numbers", "inf", "trb-none", "trb-blank"])
+def test_from_record_matches_field_by_field(changes):
+    row = dict(BASE, **changes)
+    assert_same(PlayerStats.from_record(row), field_by_field(row))
+
+
+@pytest.mark.parametrize("missing", [["TRB"], ["TRB", "ORB"], ["TRB", "ORB", "DRB"], ["Player", "Season", "Pos"],
+                                     ["Team", "Player-additional"], list(BASE)])
+def test_from_record_matches_field_by_field_with_missing_columns(missing):
+    row = {column: value for column, value in BASE.items() if column not in missing}
+    assert_same(PlayerStats.from_record(row), field_by_field(row))
+
+
+@pytest.mark.parametrize("changes", [{"Team": None}, {"Player": 7}, {"Pos": float("nan")}])
+def test_non_string_text_columns_fail_validation_as_before(changes):
+    row = dict(BASE, **changes)
+    with pytest.raises(ValidationError) as expected:
+        field_by_field(row)
+    with pytest.raises(ValidationError) as actual:
+        PlayerStats.from_record(row)
+    assert [error["loc"] for error in actual.value.errors()] == [error["loc"] for error in expected.value.errors()]
+
+
+def test_every_bundled_row_matches_field_by_field(data_dir):
+    rows = FilePlayerRepository(data_dir, ingest_workers=1).get_all_players()
+    assert rows
+    for row in rows:
+        assert_same(PlayerStats.from_record(row), field_by_field(row))
+
+
+def test_decoded_dynamodb_rows_match_field_by_field(data_dir):
+    # The DynamoDB repository hands out numbers as floats and blank cells as zeros
+    rows = FilePlayerRepository(data_dir, ingest_workers=1).get_all_players("2023_24")
+    for row in rows[:200]:
+        decoded = {key: float(value) if isinstance(value, (int, float)) else value for key, value in row.items()}
+        assert_same(PlayerStats.from_record(decoded), field_by_field(decoded))
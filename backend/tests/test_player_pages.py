@@ -0,0 +1,114 @@
+import base64
+import json
+
+import pytest
+
+from app.services.player_pages import PlayerPages, encode_cursor
+
+SEASONS = ["2021_22", "2022_23", "2023_24"]
+
+
+class StubRepository:
+    def __init__(self, rows, version="v1"):
+        self.rows = rows
+        self.version = version
+
+    def get_all_players(self, season=None):
+        return [row for row in self.rows if not season or row["Season"] == season]
+
+    def get_data_version(self):
+        return self.version
+
+
+def make_rows():
+    """Rows in no particular order; some players have one row per team, sharing a (Season, Player) key."""
+    rows = []
+    for season in reversed(SEASONS):
+        for i in range(9, -1, -1):
+            teams = 3 if i % 4 == 0 else 1
+            for team in range(teams):
+                rows.append({"Id": len(rows), "Season": season, "Player": f"Player {i}", "Team": f"T{team}"})
+    return rows
+
+
+def expected_order(rows, season=None):
+    return sorted((row for row in rows if not season or row["Season"] == season),
+                  key=lambda row: (row["Season"], row["Player"]))
+
+
+def read_all(pages, season, limit, fields=None):
+    rows, cursor, requests = [], None, 0
+    while True:
+        page, cursor = pages.page(season, limit, cursor, fields)
+        assert len(page) <= limit
+        rows.extend(page)
+        requests += 1
+        if cursor is None:
+            return rows, requests
+
+
+def read_rest(pages, season, limit, cursor):
+    rows = []
+    while cursor is not None:
+        page, cursor = pages.page(season, limit, cursor)
+        rows.extend(page)
+    return rows
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 7])
+def test_pages_cover_one_season_once(limit):
+    rows = make_rows()
+    pages = PlayerPages(StubRepository(rows))
+    result, requests = read_all(pages, "2022_23", limit)
+    expected = expected_order(rows, "2022_23")
+    assert [row["Id"] for row in result] == [row["Id"] for row in expected]
+    assert len({row["Id"] for row in result}) == len(result)
+    assert requests == -(-len(expected) // limit)
+
+
+@pytest.mark.parametrize("limit", [1, 4, 5, 11])
+def test_pages_cover_every_season_once(limit):
+    rows = make_rows()
+    pages = PlayerPages(StubRepository(rows))
+    result, _ = read_all(pages, None, limit)
+    assert [row["Id"] for row in result] == [row["Id"] for row in expected_order(rows)]
+    assert len({row["Id"] for row in result}) == len(rows)
+
+
+def test_pages_project_fields():
+    pages = PlayerPages(StubRepository(make_rows()))
+    page, _ = pages.page("2023_24", 3, fields=["Player", "Team"])
+    assert [list(row) for row in page] == [["Player", "Team"]] * 3
+
+
+def test_cursor_survives_rows_added_before_it():
+    rows = make_rows()
+    repository = StubRepository(rows)
+    pages = PlayerPages(repository)
+    first, cursor = pages.page(None, 10)
+
+    repository.rows = [{"Id": -1, "Season": "2021_22", "Player": "Player 0", "Team": "NEW"}] + rows
+    repository.version = "v2"
+    rest = read_rest(pages, None, 10, cursor)
+    sent = [row["Id"] for row in first + rest]
+    assert len(set(sent)) == len(sent)
+    assert set(sent) == {row["Id"] for row in rows}
+
+
+def tampered(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor!",
+    encode_cursor("2022_23", "Player 1", 1)[:-3],
+    tampered(["2022_23", "Player 1", 0]),
+    tampered(["2022_23", "Player 1", "1"]),
+    tampered(["2022_23", 7, 1]),
+    tampered({"season": "2022_23"}),
+    tampered(["2022_23", "Player 1"]),
+])
+def test_tampered_cursor_raises_value_error(cursor):
+    pages = PlayerPages(StubRepository(make_rows()))
+    with pytest.raises(ValueError):
+        pages.page("2022_23", 5, cursor)
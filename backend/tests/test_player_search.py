@@ -0,0 +1,77 @@
+import pytest
+
+from app.models.dataset import NORMALIZED_STATS, PlayerDataset, fold_name
+from app.services.player_search import PlayerSearchIndex
+
+PLAYERS = {
+    "Nikola Jokić": ["2021_22", "2022_23", "2023_24"],
+    "Nikola Vučević": ["2021_22", "2022_23"],
+    "LeBron James": ["2022_23", "2023_24"],
+    "James Harden": ["2021_22"],
+    "Jalen Green": ["2022_23"],
+    "Jalen Green Jr.": ["2023_24"],
+    "Ja Morant": ["2023_24"],
+}
+
+
+def make_index(players=PLAYERS):
+    rows = []
+    for name, seasons in players.items():
+        for season in seasons:
+            row = {"Player": name, "Season": season, "Pos": "C", "Age": 25, "Team": "AAA", "G": 60, "GS": 60}
+            row.update({stat: 1.0 for stat in NORMALIZED_STATS})
+            rows.append(row)
+    rows.sort(key=lambda row: row["Season"])
+    dataset = PlayerDataset(rows)
+    dataset.normalize_data()
+    return PlayerSearchIndex(dataset)
+
+
+def names(results):
+    return [result.player for result in results]
+
+
+@pytest.mark.parametrize("name, folded", [("Nikola Jokić", "nikola jokic"), ("  LEBRON   James ", "lebron james"),
+                                          ("Dāvis Bertāns", "davis bertans")])
+def test_fold_name_ignores_case_accents_and_spacing(name, folded):
+    assert fold_name(name) == folded
+
+
+@pytest.mark.parametrize("query", ["jok", "JOK", "jokic", "Jokić", "nikola jok", "  jokic  "])
+def test_accents_and_case_are_folded(query):
+    assert names(make_index().search(query)) == ["Nikola Jokić"]
+
+
+def test_result_lists_every_season_latest_first():
+    result, = make_index().search("jokic")
+    assert result.seasons == ["2023_24", "2022_23", "2021_22"]
+    assert result.latest_season == "2023_24"
+
+
+def test_name_prefix_outranks_a_later_word_even_when_older():
+    # "James Harden" starts with the query; "LeBron James" only has it as a later word
+    assert names(make_index().search("james")) == ["James Harden", "LeBron James"]
+
+
+def test_exact_name_outranks_a_longer_name():
+    assert names(make_index().search("jalen green")) == ["Jalen Green", "Jalen Green Jr."]
+
+
+def test_same_tier_ranks_the_most_recent_season_first():
+    assert names(make_index().search("nikola")) == ["Nikola Jokić", "Nikola Vučević"]
+    assert names(make_index().search("ja")) == ["Ja Morant", "Jalen Green Jr.", "Jalen Green", "James Harden",
+                                                 "LeBron James"]
+
+
+def test_a_player_matching_twice_is_listed_once():
+    index = make_index({"Jones Jones": ["2023_24"], "Tre Jones": ["2023_24"]})
+    assert names(index.search("jones")) == ["Jones Jones", "Tre Jones"]
+
+
+def test_limit_keeps_the_best_matches():
+    assert names(make_index().search("ja", limit=2)) == ["Ja Morant", "Jalen Green Jr."]
+
+
+@pytest.mark.parametrize("query, limit", [("", 10), ("   ", 10), ("zzz", 10), ("jok", 0)])
+def test_empty_query_no_match_or_zero_limit_returns_nothing(query, limit):
+    assert make_index().search(query, limit) == []
@@ -0,0 +1,71 @@
+import pytest
+from pydantic import ValidationError
+
+from app.models.dataset import PlayerDataset
+from app.models.player import MAX_SIMILAR_PLAYERS, BatchSimilarPlayersQuery, PlayerQuery
+from app.services.nearest_neighbors import build_similarity_index
+from app.services.player_similarity import PlayerSimilarityService
+
+from conftest import make_rows
+
+
+class StubDataStore:
+    def __init__(self, dataset):
+        self.dataset = dataset
+
+    def load(self):
+        return self.dataset
+
+
+def make_service(rows):
+    dataset = PlayerDataset(rows)
+    dataset.normalize_data()
+    dataset.similarity_index = build_similarity_index(dataset)
+    return PlayerSimilarityService(player_repository=None, data_store=StubDataStore(dataset))
+
+
+def test_find_similar_players_returns_requested_count():
+    service = make_service(make_rows())
+    query_player, similar = service.find_similar_players("Player 3", "2023_24", num_similar=4)
+    assert query_player.player == "Player 3"
+    assert len(similar) == 4
+    assert all(p.player != "Player 3" or p.season != "2023_24" for p in similar)
+
+
+def test_unknown_player_raises_value_error():
+    service = make_service(make_rows())
+    with pytest.raises(ValueError):
+        service.find_similar_players("Nobody", "2023_24")
+
+
+@pytest.mark.parametrize("num_similar", [0, -3, MAX_SIMILAR_PLAYERS + 1])
+def test_player_query_bounds_num_similar(num_similar):
+    with pytest.raises(ValidationError):
+        PlayerQuery(player_name="Player 1", num_similar=num_similar)
+
+
+def test_player_query_accepts_cap():
+    assert PlayerQuery(player_name="Player 1", num_similar=MAX_SIMILAR_PLAYERS).num_similar == MAX_SIMILAR_PLAYERS
+
+
+@pytest.mark.parametrize("num_similar", [0, MAX_SIMILAR_PLAYERS + 1])
+def test_batch_query_bounds_num_similar(num_similar):
+    queries = [{"player_name": "Player 1"}, {"player_name": "Player 2", "num_similar": num_similar}]
+    with pytest.raises(ValidationError):
+        BatchSimilarPlayersQuery(queries=queries)
+
+
+def test_batch_query_limits_query_count():
+    with pytest.raises(ValidationError):
+        BatchSimilarPlayersQuery(queries=[{"player_name": "Player 1"}] * 101)
+
+
+def test_batch_answers_each_query():
+    service = make_service(make_rows())
+    batch = BatchSimilarPlayersQuery(queries=[
+        {"player_name": "Player 3", "season": "2023_24", "num_similar": 4},
+        {"player_name": "Nobody", "season": "2023_24"},
+    ])
+    found, missing = service.find_similar_players_batch(batch.queries)
+    assert [p.player for p in found[1]] == [p.player for p in service.find_similar_players("Player 3", "2023_24", 4)[1]]
+    assert isinstance(missing, ValueError)
@@ -12,6 +12,8 @@ def test_endpoints():
         "/players/?season=2023_24",
         "/players/seasons",
         "/players/seasons/",
+        "/players/search?q=lebron",
+        "/players/search/?q=lebron",
         "/players/similar?player_name=LeBron%20James&season=2023_24&num_similar=5",
         "/players/similar/?player_name=LeBron%20James&season=2023_24&num_similar=5"
     ]